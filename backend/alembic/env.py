@@ -31,7 +31,9 @@ target_metadata = Base.metadata
 # ... etc.
 
 def get_url():
-    return settings.DATABASE_URL
+    # Callers (e.g. tests) can target another database with
+    # config.attributes["database_url"]
+    return config.attributes.get("database_url") or settings.DATABASE_URL
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -0,0 +1,99 @@
+"""dining tables
+
+Tables move from the in-memory list into dining_tables, and reservations
+gain the table they are seated at and their seating window
+[reservation_date, reservation_end). Existing reservations get the default
+90 minute seating; their reservation_end is filled in batches.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18 18:21:37.000000
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001a'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+DEFAULT_DURATION_MINUTES = 90
+BACKFILL_BATCH_SIZE = 1000
+
+reservations = sa.table(
+    'reservations',
+    sa.column('id', sa.Integer()),
+    sa.column('reservation_date', sa.DateTime(timezone=True)),
+    sa.column('duration_minutes', sa.Integer()),
+    sa.column('reservation_end', sa.DateTime(timezone=True)),
+)
+
+
+def backfill_reservation_end() -> None:
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(reservations.c.id, reservations.c.reservation_date, reservations.c.duration_minutes)
+            .where(reservations.c.id > last_id)
+            .order_by(reservations.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        connection.execute(
+            reservations.update()
+            .where(reservations.c.id == sa.bindparam('row_id'))
+            .values(reservation_end=sa.bindparam('end')),
+            [
+                {'row_id': row.id, 'end': row.reservation_date + timedelta(minutes=row.duration_minutes)}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table('dining_tables',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('capacity', sa.Integer(), nullable=False),
+    sa.Column('table_type', sa.String(length=50), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('booking_version', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_dining_tables_id'), 'dining_tables', ['id'], unique=False)
+    # The server default fills duration_minutes on existing rows and is
+    # then dropped; new rows get the model's default
+    with op.batch_alter_table('reservations') as batch_op:
+        batch_op.add_column(sa.Column('table_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column(
+            'duration_minutes', sa.Integer(), server_default=str(DEFAULT_DURATION_MINUTES), nullable=False
+        ))
+        batch_op.add_column(sa.Column('reservation_end', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_foreign_key('fk_reservations_table_id', 'dining_tables', ['table_id'], ['id'])
+    with op.batch_alter_table('reservations') as batch_op:
+        batch_op.alter_column('duration_minutes', existing_type=sa.Integer(), server_default=None)
+    backfill_reservation_end()
+    op.create_index('ix_reservations_date_end', 'reservations', ['reservation_date', 'reservation_end'], unique=False)
+    op.create_index('ix_reservations_table_date', 'reservations', ['table_id', 'reservation_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reservations_table_date', table_name='reservations')
+    op.drop_index('ix_reservations_date_end', table_name='reservations')
+    with op.batch_alter_table('reservations') as batch_op:
+        batch_op.drop_constraint('fk_reservations_table_id', type_='foreignkey')
+        batch_op.drop_column('reservation_end')
+        batch_op.drop_column('duration_minutes')
+        batch_op.drop_column('table_id')
+    op.drop_index(op.f('ix_dining_tables_id'), table_name='dining_tables')
+    op.drop_table('dining_tables')
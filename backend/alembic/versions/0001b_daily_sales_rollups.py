@@ -0,0 +1,42 @@
+"""daily sales rollups
+
+Per-day order totals and per-item quantities read by the admin analytics.
+They start empty; fill them from order history with
+backfill_sales_rollup.py.
+
+Revision ID: 0001b
+Revises: 0001a
+Create Date: 2026-10-18 18:32:20.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001b'
+down_revision = '0001a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('paid_order_count', sa.Integer(), nullable=False),
+    sa.Column('paid_revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('daily_item_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('menu_item_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['menu_item_id'], ['menu_items.id'], ),
+    sa.PrimaryKeyConstraint('day', 'menu_item_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_item_sales')
+    op.drop_table('daily_sales')
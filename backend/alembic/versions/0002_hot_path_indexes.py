@@ -0,0 +1,50 @@
+"""hot path indexes
+
+Composite indexes for the filters and sort orders used by the crud
+functions and admin endpoints, and a generated stock_margin column so the
+low-stock query can use an index.
+
+Revision ID: 0002
+Revises: 0001b
+Create Date: 2026-10-18 18:33:16.311903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('inventory_items', sa.Column('stock_margin', sa.Integer(), sa.Computed('quantity_on_hand - par_level'), nullable=True))
+    op.create_index(op.f('ix_inventory_items_stock_margin'), 'inventory_items', ['stock_margin'], unique=False)
+    op.create_index('ix_menu_items_category_available', 'menu_items', ['category_id', 'is_available'], unique=False)
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'], unique=False)
+    op.create_index('ix_orders_customer_created', 'orders', ['customer_id', 'created_at'], unique=False)
+    op.create_index('ix_orders_payment_created', 'orders', ['payment_status', 'created_at'], unique=False)
+    op.create_index('ix_orders_status', 'orders', ['status'], unique=False)
+    op.create_index('ix_reservations_created_at', 'reservations', ['created_at'], unique=False)
+    op.create_index('ix_reservations_customer_date', 'reservations', ['customer_id', 'reservation_date'], unique=False)
+    op.create_index('ix_reservations_status', 'reservations', ['status'], unique=False)
+    op.create_index('ix_users_created_at', 'users', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at', table_name='users')
+    op.drop_index('ix_reservations_status', table_name='reservations')
+    op.drop_index('ix_reservations_customer_date', table_name='reservations')
+    op.drop_index('ix_reservations_created_at', table_name='reservations')
+    op.drop_index('ix_orders_status', table_name='orders')
+    op.drop_index('ix_orders_payment_created', table_name='orders')
+    op.drop_index('ix_orders_customer_created', table_name='orders')
+    op.drop_index('ix_orders_created_at', table_name='orders')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_menu_items_category_available', table_name='menu_items')
+    op.drop_index(op.f('ix_inventory_items_stock_margin'), table_name='inventory_items')
+    op.drop_column('inventory_items', 'stock_margin')
@@ -0,0 +1,27 @@
+"""keyset pagination index
+
+Index for the admin reservations list, which pages on
+(reservation_date, id) instead of OFFSET.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 18:49:45.826605
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reservations_reservation_date', 'reservations', ['reservation_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reservations_reservation_date', table_name='reservations')
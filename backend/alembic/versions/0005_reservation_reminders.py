@@ -0,0 +1,29 @@
+"""reservation reminders
+
+Stamp on each reservation once its reminder has been queued, so the
+reminder dispatcher never sends one twice.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 19:08:54.942842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('reservations', sa.Column('reminder_sent_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_reservations_reminder_date', 'reservations', ['reminder_sent_at', 'reservation_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reservations_reminder_date', table_name='reservations')
+    op.drop_column('reservations', 'reminder_sent_at')
@@ -0,0 +1,29 @@
+"""payment lookups
+
+Indexes for finding an order's payment and the payment behind a Stripe
+payment intent.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 19:14:09.503469
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_payments_order_id', 'payments', ['order_id'], unique=False)
+    op.create_index('ix_payments_stripe_payment_intent_id', 'payments', ['stripe_payment_intent_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payments_stripe_payment_intent_id', table_name='payments')
+    op.drop_index('ix_payments_order_id', table_name='payments')
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""payment events
+
+Inbox of received Stripe webhook events, and the newest event applied to
+each payment.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 19:35:32.095813
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('payment_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.String(length=255), nullable=False),
+    sa.Column('event_type', sa.String(length=100), nullable=False),
+    sa.Column('payment_intent_id', sa.String(length=255), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('currency', sa.String(length=10), nullable=True),
+    sa.Column('created', sa.Integer(), nullable=False),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('event_id')
+    )
+    op.create_index(op.f('ix_payment_events_id'), 'payment_events', ['id'], unique=False)
+    op.create_index('ix_payment_events_processed_at', 'payment_events', ['processed_at', 'id'], unique=False)
+    op.add_column('payments', sa.Column('last_event_created', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('payments', 'last_event_created')
+    op.drop_index('ix_payment_events_processed_at', table_name='payment_events')
+    op.drop_index(op.f('ix_payment_events_id'), table_name='payment_events')
+    op.drop_table('payment_events')
\ No newline at end of file
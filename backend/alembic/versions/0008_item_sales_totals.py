@@ -0,0 +1,39 @@
+"""item sales totals
+
+Running all-time quantity per menu item, so the popular items are read
+from the top of an index instead of summing every day of the rollup.
+Filled from daily_item_sales.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 20:10:08.084202
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('item_sales_totals',
+    sa.Column('menu_item_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['menu_item_id'], ['menu_items.id'], ),
+    sa.PrimaryKeyConstraint('menu_item_id')
+    )
+    op.create_index('ix_item_sales_totals_quantity', 'item_sales_totals', ['quantity'], unique=False)
+    op.execute(
+        "INSERT INTO item_sales_totals (menu_item_id, quantity) "
+        "SELECT menu_item_id, SUM(quantity) FROM daily_item_sales GROUP BY menu_item_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_item_sales_totals_quantity', table_name='item_sales_totals')
+    op.drop_table('item_sales_totals')
@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.api_v1.endpoints import auth, users, menu, orders, reservations, inventory, admin
-from app.api.api_v1.endpoints import table_availability
+from app.api.api_v1.endpoints import table_availability, payments
 
 api_router = APIRouter()
 
@@ -9,6 +9,7 @@ api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(menu.router, prefix="/menu", tags=["menu"])
 api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
+api_router.include_router(payments.router, prefix="/payments", tags=["payments"])
 api_router.include_router(reservations.router, prefix="/reservations", tags=["reservations"])
 api_router.include_router(table_availability.router, prefix="/tables", tags=["table-availability"])
 api_router.include_router(inventory.router, prefix="/inventory", tags=["inventory"])
@@ -1,123 +1,65 @@
 from typing import List, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from datetime import datetime, timedelta
 
-from app.api.deps import get_admin_user
+from app.api.deps import PageParams, get_admin_user
+from app.core.security import token_cache
 from app.db.database import get_db
-from app.db.models import Order, Reservation, User, MenuItem, OrderStatus, ReservationStatus
+from app.db.models import Reservation, User
 from app.schemas.user import User as UserSchema
+from app.schemas.order import Order as OrderSchema
+from app.schemas.pagination import Page
+from app.crud.order import get_orders
+from app.crud.user import get_users
+from app.crud.sales import get_daily_sales, get_popular_items
+from app.services import dashboard
+from app.services.user_cache import user_cache
 
 router = APIRouter()
 
 @router.get("/dashboard")
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
     """Get dashboard statistics for admin panel"""
-    today = datetime.now().date()
-    week_ago = today - timedelta(days=7)
-    
-    # Order statistics
-    total_orders = db.query(Order).count()
-    today_orders = db.query(Order).filter(
-        func.date(Order.created_at) == today
-    ).count()
-    
-    pending_orders = db.query(Order).filter(
-        Order.status.in_([OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.PREPARING])
-    ).count()
-    
-    # Revenue statistics
-    total_revenue = db.query(func.sum(Order.total_amount)).filter(
-        Order.payment_status == "paid"
-    ).scalar() or 0
-    
-    today_revenue = db.query(func.sum(Order.total_amount)).filter(
-        func.date(Order.created_at) == today,
-        Order.payment_status == "paid"
-    ).scalar() or 0
-    
-    # Reservation statistics
-    total_reservations = db.query(Reservation).count()
-    today_reservations = db.query(Reservation).filter(
-        func.date(Reservation.reservation_date) == today
-    ).count()
-    
-    pending_reservations = db.query(Reservation).filter(
-        Reservation.status == ReservationStatus.PENDING
-    ).count()
-    
-    # User statistics
-    total_users = db.query(User).count()
-    new_users_this_week = db.query(User).filter(
-        func.date(User.created_at) >= week_ago
-    ).count()
-    
-    return {
-        "orders": {
-            "total": total_orders,
-            "today": today_orders,
-            "pending": pending_orders
-        },
-        "revenue": {
-            "total": float(total_revenue),
-            "today": float(today_revenue)
-        },
-        "reservations": {
-            "total": total_reservations,
-            "today": today_reservations,
-            "pending": pending_reservations
-        },
-        "users": {
-            "total": total_users,
-            "new_this_week": new_users_this_week
-        }
-    }
+    return await dashboard.get_dashboard_stats(db)
 
-@router.get("/recent-orders")
+@router.get("/recent-orders", response_model=List[OrderSchema])
 async def get_recent_orders(
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
     """Get recent orders for admin dashboard"""
-    orders = db.query(Order).order_by(Order.created_at.desc()).limit(limit).all()
+    # Shares the crud loader options so order_items come in one extra query
+    orders = await get_orders(db, limit=limit)
     return orders
 
 @router.get("/recent-reservations")
 async def get_recent_reservations(
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
     """Get recent reservations for admin dashboard"""
-    reservations = db.query(Reservation).order_by(
+    result = await db.execute(select(Reservation).order_by(
         Reservation.created_at.desc()
-    ).limit(limit).all()
+    ).limit(limit))
+    reservations = result.scalars().all()
     return reservations
 
 @router.get("/popular-items")
 async def get_popular_menu_items(
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
     """Get most popular menu items based on order frequency"""
-    from app.db.models import OrderItem
-    
-    popular_items = db.query(
-        MenuItem.id,
-        MenuItem.name,
-        MenuItem.price,
-        func.sum(OrderItem.quantity).label('total_ordered')
-    ).join(OrderItem).group_by(
-        MenuItem.id, MenuItem.name, MenuItem.price
-    ).order_by(
-        func.sum(OrderItem.quantity).desc()
-    ).limit(limit).all()
+    # Reads the per-day item rollup rather than every order line
+    popular_items = await get_popular_items(db, limit=limit)
     
     return [
         {
@@ -132,53 +74,43 @@ async def get_popular_menu_items(
 @router.get("/sales-analytics")
 async def get_sales_analytics(
     days: int = 30,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
     """Get sales analytics for the specified number of days"""
     start_date = datetime.now().date() - timedelta(days=days)
     
-    daily_sales = db.query(
-        func.date(Order.created_at).label('date'),
-        func.count(Order.id).label('order_count'),
-        func.sum(Order.total_amount).label('revenue')
-    ).filter(
-        func.date(Order.created_at) >= start_date,
-        Order.payment_status == "paid"
-    ).group_by(
-        func.date(Order.created_at)
-    ).order_by(
-        func.date(Order.created_at)
-    ).all()
+    # One rollup row per day, however many orders the days hold
+    daily_sales = await get_daily_sales(db, start_date)
     
     return [
         {
-            "date": str(day.date),
-            "order_count": day.order_count,
-            "revenue": float(day.revenue or 0)
+            "date": str(day.day),
+            "order_count": day.paid_order_count,
+            "revenue": float(day.paid_revenue or 0)
         }
         for day in daily_sales
     ]
 
-@router.get("/users", response_model=List[UserSchema])
+@router.get("/users", response_model=Page[UserSchema])
 async def get_all_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
     """Get all users for admin management"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    users = await get_users(db, after=page.after(int), limit=page.limit + 1)
+    return await page.page(db, User, users, key=lambda user: (user.id,))
 
 @router.put("/users/{user_id}/toggle-active")
 async def toggle_user_active_status(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
     """Toggle user active status"""
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).filter(User.id == user_id))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -186,7 +118,14 @@ async def toggle_user_active_status(
         )
     
     user.is_active = not user.is_active
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    # A deactivated user's next request must miss the cache in every worker
+    await user_cache.invalidate(user.email)
     
-    return {"message": f"User {'activated' if user.is_active else 'deactivated'} successfully"}
\ No newline at end of file
+    return {"message": f"User {'activated' if user.is_active else 'deactivated'} successfully"}
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_user = Depends(get_admin_user)):
+    """Hit/miss counters of this worker's in-process caches"""
+    return {"users": user_cache.stats(), "tokens": token_cache.stats()}
\ No newline at end of file
@@ -1,23 +1,23 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password
+from app.core.security import create_access_token
 from app.db.database import get_db
 from app.schemas.user import Token, UserCreate, User, UserLogin
-from app.crud.user import get_user_by_email, create_user
+from app.crud.user import authenticate_user, get_user_by_email, create_user
 
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
 async def login(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await authenticate_user(db, form_data.username, form_data.password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -34,11 +34,11 @@ async def login(
 @router.post("/login-json", response_model=Token)
 async def login_json(
     user_data: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login endpoint that accepts JSON with email and password"""
-    user = get_user_by_email(db, email=user_data.email)
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    user = await authenticate_user(db, user_data.email, user_data.password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -64,15 +64,15 @@ async def login_json(
 @router.post("/register", response_model=User)
 async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Check if user already exists
-    existing_user = get_user_by_email(db, email=user_data.email)
+    existing_user = await get_user_by_email(db, email=user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    user = create_user(db, user_data)
+    user = await create_user(db, user_data)
     return user
\ No newline at end of file
@@ -1,10 +1,12 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_admin_user
+from app.api.deps import PageParams, get_admin_user
 from app.db.database import get_db
+from app.db.models import InventoryItem as InventoryItemModel
 from app.schemas.inventory import InventoryItem, InventoryItemCreate, InventoryItemUpdate
+from app.schemas.pagination import Page
 from app.crud.inventory import (
     get_inventory_items, get_inventory_item, create_inventory_item, 
     update_inventory_item, delete_inventory_item, get_low_stock_items
@@ -12,37 +14,37 @@ from app.crud.inventory import (
 
 router = APIRouter()
 
-@router.get("/", response_model=List[InventoryItem])
+@router.get("/", response_model=Page[InventoryItem])
 async def read_inventory_items(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    return get_inventory_items(db, skip=skip, limit=limit)
+    items = await get_inventory_items(db, after=page.after(int), limit=page.limit + 1)
+    return await page.page(db, InventoryItemModel, items, key=lambda item: (item.id,))
 
 @router.get("/low-stock", response_model=List[InventoryItem])
 async def read_low_stock_items(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    return get_low_stock_items(db)
+    return await get_low_stock_items(db)
 
 @router.post("/", response_model=InventoryItem)
 async def create_new_inventory_item(
     item: InventoryItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    return create_inventory_item(db, item)
+    return await create_inventory_item(db, item)
 
 @router.get("/{item_id}", response_model=InventoryItem)
 async def read_inventory_item(
     item_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    item = get_inventory_item(db, item_id)
+    item = await get_inventory_item(db, item_id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,10 +56,10 @@ async def read_inventory_item(
 async def update_existing_inventory_item(
     item_id: int,
     item_update: InventoryItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    item = update_inventory_item(db, item_id, item_update)
+    item = await update_inventory_item(db, item_id, item_update)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -68,10 +70,10 @@ async def update_existing_inventory_item(
 @router.delete("/{item_id}")
 async def delete_existing_inventory_item(
     item_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    success = delete_inventory_item(db, item_id)
+    success = await delete_inventory_item(db, item_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
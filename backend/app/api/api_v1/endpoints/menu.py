@@ -1,41 +1,54 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_active_user, get_admin_user
 from app.db.database import get_db
 from app.schemas.menu import Category, CategoryCreate, CategoryUpdate, MenuItem, MenuItemCreate, MenuItemUpdate
 from app.crud.menu import (
-    get_categories, get_category, create_category, update_category, delete_category,
-    get_menu_items, get_menu_item, create_menu_item, update_menu_item, delete_menu_item,
-    get_menu_items_by_category
+    get_category, create_category, update_category, delete_category,
+    get_menu_item, create_menu_item, update_menu_item, delete_menu_item
 )
+from app.services.menu_catalog import menu_catalog, categories_query, menu_items_query, RenderedBody
 
 router = APIRouter()
 
+def catalog_response(request: Request, rendered: RenderedBody) -> Response:
+    """Serve pre-rendered catalog bytes as-is (no response_model validation), or 304"""
+    body, encoding, etag = rendered.encoded(request.headers.get("accept-encoding", ""))
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if rendered.matches(request.headers.get("if-none-match", "")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # Categories
 @router.get("/categories", response_model=List[Category])
 async def read_categories(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    return get_categories(db, skip=skip, limit=limit)
+    section = await menu_catalog.categories(db)
+    return catalog_response(request, section.body(*categories_query(skip, limit)))
 
 @router.post("/categories", response_model=Category)
 async def create_new_category(
     category: CategoryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    return create_category(db, category)
+    return await create_category(db, category)
 
 @router.get("/categories/{category_id}", response_model=Category)
 async def read_category(
     category_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    category = get_category(db, category_id)
+    category = await get_category(db, category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -47,10 +60,10 @@ async def read_category(
 async def update_existing_category(
     category_id: int,
     category_update: CategoryUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    category = update_category(db, category_id, category_update)
+    category = await update_category(db, category_id, category_update)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,10 +74,10 @@ async def update_existing_category(
 @router.delete("/categories/{category_id}")
 async def delete_existing_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    success = delete_category(db, category_id)
+    success = await delete_category(db, category_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -75,30 +88,41 @@ async def delete_existing_category(
 # Menu Items
 @router.get("/items", response_model=List[MenuItem])
 async def read_menu_items(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    category_id: int = None,
+    category_id: Optional[int] = None,
+    available_only: bool = True,
+    db: AsyncSession = Depends(get_db)
+):
+    section = await menu_catalog.items(db)
+    return catalog_response(request, section.body(*menu_items_query(skip, limit, category_id, available_only)))
+
+@router.get("/search", response_model=List[MenuItem])
+async def search_menu_items(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
     available_only: bool = True,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    if category_id:
-        return get_menu_items_by_category(db, category_id, available_only=available_only)
-    return get_menu_items(db, skip=skip, limit=limit, available_only=available_only)
+    """Search item names, descriptions and category names; tolerates prefixes and typos"""
+    # Rows are already in response shape, so skip response_model validation
+    return JSONResponse(await menu_catalog.search(db, q, limit=limit, available_only=available_only))
 
 @router.post("/items", response_model=MenuItem)
 async def create_new_menu_item(
     menu_item: MenuItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    return create_menu_item(db, menu_item)
+    return await create_menu_item(db, menu_item)
 
 @router.get("/items/{item_id}", response_model=MenuItem)
 async def read_menu_item(
     item_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    item = get_menu_item(db, item_id)
+    item = await get_menu_item(db, item_id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -110,10 +134,10 @@ async def read_menu_item(
 async def update_existing_menu_item(
     item_id: int,
     item_update: MenuItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    item = update_menu_item(db, item_id, item_update)
+    item = await update_menu_item(db, item_id, item_update)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -124,10 +148,10 @@ async def update_existing_menu_item(
 @router.delete("/items/{item_id}")
 async def delete_existing_menu_item(
     item_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    success = delete_menu_item(db, item_id)
+    success = await delete_menu_item(db, item_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,10 +1,12 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user, get_admin_user
+from app.api.deps import PageParams, get_current_active_user, get_admin_user
 from app.db.database import get_db
+from app.db.models import Order as OrderModel
 from app.schemas.order import Order, OrderCreate, OrderUpdate
+from app.schemas.pagination import Page
 from app.crud.order import (
     get_orders, get_order, create_order, update_order, delete_order,
     get_user_orders
@@ -12,39 +14,39 @@ from app.crud.order import (
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Order])
+@router.get("/", response_model=Page[Order])
 async def read_orders(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    return get_orders(db, skip=skip, limit=limit)
+    orders = await get_orders(db, after=page.after(int), limit=page.limit + 1)
+    return await page.page(db, OrderModel, orders, key=lambda order: (order.id,))
 
 @router.post("/", response_model=Order)
 async def create_new_order(
     order: OrderCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    return create_order(db, order, current_user.id)
+    return await create_order(db, order, current_user.id, notify=current_user)
 
 @router.get("/my-orders", response_model=List[Order])
 async def read_my_orders(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    return get_user_orders(db, current_user.id, skip=skip, limit=limit)
+    return await get_user_orders(db, current_user.id, skip=skip, limit=limit)
 
 @router.get("/{order_id}", response_model=Order)
 async def read_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    order = get_order(db, order_id)
+    order = await get_order(db, order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -64,10 +66,10 @@ async def read_order(
 async def update_existing_order(
     order_id: int,
     order_update: OrderUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    order = update_order(db, order_id, order_update)
+    order = await update_order(db, order_id, order_update)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -78,10 +80,10 @@ async def update_existing_order(
 @router.delete("/{order_id}")
 async def delete_existing_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    success = delete_order(db, order_id)
+    success = await delete_order(db, order_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,158 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_active_user, get_payment_service
+from app.core.config import settings
+from app.db.database import get_db
+from app.db.models import PaymentStatus
+from app.schemas.payment import Payment, PaymentIntent, PaymentIntentCreate
+from app.crud.order import get_order
+from app.crud.payment import get_payment_by_order, save_payment_intent, set_payment_status
+from app.services.payment import PaymentError, PaymentService, to_minor_units, verify_webhook
+from app.services.payment_events import event_values, payment_event_queue
+
+router = APIRouter()
+
+CURRENCY = "ghs"
+
+# Stripe intent status -> our payment status; other states leave it pending
+INTENT_STATUSES = {
+    "succeeded": PaymentStatus.PAID,
+    "canceled": PaymentStatus.FAILED,
+}
+
+def payment_error(e: PaymentError) -> HTTPException:
+    # Stripe rejecting the request (a declined card, a bad amount) is the
+    # client's problem; Stripe being down or erroring is ours
+    client_error = e.status_code is not None and e.status_code < 500 and e.status_code != 429
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST if client_error else status.HTTP_502_BAD_GATEWAY,
+        detail=f"Payment error: {str(e)}"
+    )
+
+async def get_own_order(db: AsyncSession, order_id: int, current_user):
+    order = await get_order(db, order_id)
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    if order.customer_id != current_user.id and current_user.role not in ["admin", "manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return order
+
+@router.post("/intent", response_model=PaymentIntent)
+async def create_order_payment_intent(
+    request: PaymentIntentCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_active_user),
+    payments: PaymentService = Depends(get_payment_service)
+):
+    """Start paying for an order; the client confirms the card with the returned secret"""
+    order = await get_own_order(db, request.order_id, current_user)
+    if order.payment_status == PaymentStatus.PAID:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Order is already paid"
+        )
+    order_id, order_number, amount = order.id, order.order_number, order.total_amount
+    
+    previous = await get_payment_by_order(db, order_id)
+    previous_intent = previous.stripe_payment_intent_id if previous is not None else None
+    previous_failed = previous is not None and previous.status == PaymentStatus.FAILED
+    
+    # End the read transaction before calling Stripe, so no connection or
+    # locks are held while waiting on the network
+    await db.commit()
+    try:
+        if previous_intent and not previous_failed:
+            # Canceled at Stripe without a confirm having recorded it yet
+            current = await payments.confirm_payment(previous_intent)
+            previous_failed = current["status"] == "canceled"
+        
+        # Repeat requests for the same order and amount (a double click, a
+        # retry) share a key and so get the same intent back. Once that
+        # intent is dead the key has to change, or Stripe would keep
+        # replaying it for the 24 hours it remembers keys.
+        idempotency_key = f"order-{order_id}-{to_minor_units(amount)}"
+        if previous_intent and previous_failed:
+            idempotency_key += f"-after-{previous_intent}"
+        intent = await payments.create_payment_intent(
+            amount,
+            currency=CURRENCY,
+            metadata={"order_id": order_id, "order_number": order_number},
+            idempotency_key=idempotency_key
+        )
+    except PaymentError as e:
+        raise payment_error(e)
+    
+    await save_payment_intent(db, order_id, intent["payment_intent_id"], amount, CURRENCY)
+    return PaymentIntent(
+        **intent,
+        amount=amount,
+        currency=CURRENCY,
+        publishable_key=settings.STRIPE_PUBLISHABLE_KEY
+    )
+
+@router.post("/{order_id}/confirm", response_model=Payment)
+async def confirm_order_payment(
+    order_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_active_user),
+    payments: PaymentService = Depends(get_payment_service)
+):
+    """Bring the order's payment status in line with its Stripe payment intent"""
+    await get_own_order(db, order_id, current_user)
+    payment = await get_payment_by_order(db, order_id)
+    if not payment or not payment.stripe_payment_intent_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payment not found"
+        )
+    
+    await db.commit()
+    try:
+        intent = await payments.confirm_payment(payment.stripe_payment_intent_id)
+    except PaymentError as e:
+        raise payment_error(e)
+    
+    payment_status = INTENT_STATUSES.get(intent["status"])
+    if payment_status is not None and payment_status != payment.status:
+        payment = await set_payment_status(db, payment, payment_status)
+    return payment
+
+@router.post("/webhook")
+async def stripe_webhook(request: Request, db: AsyncSession = Depends(get_db)):
+    """Receive a Stripe webhook event.
+    
+    The event is only verified and stored here; the payment event processor
+    applies it in the background. Redelivered events are acknowledged
+    without being stored again.
+    """
+    payload = await request.body()
+    try:
+        event = verify_webhook(
+            payload,
+            request.headers.get("Stripe-Signature", ""),
+            settings.STRIPE_WEBHOOK_SECRET,
+            settings.STRIPE_WEBHOOK_TOLERANCE_SECONDS
+        )
+        values = event_values(event)
+    except PaymentError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Malformed event"
+        )
+    
+    if values is None:
+        return {"received": True}
+    stored = await payment_event_queue.enqueue(db, values)
+    return {"received": True, "duplicate": not stored}
@@ -1,9 +1,12 @@
 from typing import List
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user, get_admin_user
+from app.api.deps import PageParams, get_current_active_user, get_admin_user
 from app.db.database import get_db
+from app.db.models import Reservation as ReservationModel
+from app.schemas.pagination import Page
 from app.schemas.reservation import Reservation, ReservationCreate, ReservationUpdate
 from app.crud.reservation import (
     get_reservations, get_reservation, create_reservation, update_reservation, delete_reservation,
@@ -12,39 +15,42 @@ from app.crud.reservation import (
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Reservation])
+@router.get("/", response_model=Page[Reservation])
 async def read_reservations(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_admin_user)
 ):
-    return get_reservations(db, skip=skip, limit=limit)
+    reservations = await get_reservations(db, after=page.after(datetime, int), limit=page.limit + 1)
+    return await page.page(
+        db, ReservationModel, reservations,
+        key=lambda reservation: (reservation.reservation_date, reservation.id)
+    )
 
 @router.post("/", response_model=Reservation)
 async def create_new_reservation(
     reservation: ReservationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    return create_reservation(db, reservation, current_user.id)
+    return await create_reservation(db, reservation, current_user.id)
 
 @router.get("/my-reservations", response_model=List[Reservation])
 async def read_my_reservations(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    return get_user_reservations(db, current_user.id, skip=skip, limit=limit)
+    return await get_user_reservations(db, current_user.id, skip=skip, limit=limit)
 
 @router.get("/{reservation_id}", response_model=Reservation)
 async def read_reservation(
     reservation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    reservation = get_reservation(db, reservation_id)
+    reservation = await get_reservation(db, reservation_id)
     if not reservation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -64,10 +70,10 @@ async def read_reservation(
 async def update_existing_reservation(
     reservation_id: int,
     reservation_update: ReservationUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    reservation = get_reservation(db, reservation_id)
+    reservation = await get_reservation(db, reservation_id)
     if not reservation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -81,15 +87,21 @@ async def update_existing_reservation(
             detail="Not enough permissions"
         )
     
-    return update_reservation(db, reservation_id, reservation_update)
+    updated = await update_reservation(db, reservation_id, reservation_update)
+    if not updated:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The table is not available for that time or party size"
+        )
+    return updated
 
 @router.delete("/{reservation_id}")
 async def delete_existing_reservation(
     reservation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    reservation = get_reservation(db, reservation_id)
+    reservation = await get_reservation(db, reservation_id)
     if not reservation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -103,7 +115,7 @@ async def delete_existing_reservation(
             detail="Not enough permissions"
         )
     
-    success = delete_reservation(db, reservation_id)
+    success = await delete_reservation(db, reservation_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
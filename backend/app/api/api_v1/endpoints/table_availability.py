@@ -1,18 +1,25 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
 from pydantic import BaseModel
 
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_admin_user
+from app.core.config import settings
 from app.db.database import get_db
 from app.schemas.reservation import ReservationCreate
-from app.crud.reservation import create_reservation
-from app.services.email import EmailService
-from app.services.sms import SMSService
+from app.schemas.table import Table as TableSchema, TableCreate, TableUpdate
+from app.crud.reservation import book_table
+from app.crud.table import get_tables, create_table, update_table
+from app.services.availability import (
+    availability_engine, slot_label, DayIndex, TableInfo, SERVICE_SLOTS
+)
 
 router = APIRouter()
 
+# Longest date range the calendar endpoint will compute in one call
+MAX_CALENDAR_DAYS = 62
+
 class TableAvailabilityRequest(BaseModel):
     date: str  # YYYY-MM-DD format
     time: str  # HH:MM format
@@ -29,6 +36,32 @@ class TableAvailabilityResponse(BaseModel):
     message: str
     alternatives: List[AlternativeTime] = []
 
+class AvailabilityCalendarRequest(BaseModel):
+    start_date: str  # YYYY-MM-DD format
+    end_date: str  # YYYY-MM-DD format, inclusive
+    party_size: int
+
+class CalendarDay(BaseModel):
+    date: str
+    available: bool
+    slots: List[AlternativeTime]
+
+class AvailabilityCalendarResponse(BaseModel):
+    party_size: int
+    days: List[CalendarDay]
+
+class TableSlots(BaseModel):
+    table_id: int
+    table_name: str
+    capacity: int
+    available: List[bool]
+
+class AvailabilityGrid(BaseModel):
+    date: str
+    slots: List[str]
+    available_tables: List[int]
+    tables: List[TableSlots]
+
 class ReservationConfirmation(BaseModel):
     reservation_id: str
     table_name: str
@@ -39,78 +72,107 @@ class ReservationConfirmation(BaseModel):
     status: str
     confirmation_sent: bool
 
-# Mock table data - in production this would be in the database
-TABLES = [
-    {"id": 1, "name": "Table 1", "capacity": 2, "type": "window"},
-    {"id": 2, "name": "Table 2", "capacity": 4, "type": "standard"},
-    {"id": 3, "name": "Table 3", "capacity": 4, "type": "booth"},
-    {"id": 4, "name": "Table 4", "capacity": 6, "type": "large"},
-    {"id": 5, "name": "Table 5", "capacity": 8, "type": "private"},
-    {"id": 6, "name": "Table 6", "capacity": 2, "type": "bar"},
-    {"id": 7, "name": "Table 7", "capacity": 4, "type": "patio"},
-    {"id": 8, "name": "Table 8", "capacity": 6, "type": "standard"},
-]
-
-# Mock existing reservations - in production this would query the database
-EXISTING_RESERVATIONS = [
-    {"table_id": 2, "date": "2025-01-15", "time": "19:30", "party_size": 4},
-    {"table_id": 4, "date": "2025-01-15", "time": "20:00", "party_size": 6},
-]
-
-def find_available_tables(date: str, time: str, party_size: int) -> List[dict]:
-    """Find tables that can accommodate the party size and are not reserved"""
-    available_tables = []
-    
-    for table in TABLES:
-        if table["capacity"] >= party_size:
-            # Check if table is already reserved at this time
-            is_reserved = any(
-                res["table_id"] == table["id"] and 
-                res["date"] == date and 
-                res["time"] == time
-                for res in EXISTING_RESERVATIONS
-            )
-            
-            if not is_reserved:
-                available_tables.append(table)
-    
-    return available_tables
+def slot_minutes(time_str: str) -> int:
+    parsed = datetime.strptime(time_str, "%H:%M")
+    return parsed.hour * 60 + parsed.minute
+
+def find_available_tables(day_index: DayIndex, time: str, party_size: int) -> List[TableInfo]:
+    """Find tables that can accommodate the party size and are free for a full seating"""
+    start = slot_minutes(time)
+    return day_index.find_available_tables(start, start + settings.DEFAULT_SEATING_MINUTES, party_size)
 
-def get_alternative_times(date: str, requested_time: str, party_size: int) -> List[AlternativeTime]:
-    """Get alternative times when tables are available"""
+def get_alternative_times(day_index: DayIndex, requested_time: str, party_size: int) -> List[AlternativeTime]:
+    """Get alternative times when tables are available, read from the day's slot bitmap"""
     alternatives = []
+    counts = day_index.grid.available_counts(party_size)
     
-    # Generate time slots from 17:00 to 22:00 (5 PM to 10 PM)
-    base_time = datetime.strptime("17:00", "%H:%M")
-    end_time = datetime.strptime("22:00", "%H:%M")
-    
-    current_time = base_time
-    while current_time <= end_time:
-        time_str = current_time.strftime("%H:%M")
+    for slot, available_tables in zip(SERVICE_SLOTS, counts):
+        time_str = slot_label(slot)
         
         # Skip the requested time since we know it's not available
-        if time_str != requested_time:
-            available_tables = find_available_tables(date, time_str, party_size)
-            if available_tables:
-                alternatives.append(AlternativeTime(
-                    time=time_str,
-                    available_tables=len(available_tables)
-                ))
-        
-        current_time += timedelta(minutes=30)
+        if time_str != requested_time and available_tables:
+            alternatives.append(AlternativeTime(
+                time=time_str,
+                available_tables=available_tables
+            ))
+            if len(alternatives) == 4:  # Return max 4 alternatives
+                break
+    
+    return alternatives
+
+@router.get("/", response_model=List[TableSchema])
+async def read_tables(
+    db: AsyncSession = Depends(get_db)
+):
+    return await get_tables(db)
+
+@router.post("/", response_model=TableSchema)
+async def create_new_table(
+    table: TableCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_admin_user)
+):
+    return await create_table(db, table)
+
+@router.put("/{table_id}", response_model=TableSchema)
+async def update_existing_table(
+    table_id: int,
+    table_update: TableUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_admin_user)
+):
+    table = await update_table(db, table_id, table_update)
+    if not table:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Table not found"
+        )
+    return table
+
+@router.get("/availability-grid", response_model=AvailabilityGrid)
+async def read_availability_grid(
+    date: str,
+    party_size: int = 1,
+    db: AsyncSession = Depends(get_db)
+):
+    """Availability of every table in every slot of a day, for the booking UI"""
+    try:
+        requested_date = datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
     
-    return alternatives[:4]  # Return max 4 alternatives
+    day_index = await availability_engine.get_day(db, requested_date)
+    grid = day_index.grid
+    
+    return AvailabilityGrid(
+        date=date,
+        slots=[slot_label(slot) for slot in grid.slots],
+        available_tables=grid.available_counts(party_size),
+        tables=[
+            TableSlots(
+                table_id=table.id,
+                table_name=table.name,
+                capacity=table.capacity,
+                available=[grid.is_free(table.id, position) for position in range(len(grid.slots))]
+            )
+            for table in day_index.tables
+            if table.capacity >= party_size
+        ]
+    )
 
 @router.post("/check-availability", response_model=TableAvailabilityResponse)
 async def check_table_availability(
     request: TableAvailabilityRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Check if tables are available for the requested date, time, and party size"""
     try:
         # Validate date format
         try:
-            datetime.strptime(request.date, "%Y-%m-%d")
+            requested_date = datetime.strptime(request.date, "%Y-%m-%d").date()
         except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -134,22 +196,23 @@ async def check_table_availability(
             )
         
         # Find available tables
-        available_tables = find_available_tables(request.date, request.time, request.party_size)
+        day_index = await availability_engine.get_day(db, requested_date)
+        available_tables = find_available_tables(day_index, request.time, request.party_size)
         
         if available_tables:
-            # Select the best table (smallest that fits the party)
-            best_table = min(available_tables, key=lambda t: t["capacity"])
+            # Select the best table (smallest that fits the party); the list is sorted by capacity
+            best_table = available_tables[0]
             
             return TableAvailabilityResponse(
                 available=True,
-                table_id=best_table["id"],
-                table_name=best_table["name"],
+                table_id=best_table.id,
+                table_name=best_table.name,
                 message=f"Table for {request.party_size} available at {request.time}",
                 alternatives=[]
             )
         else:
             # No tables available, get alternatives
-            alternatives = get_alternative_times(request.date, request.time, request.party_size)
+            alternatives = get_alternative_times(day_index, request.time, request.party_size)
             
             if alternatives:
                 alt_times = [alt.time for alt in alternatives[:2]]
@@ -171,79 +234,82 @@ async def check_table_availability(
             detail="Error checking table availability"
         )
 
+@router.post("/availability-calendar", response_model=AvailabilityCalendarResponse)
+async def read_availability_calendar(
+    request: AvailabilityCalendarRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Per-day, per-slot table counts for a date range in a single call"""
+    try:
+        start_date = datetime.strptime(request.start_date, "%Y-%m-%d").date()
+        end_date = datetime.strptime(request.end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+    
+    if end_date < start_date or (end_date - start_date).days >= MAX_CALENDAR_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be between 1 and {MAX_CALENDAR_DAYS} days"
+        )
+    
+    if request.party_size < 1 or request.party_size > 12:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Party size must be between 1 and 12"
+        )
+    
+    # One reservations query for every uncached day in the range
+    day_indexes = await availability_engine.get_days(db, start_date, end_date)
+    
+    days = []
+    for day_index in day_indexes:
+        counts = day_index.grid.available_counts(request.party_size)
+        slots = [
+            AlternativeTime(time=slot_label(slot), available_tables=available_tables)
+            for slot, available_tables in zip(day_index.grid.slots, counts)
+        ]
+        days.append(CalendarDay(
+            date=day_index.day.isoformat(),
+            available=any(counts),
+            slots=slots
+        ))
+    
+    return AvailabilityCalendarResponse(party_size=request.party_size, days=days)
+
 @router.post("/confirm-reservation", response_model=ReservationConfirmation)
 async def confirm_reservation(
     reservation_data: ReservationCreate,
     table_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
     """Confirm and create a reservation"""
     try:
-        # Double-check availability before confirming
-        available_tables = find_available_tables(
-            reservation_data.reservation_date.strftime("%Y-%m-%d"),
-            reservation_data.reservation_date.strftime("%H:%M"),
-            reservation_data.party_size
-        )
-        
-        selected_table = next((t for t in available_tables if t["id"] == table_id), None)
-        if not selected_table:
+        # Claim the table and queue the confirmation in one transaction;
+        # conflicts come back as None
+        reservation = await book_table(db, reservation_data, current_user.id, table_id, notify=current_user)
+        if not reservation:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Table is no longer available. Please select a different time."
             )
         
-        # Create the reservation
-        reservation = create_reservation(db, reservation_data, current_user.id)
-        
         # Generate reservation ID
         reservation_id = f"RES-{reservation.id:06d}"
         
-        # Add to mock reservations (in production, this would be handled by the database)
-        EXISTING_RESERVATIONS.append({
-            "table_id": table_id,
-            "date": reservation_data.reservation_date.strftime("%Y-%m-%d"),
-            "time": reservation_data.reservation_date.strftime("%H:%M"),
-            "party_size": reservation_data.party_size
-        })
-        
-        # Send confirmation email and SMS
-        confirmation_sent = False
-        try:
-            email_service = EmailService()
-            sms_service = SMSService()
-            
-            # Send email confirmation
-            email_sent = email_service.send_reservation_confirmation(
-                current_user.email,
-                reservation_data.reservation_date.strftime("%B %d, %Y at %I:%M %p"),
-                reservation_data.party_size
-            )
-            
-            # Send SMS confirmation if phone number is provided
-            sms_sent = True
-            if current_user.phone:
-                sms_sent = sms_service.send_reservation_confirmation(
-                    current_user.phone,
-                    reservation_id,
-                    reservation_data.reservation_date.strftime("%m/%d at %I:%M %p")
-                )
-            
-            confirmation_sent = email_sent and sms_sent
-        except Exception as e:
-            print(f"Error sending confirmation: {e}")
-            # Don't fail the reservation if notification fails
-        
         return ReservationConfirmation(
             reservation_id=reservation_id,
-            table_name=selected_table["name"],
+            table_name=reservation.table_number,
             date=reservation_data.reservation_date.strftime("%Y-%m-%d"),
             time=reservation_data.reservation_date.strftime("%H:%M"),
             party_size=reservation_data.party_size,
             customer_name=current_user.name,
             status="confirmed",
-            confirmation_sent=confirmation_sent
+            # Queued with the booking; the notification worker delivers it
+            confirmation_sent=True
         )
     
     except HTTPException:
@@ -1,9 +1,10 @@
-from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user, get_admin_user
+from app.api.deps import PageParams, get_current_active_user, get_admin_user
 from app.db.database import get_db
+from app.db.models import User as UserModel
+from app.schemas.pagination import Page
 from app.schemas.user import User, UserUpdate
 from app.crud.user import get_user, update_user, get_users
 
@@ -16,27 +17,27 @@ async def read_current_user(current_user: User = Depends(get_current_active_user
 @router.put("/me", response_model=User)
 async def update_current_user(
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    return update_user(db, current_user.id, user_update)
+    return await update_user(db, current_user.id, user_update)
 
-@router.get("/", response_model=List[User])
+@router.get("/", response_model=Page[User])
 async def read_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_admin_user)
 ):
-    return get_users(db, skip=skip, limit=limit)
+    users = await get_users(db, after=page.after(int), limit=page.limit + 1)
+    return await page.page(db, UserModel, users, key=lambda user: (user.id,))
 
 @router.get("/{user_id}", response_model=User)
 async def read_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_admin_user)
 ):
-    user = get_user(db, user_id)
+    user = await get_user(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,17 +1,20 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import Callable, Generator, Optional, Sequence, Tuple
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import verify_token
 from app.db.database import get_db
 from app.db.models import User, UserRole
 from app.crud.user import get_user_by_email
+from app.services.payment import PaymentService, payment_service
+from app.services.user_cache import user_cache
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, estimate_count
 
 security = HTTPBearer()
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
     token = credentials.credentials
@@ -24,12 +27,15 @@ def get_current_user(
             detail="Could not validate credentials",
         )
     
-    user = get_user_by_email(db, email=email)
+    user = user_cache.get(email)
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
+        user = await get_user_by_email(db, email=email)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+        user_cache.put(user)
     
     return user
 
@@ -47,4 +53,42 @@ def get_admin_user(current_user: User = Depends(get_current_active_user)) -> Use
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def get_payment_service() -> PaymentService:
+    return payment_service
+
+class PageParams:
+    """Query parameters of the cursor-paginated list routes"""
+    
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        include_total: bool = False
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.include_total = include_total
+    
+    def after(self, *types: type) -> Optional[Tuple]:
+        """Sort key the page starts after, or None for the first page"""
+        if self.cursor is None:
+            return None
+        try:
+            return decode_cursor(self.cursor, types)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    async def page(self, db: AsyncSession, model, rows: Sequence, key: Callable[[object], Sequence]) -> dict:
+        """Page response from up to `limit + 1` rows fetched after the cursor"""
+        items = rows[:self.limit]
+        return {
+            "items": items,
+            "next_cursor": encode_cursor(key(items[-1])) if len(rows) > self.limit else None,
+            "total": await estimate_count(db, model) if self.include_total else None
+        }
+
@@ -5,31 +5,134 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Sync driver prefix -> async driver prefix
+ASYNC_DRIVERS = {
+    "mysql+pymysql://": "mysql+aiomysql://",
+    "mysql://": "mysql+aiomysql://",
+    "sqlite:///": "sqlite+aiosqlite:///",
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+    "postgresql://": "postgresql+asyncpg://",
+}
+
 class Settings(BaseSettings):
     # Database - Updated to use MySQL with XAMPP
     DATABASE_URL: str = os.getenv("DATABASE_URL", "mysql+pymysql://root:@localhost:3306/tastybite_db")
+    # Optional explicit async URL; derived from DATABASE_URL when empty
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # Print every SQL statement (SQLAlchemy echo); for debugging only
+    SQL_ECHO: bool = os.getenv("SQL_ECHO", "false").lower() == "true"
+    # Statements slower than this are logged as JSON lines to
+    # SLOW_QUERY_LOG_FILE (stderr when empty); 0 turns the log off. At most
+    # SLOW_QUERY_LOG_PER_SECOND are written per worker, the rest counted
+    SLOW_QUERY_MS: int = int(os.getenv("SLOW_QUERY_MS", "200"))
+    SLOW_QUERY_LOG_FILE: str = os.getenv("SLOW_QUERY_LOG_FILE", "")
+    SLOW_QUERY_LOG_PER_SECOND: int = int(os.getenv("SLOW_QUERY_LOG_PER_SECOND", "20"))
+    # Report each request's query count and DB time in a Server-Timing header
+    SERVER_TIMING: bool = os.getenv("SERVER_TIMING", "true").lower() == "true"
+    # Bearer token Prometheus sends to GET /metrics; unset, /metrics is not served
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
     
     # JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # Verified tokens remembered per worker so repeat requests skip the HMAC check
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    
+    # Passwords
+    # bcrypt cost; existing hashes are upgraded (or downgraded) on next login
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Threads hashing at once per worker, and how many more requests may wait
+    # for one before getting a 429
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "16"))
     
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    # "memory" keeps caches per worker; "redis" shares them (and their invalidation) across workers
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
     
     # Stripe
     STRIPE_SECRET_KEY: str = os.getenv("STRIPE_SECRET_KEY", "")
     STRIPE_PUBLISHABLE_KEY: str = os.getenv("STRIPE_PUBLISHABLE_KEY", "")
+    STRIPE_API_BASE: str = os.getenv("STRIPE_API_BASE", "https://api.stripe.com")
+    # Per-request timeout, retries after connection errors, 429s and 5xxs,
+    # and keep-alive connections held open to Stripe per worker
+    STRIPE_TIMEOUT_SECONDS: int = int(os.getenv("STRIPE_TIMEOUT_SECONDS", "10"))
+    STRIPE_MAX_RETRIES: int = int(os.getenv("STRIPE_MAX_RETRIES", "2"))
+    STRIPE_MAX_CONNECTIONS: int = int(os.getenv("STRIPE_MAX_CONNECTIONS", "20"))
+    # Signing secret of the webhook endpoint (whsec_...), and how old a
+    # signature may be before the event is refused as a possible replay
+    STRIPE_WEBHOOK_SECRET: str = os.getenv("STRIPE_WEBHOOK_SECRET", "")
+    STRIPE_WEBHOOK_TOLERANCE_SECONDS: int = int(os.getenv("STRIPE_WEBHOOK_TOLERANCE_SECONDS", "300"))
+    # Received webhook events are applied to payments and orders in batches
+    # of this size, polling this often when idle
+    PAYMENT_EVENT_BATCH_SIZE: int = int(os.getenv("PAYMENT_EVENT_BATCH_SIZE", "500"))
+    PAYMENT_EVENT_POLL_SECONDS: int = int(os.getenv("PAYMENT_EVENT_POLL_SECONDS", "5"))
     
     # Email
     SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
     SMTP_USER: str = os.getenv("SMTP_USER", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
+    # Sender address; defaults to SMTP_USER (needed when the server takes no login)
+    SMTP_FROM_EMAIL: str = os.getenv("SMTP_FROM_EMAIL", "")
+    SMTP_USE_TLS: bool = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+    SMTP_TIMEOUT_SECONDS: int = int(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+    # Authenticated sessions kept open per sender; ones idle longer than
+    # SMTP_POOL_IDLE_SECONDS are closed instead of reused
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "2"))
+    SMTP_POOL_IDLE_SECONDS: int = int(os.getenv("SMTP_POOL_IDLE_SECONDS", "60"))
+    
+    # Notifications
+    # Emails and SMS go through the notifications outbox; each worker process
+    # delivers due ones in batches of this size, polling this often when idle
+    NOTIFICATION_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", "50"))
+    NOTIFICATION_POLL_SECONDS: int = int(os.getenv("NOTIFICATION_POLL_SECONDS", "5"))
+    # Failed sends are retried after 1x, 2x, 4x... this delay, then given up on
+    NOTIFICATION_RETRY_SECONDS: int = int(os.getenv("NOTIFICATION_RETRY_SECONDS", "30"))
+    NOTIFICATION_MAX_ATTEMPTS: int = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "6"))
+    # Reminders are queued for reservations starting within the lead time,
+    # checked every REMINDER_INTERVAL_SECONDS (0 disables the scheduler) and
+    # read REMINDER_BATCH_SIZE reservations at a time
+    REMINDER_LEAD_MINUTES: int = int(os.getenv("REMINDER_LEAD_MINUTES", "180"))
+    REMINDER_INTERVAL_SECONDS: int = int(os.getenv("REMINDER_INTERVAL_SECONDS", "300"))
+    REMINDER_BATCH_SIZE: int = int(os.getenv("REMINDER_BATCH_SIZE", "500"))
+    
+    # Reservations
+    DEFAULT_SEATING_MINUTES: int = int(os.getenv("DEFAULT_SEATING_MINUTES", "90"))
+    # How long a worker trusts its in-memory table availability before re-reading the DB
+    AVAILABILITY_CACHE_SECONDS: int = int(os.getenv("AVAILABILITY_CACHE_SECONDS", "30"))
+    
+    # Menu
+    # Upper bound on how long a worker serves its menu copy without a revision
+    # bump reaching it (only matters if a Redis write was lost, or with the
+    # memory backend and several workers)
+    MENU_CACHE_SECONDS: int = int(os.getenv("MENU_CACHE_SECONDS", "300"))
+    
+    # Authenticated users cached per worker by get_current_user; changes are
+    # pushed to every worker, the TTL only bounds staleness if one is lost
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_SECONDS: int = int(os.getenv("USER_CACHE_SECONDS", "300"))
+    
+    # Admin
+    DASHBOARD_CACHE_SECONDS: int = int(os.getenv("DASHBOARD_CACHE_SECONDS", "15"))
     
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     
+    @property
+    def async_database_url(self) -> str:
+        """Async driver URL for the API engine (aiomysql / aiosqlite / asyncpg)"""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        
+        url = self.DATABASE_URL
+        for sync_prefix, async_prefix in ASYNC_DRIVERS.items():
+            if url.startswith(sync_prefix):
+                return async_prefix + url[len(sync_prefix):]
+        return url
+    
     class Config:
         env_file = ".env"
 
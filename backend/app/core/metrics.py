@@ -0,0 +1,196 @@
+import os
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db import query_stats
+from app.db.query_stats import QueryStats
+
+# With several worker processes, set PROMETHEUS_MULTIPROC_DIR (an empty
+# directory, cleared on every deploy) before starting them: each process
+# then writes its samples there and /metrics, whichever worker serves it,
+# reports the sum over all of them. Gauges declare how they combine.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Requests that matched no route share one label, so scanners probing
+# random paths cannot create a series each
+UNMATCHED_ROUTE = "<unmatched>"
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+ROWS_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000)
+
+# HTTP
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency", ["method", "route"], buckets=SECONDS_BUCKETS
+)
+REQUESTS = Counter("http_requests", "Requests answered", ["method", "route", "status"])
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled", multiprocess_mode="livesum"
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements per request", ["method", "route"], buckets=QUERY_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ["method", "route"], buckets=SECONDS_BUCKETS
+)
+REQUEST_DB_POOL_WAIT_SECONDS = Histogram(
+    "http_request_db_pool_wait_seconds", "Time spent getting database connections per request",
+    ["method", "route"], buckets=SECONDS_BUCKETS
+)
+REQUEST_DB_ROWS = Histogram(
+    "http_request_db_rows", "Rows returned or changed per request", ["method", "route"], buckets=ROWS_BUCKETS
+)
+
+# Database connection pool
+DB_POOL_SIZE = Gauge("db_pool_size", "Connections the pool keeps open", multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections in use", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond the pool size", multiprocess_mode="livesum")
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds", "Time to get a connection from the pool", buckets=SECONDS_BUCKETS
+)
+
+# Caches; the hit ratio is hits / (hits + misses)
+CACHE_REQUESTS = Counter("cache_requests", "Cache lookups", ["cache", "result"])
+
+# Work waiting in the database-backed queues; every process reads the same
+# tables, so the latest reading wins
+QUEUE_DEPTH = Gauge("queue_depth", "Items waiting in a background queue", ["queue"], multiprocess_mode="mostrecent")
+
+# Thread pools; saturation is pending / capacity
+THREAD_POOL_PENDING = Gauge(
+    "thread_pool_pending", "Tasks running or queued on a thread pool", ["pool"], multiprocess_mode="livesum"
+)
+THREAD_POOL_CAPACITY = Gauge(
+    "thread_pool_capacity", "Tasks a thread pool runs or queues before refusing more", ["pool"],
+    multiprocess_mode="livesum"
+)
+THREAD_POOL_REJECTED = Counter("thread_pool_rejected", "Tasks refused by a full thread pool", ["pool"])
+
+class RouteMetrics:
+    """The metric children of one (method, route), bound once and reused,
+    so a request does not build a label dict or look its series up"""
+    __slots__ = ("method", "route", "seconds", "statuses", "queries", "db_seconds", "pool_wait_seconds", "rows")
+    
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.seconds = REQUEST_SECONDS.labels(method, route)
+        self.statuses: Dict[int, Counter] = {}
+        self.queries = REQUEST_DB_QUERIES.labels(method, route)
+        self.db_seconds = REQUEST_DB_SECONDS.labels(method, route)
+        self.pool_wait_seconds = REQUEST_DB_POOL_WAIT_SECONDS.labels(method, route)
+        self.rows = REQUEST_DB_ROWS.labels(method, route)
+    
+    def observe(self, seconds: float, status: int, stats: QueryStats) -> None:
+        self.seconds.observe(seconds)
+        counter = self.statuses.get(status)
+        if counter is None:
+            counter = self.statuses[status] = REQUESTS.labels(self.method, self.route, str(status))
+        counter.inc()
+        self.queries.observe(stats.queries)
+        self.db_seconds.observe(stats.db_seconds)
+        self.pool_wait_seconds.observe(stats.pool_wait_seconds)
+        self.rows.observe(stats.rows)
+
+_route_metrics: Dict[Tuple[str, str], RouteMetrics] = {}
+
+def route_metrics(method: str, route: str) -> RouteMetrics:
+    metrics = _route_metrics.get((method, route))
+    if metrics is None:
+        metrics = _route_metrics[(method, route)] = RouteMetrics(method, route)
+    return metrics
+
+def server_timing(stats: QueryStats) -> bytes:
+    """Server-Timing header value; browsers show it in the network panel"""
+    return (
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries", '
+        f'db-pool;dur={stats.pool_wait_seconds * 1000:.2f}, '
+        f'db-rows;desc="{stats.rows}"'
+    ).encode()
+
+class RequestMetricsMiddleware:
+    """Records each request's latency and status, and its SQL statements,
+    DB time, pool wait and rows.
+    
+    The database figures are collected by the engine hooks in
+    app.db.query_stats. They go out in a Server-Timing header (the
+    statements run so far when the response starts, which for a normal
+    endpoint is all of them) and, with the latency, into metrics labelled
+    by method and route template once the request is done.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = QueryStats()
+        token = query_stats.query_stats.set(stats)
+        status = 500
+        
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING:
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", server_timing(stats))]
+            await send(message)
+        
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_PROGRESS.dec()
+            query_stats.query_stats.reset(token)
+            route = scope.get("route")
+            route_metrics(scope["method"], route.path if route is not None else UNMATCHED_ROUTE).observe(
+                elapsed, status, stats
+            )
+
+def instrument_engine(engine: Engine) -> None:
+    """Per-request query stats (see app.db.query_stats) and pool gauges for a
+    (sync) engine; for an AsyncEngine pass its sync_engine"""
+    query_stats.install(engine, observe_wait=DB_POOL_WAIT_SECONDS.observe)
+    
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        # NullPool and friends keep nothing to report
+        return
+    DB_POOL_SIZE.set(pool.size())
+    
+    def update_pool_gauges(returning: int) -> None:
+        # Read from the pool itself, so a missed event cannot leave them
+        # off; overflow connections are closed as they come back, so the
+        # overflow is whatever is checked out beyond the pool size
+        checked_out = pool.checkedout() - returning
+        DB_POOL_CHECKED_OUT.set(checked_out)
+        DB_POOL_OVERFLOW.set(max(checked_out - pool.size(), 0))
+    
+    # checkin fires before the pool takes the connection back
+    event.listen(engine, "checkout", lambda *args: update_pool_gauges(0))
+    event.listen(engine, "checkin", lambda *args: update_pool_gauges(1))
+
+def render_metrics() -> Tuple[bytes, str]:
+    """The exposition text of every metric (summed over the worker
+    processes in multiprocess mode) and its content type"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def mark_process_dead() -> None:
+    """Drop this process's live gauges from the multiprocess totals"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,36 @@
+from contextvars import ContextVar
+from typing import Optional
+
+# The ASGI scope of the request being handled, for code (like the SQL event
+# hooks) that runs inside a request without being handed it
+request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+def current_route() -> Optional[str]:
+    """Route template of the current request (e.g. /api/v1/orders/{order_id}),
+    its raw path before routing, or None outside a request"""
+    scope = request_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return route.path if route is not None else scope.get("path")
+
+class RequestContextMiddleware:
+    """Makes each HTTP request's scope available through `request_scope`.
+    
+    Plain ASGI rather than @app.middleware("http"), so the context set here
+    is the one the endpoint runs in. FastAPI records the matched route in
+    the same scope dict once routing is done.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_scope.reset(token)
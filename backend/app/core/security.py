@@ -1,12 +1,19 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
 from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS, THREAD_POOL_CAPACITY, THREAD_POOL_PENDING, THREAD_POOL_REJECTED
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with a different cost are flagged for an upgrade on the next login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -25,9 +32,111 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """Runs bcrypt on a small thread pool so it never blocks the event loop.
+    
+    bcrypt releases the GIL, so the loop keeps serving other requests while
+    a hash is computed. At most `max_workers` hashes run at once and
+    `max_queued` more may wait; beyond that callers get a 429 straight away
+    rather than queueing behind a login storm.
+    """
+    
+    def __init__(self, max_workers: int, max_queued: int):
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queued
+        self.pending = 0
+        self.rejected = 0
+        self._pending_gauge = THREAD_POOL_PENDING.labels("password_hash")
+        self._rejected_counter = THREAD_POOL_REJECTED.labels("password_hash")
+        THREAD_POOL_CAPACITY.labels("password_hash").set(self.capacity)
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    async def _run(self, function, *args):
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            self._rejected_counter.inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many sign-in requests, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        
+        self.pending += 1
+        self._pending_gauge.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        finally:
+            self.pending -= 1
+            self._pending_gauge.dec()
+    
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+    
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new hash) where the new hash is set when the stored one uses an outdated cost"""
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
+
+class TokenCache:
+    """Payloads of recently verified tokens, kept until the token's exp.
+    
+    Keyed by a SHA-256 of the token so only tokens that passed signature
+    verification, and never the raw bearer strings, are held. Bounded as
+    an LRU; restart the workers after rotating SECRET_KEY.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter = CACHE_REQUESTS.labels("tokens", "hit")
+        self._miss_counter = CACHE_REQUESTS.labels("tokens", "miss")
+    
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+    
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None or time.time() >= entry[0]:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            self._miss_counter.inc()
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self._hit_counter.inc()
+        return entry[1]
+    
+    def put(self, token: str, payload: Dict[str, Any]) -> None:
+        """Remember a verified payload; tokens without an exp are not cached"""
+        if not isinstance(payload.get("exp"), (int, float)) or self.max_entries <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (payload["exp"], payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+
 def verify_token(token: str) -> dict:
+    """Decoded payload of a valid, unexpired token; raises 401 otherwise"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        token_cache.put(token, payload)
         return payload
     except JWTError:
         raise HTTPException(
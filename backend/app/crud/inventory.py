@@ -1,29 +1,38 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import InventoryItem
 from app.schemas.inventory import InventoryItemCreate, InventoryItemUpdate
+from app.utils.pagination import after_key
 
-def get_inventory_item(db: Session, item_id: int) -> Optional[InventoryItem]:
-    return db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
+async def get_inventory_item(db: AsyncSession, item_id: int) -> Optional[InventoryItem]:
+    result = await db.execute(select(InventoryItem).filter(InventoryItem.id == item_id))
+    return result.scalars().first()
 
-def get_inventory_items(db: Session, skip: int = 0, limit: int = 100) -> List[InventoryItem]:
-    return db.query(InventoryItem).offset(skip).limit(limit).all()
+async def get_inventory_items(db: AsyncSession, after: Optional[Tuple[int]] = None, limit: int = 100) -> List[InventoryItem]:
+    """Items in id order, starting after the (id,) key of the previous page"""
+    query = select(InventoryItem).order_by(InventoryItem.id)
+    if after is not None:
+        query = query.filter(after_key((InventoryItem.id,), after))
+    result = await db.execute(query.limit(limit))
+    return result.scalars().all()
 
-def get_low_stock_items(db: Session) -> List[InventoryItem]:
+async def get_low_stock_items(db: AsyncSession) -> List[InventoryItem]:
     """Get items where quantity_on_hand is below par_level"""
-    return db.query(InventoryItem).filter(
-        InventoryItem.quantity_on_hand <= InventoryItem.par_level
-    ).all()
+    result = await db.execute(
+        select(InventoryItem).filter(InventoryItem.stock_margin <= 0)
+    )
+    return result.scalars().all()
 
-def create_inventory_item(db: Session, item: InventoryItemCreate) -> InventoryItem:
+async def create_inventory_item(db: AsyncSession, item: InventoryItemCreate) -> InventoryItem:
     db_item = InventoryItem(**item.dict())
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await db.refresh(db_item)
     return db_item
 
-def update_inventory_item(db: Session, item_id: int, item_update: InventoryItemUpdate) -> Optional[InventoryItem]:
-    db_item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
+async def update_inventory_item(db: AsyncSession, item_id: int, item_update: InventoryItemUpdate) -> Optional[InventoryItem]:
+    db_item = await get_inventory_item(db, item_id)
     if not db_item:
         return None
     
@@ -31,22 +40,22 @@ def update_inventory_item(db: Session, item_id: int, item_update: InventoryItemU
     for field, value in update_data.items():
         setattr(db_item, field, value)
     
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await db.refresh(db_item)
     return db_item
 
-def delete_inventory_item(db: Session, item_id: int) -> bool:
-    db_item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
+async def delete_inventory_item(db: AsyncSession, item_id: int) -> bool:
+    db_item = await get_inventory_item(db, item_id)
     if not db_item:
         return False
     
-    db.delete(db_item)
-    db.commit()
+    await db.delete(db_item)
+    await db.commit()
     return True
 
-def adjust_inventory(db: Session, item_id: int, quantity_change: int) -> Optional[InventoryItem]:
+async def adjust_inventory(db: AsyncSession, item_id: int, quantity_change: int) -> Optional[InventoryItem]:
     """Adjust inventory quantity (positive for increase, negative for decrease)"""
-    db_item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
+    db_item = await get_inventory_item(db, item_id)
     if not db_item:
         return None
     
@@ -55,6 +64,6 @@ def adjust_inventory(db: Session, item_id: int, quantity_change: int) -> Optiona
         new_quantity = 0
     
     db_item.quantity_on_hand = new_quantity
-    db.commit()
-    db.refresh(db_item)
-    return db_item
\ No newline at end of file
+    await db.commit()
+    await db.refresh(db_item)
+    return db_item
@@ -1,24 +1,32 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from app.db.models import Category, MenuItem
 from app.schemas.menu import CategoryCreate, CategoryUpdate, MenuItemCreate, MenuItemUpdate
+from app.services.menu_catalog import menu_catalog
 
 # Category CRUD operations
-def get_category(db: Session, category_id: int) -> Optional[Category]:
-    return db.query(Category).filter(Category.id == category_id).first()
+async def get_category(db: AsyncSession, category_id: int) -> Optional[Category]:
+    result = await db.execute(select(Category).filter(Category.id == category_id))
+    return result.scalars().first()
 
-def get_categories(db: Session, skip: int = 0, limit: int = 100) -> List[Category]:
-    return db.query(Category).filter(Category.is_active == True).offset(skip).limit(limit).all()
+async def get_categories(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Category]:
+    result = await db.execute(
+        select(Category).filter(Category.is_active == True).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
 
-def create_category(db: Session, category: CategoryCreate) -> Category:
+async def create_category(db: AsyncSession, category: CategoryCreate) -> Category:
     db_category = Category(**category.dict())
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await db.refresh(db_category)
+    await menu_catalog.invalidate(db)
     return db_category
 
-def update_category(db: Session, category_id: int, category_update: CategoryUpdate) -> Optional[Category]:
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+async def update_category(db: AsyncSession, category_id: int, category_update: CategoryUpdate) -> Optional[Category]:
+    db_category = await get_category(db, category_id)
     if not db_category:
         return None
     
@@ -26,44 +34,55 @@ def update_category(db: Session, category_id: int, category_update: CategoryUpda
     for field, value in update_data.items():
         setattr(db_category, field, value)
     
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await db.refresh(db_category)
+    await menu_catalog.invalidate(db)
     return db_category
 
-def delete_category(db: Session, category_id: int) -> bool:
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+async def delete_category(db: AsyncSession, category_id: int) -> bool:
+    db_category = await get_category(db, category_id)
     if not db_category:
         return False
     
-    db.delete(db_category)
-    db.commit()
+    await db.delete(db_category)
+    await db.commit()
+    await menu_catalog.invalidate(db)
     return True
 
 # MenuItem CRUD operations
-def get_menu_item(db: Session, item_id: int) -> Optional[MenuItem]:
-    return db.query(MenuItem).filter(MenuItem.id == item_id).first()
+# MenuItem responses embed the category, so it is joined in the same query;
+# lazy loads are not possible on an AsyncSession and would be N+1 anyway
+MENU_ITEM_LOAD_OPTIONS = (joinedload(MenuItem.category),)
 
-def get_menu_items(db: Session, skip: int = 0, limit: int = 100, available_only: bool = True) -> List[MenuItem]:
-    query = db.query(MenuItem)
+async def get_menu_item(db: AsyncSession, item_id: int) -> Optional[MenuItem]:
+    result = await db.execute(
+        select(MenuItem).options(*MENU_ITEM_LOAD_OPTIONS).filter(MenuItem.id == item_id)
+    )
+    return result.scalars().first()
+
+async def get_menu_items(db: AsyncSession, skip: int = 0, limit: int = 100, available_only: bool = True) -> List[MenuItem]:
+    query = select(MenuItem).options(*MENU_ITEM_LOAD_OPTIONS)
     if available_only:
         query = query.filter(MenuItem.is_available == True)
-    return query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.scalars().all()
 
-def get_menu_items_by_category(db: Session, category_id: int, available_only: bool = True) -> List[MenuItem]:
-    query = db.query(MenuItem).filter(MenuItem.category_id == category_id)
+async def get_menu_items_by_category(db: AsyncSession, category_id: int, available_only: bool = True) -> List[MenuItem]:
+    query = select(MenuItem).options(*MENU_ITEM_LOAD_OPTIONS).filter(MenuItem.category_id == category_id)
     if available_only:
         query = query.filter(MenuItem.is_available == True)
-    return query.all()
+    result = await db.execute(query)
+    return result.scalars().all()
 
-def create_menu_item(db: Session, menu_item: MenuItemCreate) -> MenuItem:
+async def create_menu_item(db: AsyncSession, menu_item: MenuItemCreate) -> MenuItem:
     db_item = MenuItem(**menu_item.dict())
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
+    await db.commit()
+    await menu_catalog.invalidate(db)
+    return await get_menu_item(db, db_item.id)
 
-def update_menu_item(db: Session, item_id: int, item_update: MenuItemUpdate) -> Optional[MenuItem]:
-    db_item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+async def update_menu_item(db: AsyncSession, item_id: int, item_update: MenuItemUpdate) -> Optional[MenuItem]:
+    db_item = await get_menu_item(db, item_id)
     if not db_item:
         return None
     
@@ -71,15 +90,17 @@ def update_menu_item(db: Session, item_id: int, item_update: MenuItemUpdate) ->
     for field, value in update_data.items():
         setattr(db_item, field, value)
     
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await db.refresh(db_item)
+    await menu_catalog.invalidate(db)
     return db_item
 
-def delete_menu_item(db: Session, item_id: int) -> bool:
-    db_item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+async def delete_menu_item(db: AsyncSession, item_id: int) -> bool:
+    db_item = await get_menu_item(db, item_id)
     if not db_item:
         return False
     
-    db.delete(db_item)
-    db.commit()
-    return True
\ No newline at end of file
+    await db.delete(db_item)
+    await db.commit()
+    await menu_catalog.invalidate(db)
+    return True
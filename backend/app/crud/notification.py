@@ -0,0 +1,137 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models import Notification, NotificationChannel, NotificationStatus
+
+# Longest a single retry waits, however many attempts have failed
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+def email_values(to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "channel": NotificationChannel.EMAIL,
+        "recipient": to_email,
+        "subject": subject,
+        "body": body,
+        "html_body": html_body
+    }
+
+def sms_values(phone: str, message: str) -> Dict[str, Any]:
+    # Same keys as an email, so both can go in one executemany INSERT
+    return {
+        "channel": NotificationChannel.SMS,
+        "recipient": phone,
+        "subject": None,
+        "body": message,
+        "html_body": None
+    }
+
+def queue_email(db: AsyncSession, to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> Notification:
+    """Add an email to the outbox, without committing; it is sent once the caller's transaction commits"""
+    notification = Notification(**email_values(to_email, subject, body, html_body))
+    db.add(notification)
+    return notification
+
+def queue_sms(db: AsyncSession, phone: str, message: str) -> Notification:
+    """Add an SMS to the outbox, without committing"""
+    notification = Notification(**sms_values(phone, message))
+    db.add(notification)
+    return notification
+
+async def queue_many(db: AsyncSession, values: List[Dict[str, Any]]) -> None:
+    """Add many notifications (see email_values, sms_values) with one
+    executemany INSERT, without committing"""
+    if values:
+        await db.execute(insert(Notification.__table__), values)
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff after the given number of failed attempts"""
+    return min(timedelta(seconds=settings.NOTIFICATION_RETRY_SECONDS * 2 ** (attempts - 1)), MAX_RETRY_DELAY)
+
+async def count_pending_notifications(db: AsyncSession) -> int:
+    """Notifications waiting to be sent, due or backing off"""
+    return await db.scalar(
+        select(func.count()).select_from(Notification).filter(Notification.status == NotificationStatus.PENDING)
+    )
+
+async def claim_notifications(db: AsyncSession, limit: int, lease: timedelta) -> List[Notification]:
+    """Take up to `limit` due notifications for delivery and commit the claim.
+    
+    Claimed rows are stamped with a fresh token and pushed `lease` into the
+    future, so other workers skip them; if this worker dies mid-batch they
+    become due again when the lease runs out.
+    """
+    now = datetime.utcnow()
+    due = (Notification.status == NotificationStatus.PENDING, Notification.next_attempt_at <= now)
+    ids = (await db.scalars(
+        select(Notification.id).filter(*due).order_by(Notification.next_attempt_at).limit(limit)
+    )).all()
+    if not ids:
+        return []
+    
+    token = uuid.uuid4().hex
+    await db.execute(
+        update(Notification)
+        .where(Notification.id.in_(ids), *due)
+        .values(
+            claim_token=token,
+            attempts=Notification.attempts + 1,
+            next_attempt_at=now + lease
+        )
+    )
+    await db.commit()
+    
+    result = await db.scalars(
+        select(Notification).filter(Notification.id.in_(ids), Notification.claim_token == token)
+    )
+    return result.all()
+
+async def record_deliveries(db: AsyncSession, notifications: List[Notification], errors: Dict[int, str]) -> None:
+    """Store the outcome of a claimed batch and commit once.
+    
+    `errors` maps the id of each failed notification to its error; the
+    others were sent. Failures are retried with exponential backoff until
+    NOTIFICATION_MAX_ATTEMPTS, then marked failed. Rows whose claim has
+    since passed to another worker are left alone.
+    """
+    if not notifications:
+        return
+    now = datetime.utcnow()
+    claimed = Notification.__table__
+    
+    sent_ids = [n.id for n in notifications if n.id not in errors]
+    if sent_ids:
+        await db.execute(
+            update(claimed)
+            .where(claimed.c.id.in_(sent_ids), claimed.c.claim_token == notifications[0].claim_token)
+            .values(status=NotificationStatus.SENT, sent_at=now, claim_token=None)
+        )
+    
+    failed = [n for n in notifications if n.id in errors]
+    if failed:
+        await db.execute(
+            update(claimed)
+            .where(claimed.c.id == bindparam("notification_id"), claimed.c.claim_token == bindparam("token"))
+            .values(
+                status=bindparam("new_status"),
+                last_error=bindparam("error"),
+                next_attempt_at=bindparam("retry_at"),
+                claim_token=None
+            ),
+            [
+                {
+                    "notification_id": n.id,
+                    "token": n.claim_token,
+                    "new_status": (
+                        NotificationStatus.FAILED if n.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS
+                        else NotificationStatus.PENDING
+                    ),
+                    "error": errors[n.id][:1000],
+                    "retry_at": now + retry_delay(n.attempts)
+                }
+                for n in failed
+            ]
+        )
+    await db.commit()
@@ -1,7 +1,13 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.db.models import Order, OrderItem, MenuItem
+from typing import List, Optional, Tuple
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.db.models import Order, OrderItem, MenuItem, User
 from app.schemas.order import OrderCreate, OrderUpdate
+from app.crud.sales import apply_sales_delta, item_quantities, order_contribution, record_order_change
+from app.services.dashboard import invalidate_dashboard_stats
+from app.services.notifications import notification_worker, queue_order_confirmation
+from app.utils.pagination import after_key
 import uuid
 from datetime import datetime
 
@@ -9,23 +15,64 @@ def generate_order_number() -> str:
     """Generate a unique order number"""
     return f"ORD-{uuid.uuid4().hex[:8].upper()}"
 
-def get_order(db: Session, order_id: int) -> Optional[Order]:
-    return db.query(Order).filter(Order.id == order_id).first()
+# Order responses embed order_items, so they are loaded up front with one
+# extra IN query per page; lazy loads are not possible on an AsyncSession
+# and would be N+1 anyway
+ORDER_LOAD_OPTIONS = (selectinload(Order.order_items),)
 
-def get_orders(db: Session, skip: int = 0, limit: int = 100) -> List[Order]:
-    return db.query(Order).order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+async def get_order(db: AsyncSession, order_id: int) -> Optional[Order]:
+    result = await db.execute(
+        select(Order).options(*ORDER_LOAD_OPTIONS).filter(Order.id == order_id)
+    )
+    return result.scalars().first()
+
+async def get_order_for_update(db: AsyncSession, order_id: int) -> Optional[Order]:
+    """The order, locked until the caller commits and re-read even if the
+    session already holds it, so a rollup delta taken from its status cannot
+    race another write to the same order"""
+    result = await db.execute(
+        select(Order)
+        .options(*ORDER_LOAD_OPTIONS)
+        .filter(Order.id == order_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+async def get_orders(db: AsyncSession, after: Optional[Tuple[int]] = None, limit: int = 100) -> List[Order]:
+    """Newest orders first, starting after the (id,) key of the previous page.
+    
+    Ids follow insertion order, so this is created_at order with a unique,
+    primary-key seek instead of an OFFSET that reads every skipped row.
+    """
+    query = select(Order).options(*ORDER_LOAD_OPTIONS).order_by(Order.id.desc())
+    if after is not None:
+        query = query.filter(after_key((Order.id,), after, descending=True))
+    result = await db.execute(query.limit(limit))
+    return result.scalars().all()
 
-def get_user_orders(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Order]:
-    return db.query(Order).filter(Order.customer_id == user_id).order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+async def get_user_orders(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[Order]:
+    result = await db.execute(
+        select(Order).options(*ORDER_LOAD_OPTIONS).filter(Order.customer_id == user_id).order_by(Order.created_at.desc()).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
 
-def create_order(db: Session, order: OrderCreate, customer_id: int) -> Order:
+async def create_order(db: AsyncSession, order: OrderCreate, customer_id: int, notify: Optional[User] = None) -> Order:
+    """Place an order; with `notify`, that user's confirmation is queued in the same transaction"""
+    # Resolve every menu item in a single IN query
+    menu_item_ids = {item_data.menu_item_id for item_data in order.items}
+    result = await db.execute(
+        select(MenuItem).filter(MenuItem.id.in_(menu_item_ids), MenuItem.is_available == True)
+    )
+    menu_items = {menu_item.id: menu_item for menu_item in result.scalars()}
+    
     # Calculate totals
     subtotal = 0
     order_items_data = []
     
     for item_data in order.items:
-        menu_item = db.query(MenuItem).filter(MenuItem.id == item_data.menu_item_id).first()
-        if not menu_item or not menu_item.is_available:
+        menu_item = menu_items.get(item_data.menu_item_id)
+        if not menu_item:
             continue
         
         item_total = menu_item.price * item_data.quantity
@@ -62,43 +109,67 @@ def create_order(db: Session, order: OrderCreate, customer_id: int) -> Order:
     )
     
     db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
-    
-    # Create order items
-    for item_data in order_items_data:
-        db_order_item = OrderItem(
-            order_id=db_order.id,
-            **item_data
+    await db.flush()
+    
+    # Create order items with one executemany INSERT in the same transaction
+    if order_items_data:
+        await db.execute(
+            insert(OrderItem),
+            [{"order_id": db_order.id, **item_data} for item_data in order_items_data]
         )
-        db.add(db_order_item)
     
-    db.commit()
-    db.refresh(db_order)
-    return db_order
+    # Roll the new order into today's sales; created_at is the database's
+    # CURRENT_TIMESTAMP, so the day is taken from the same clock
+    counted, paid = order_contribution(db_order.status, db_order.payment_status)
+    await apply_sales_delta(
+        db,
+        func.current_date(),
+        counted,
+        paid,
+        paid * total_amount,
+        item_quantities((item_data["menu_item_id"], item_data["quantity"]) for item_data in order_items_data)
+    )
+    
+    if notify is not None:
+        queue_order_confirmation(db, db_order, notify)
+    
+    await db.commit()
+    await invalidate_dashboard_stats()
+    if notify is not None:
+        notification_worker.wake()
+    return await get_order(db, db_order.id)
 
-def update_order(db: Session, order_id: int, order_update: OrderUpdate) -> Optional[Order]:
-    db_order = db.query(Order).filter(Order.id == order_id).first()
+async def update_order(db: AsyncSession, order_id: int, order_update: OrderUpdate) -> Optional[Order]:
+    db_order = await get_order_for_update(db, order_id)
     if not db_order:
         return None
     
+    previous = order_contribution(db_order.status, db_order.payment_status)
     update_data = order_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_order, field, value)
     
-    db.commit()
-    db.refresh(db_order)
+    current = order_contribution(db_order.status, db_order.payment_status)
+    if current != previous:
+        await record_order_change(db, db_order, previous, current)
+    
+    await db.commit()
+    await db.refresh(db_order)
+    await invalidate_dashboard_stats()
     return db_order
 
-def delete_order(db: Session, order_id: int) -> bool:
-    db_order = db.query(Order).filter(Order.id == order_id).first()
+async def delete_order(db: AsyncSession, order_id: int) -> bool:
+    db_order = await get_order_for_update(db, order_id)
     if not db_order:
         return False
     
+    await record_order_change(db, db_order, order_contribution(db_order.status, db_order.payment_status), (0, 0))
+    
     # Delete order items first
-    db.query(OrderItem).filter(OrderItem.order_id == order_id).delete()
+    await db.execute(delete(OrderItem).filter(OrderItem.order_id == order_id))
     
     # Delete order
-    db.delete(db_order)
-    db.commit()
-    return True
\ No newline at end of file
+    await db.delete(db_order)
+    await db.commit()
+    await invalidate_dashboard_stats()
+    return True
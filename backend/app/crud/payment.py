@@ -0,0 +1,184 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Order, Payment, PaymentEvent, PaymentStatus
+from app.schemas.order import OrderUpdate
+from app.crud.order import update_order
+from app.crud.sales import apply_sales_delta, order_contribution
+
+# Webhook event types that change a payment, and the status they set
+EVENT_STATUSES = {
+    "payment_intent.succeeded": PaymentStatus.PAID,
+    "payment_intent.payment_failed": PaymentStatus.FAILED,
+    "payment_intent.canceled": PaymentStatus.FAILED,
+    "charge.refunded": PaymentStatus.REFUNDED,
+}
+
+async def get_payment_by_order(db: AsyncSession, order_id: int) -> Optional[Payment]:
+    result = await db.execute(select(Payment).filter(Payment.order_id == order_id))
+    return result.scalars().first()
+
+async def save_payment_intent(
+    db: AsyncSession,
+    order_id: int,
+    payment_intent_id: str,
+    amount: float,
+    currency: str
+) -> Payment:
+    """Record the order's Stripe payment intent, replacing an earlier unpaid one"""
+    payment = await get_payment_by_order(db, order_id)
+    if payment is None:
+        payment = Payment(order_id=order_id, payment_method="card")
+        db.add(payment)
+    if payment.stripe_payment_intent_id != payment_intent_id:
+        # The same intent keeps its status; a webhook may already have set it
+        payment.stripe_payment_intent_id = payment_intent_id
+        payment.status = PaymentStatus.PENDING
+        payment.last_event_created = None
+    payment.amount = amount
+    payment.currency = currency
+    await db.commit()
+    await db.refresh(payment)
+    return payment
+
+async def set_payment_status(db: AsyncSession, payment: Payment, payment_status: PaymentStatus) -> Payment:
+    """Update the payment and its order's payment status (and so the sales rollups) together"""
+    payment.status = payment_status
+    await update_order(db, payment.order_id, OrderUpdate(payment_status=payment_status))
+    await db.refresh(payment)
+    return payment
+
+def _insert_ignoring_duplicates(db: AsyncSession, table, key: str):
+    """INSERT that skips rows whose `key` already exists"""
+    if db.bind.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        return insert(table).prefix_with("IGNORE")
+    
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table).on_conflict_do_nothing(index_elements=[key])
+
+async def store_payment_events(db: AsyncSession, values: List[Dict[str, Any]]) -> Set[str]:
+    """Store received webhook events with one executemany INSERT and commit.
+    
+    Returns the ids of the events that were new; redeliveries of events
+    already stored (or repeated within `values`) are dropped.
+    """
+    unique = {row["event_id"]: row for row in values}
+    result = await db.scalars(select(PaymentEvent.event_id).filter(PaymentEvent.event_id.in_(list(unique))))
+    for event_id in result.all():
+        del unique[event_id]
+    if unique:
+        # Still ignoring duplicates, for an event another worker stored meanwhile
+        await db.execute(_insert_ignoring_duplicates(db, PaymentEvent.__table__, "event_id"), list(unique.values()))
+    await db.commit()
+    return set(unique)
+
+async def count_unprocessed_payment_events(db: AsyncSession) -> int:
+    return await db.scalar(
+        select(func.count()).select_from(PaymentEvent).filter(PaymentEvent.processed_at.is_(None))
+    )
+
+async def claim_payment_events(db: AsyncSession, limit: int) -> List[PaymentEvent]:
+    """The oldest unprocessed events, locked until the caller commits.
+    
+    SKIP LOCKED lets each worker take a different batch; on SQLite, which
+    has no row locks, the clause is left out.
+    """
+    result = await db.scalars(
+        select(PaymentEvent)
+        .filter(PaymentEvent.processed_at.is_(None))
+        .order_by(PaymentEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return result.all()
+
+async def apply_payment_events(db: AsyncSession, events: List[PaymentEvent]) -> int:
+    """Apply a batch of webhook events to payments and orders, mark them
+    processed and commit once; returns how many orders changed status.
+    
+    Events are applied per payment intent in Stripe's `created` order (then
+    arrival order), so only each intent's newest event in the batch
+    matters. It is applied only if it is not older than the last event
+    applied to that payment, so a late or redelivered event never undoes a
+    newer one, whichever batch or worker it lands in.
+    """
+    if not events:
+        return 0
+    latest: Dict[str, PaymentEvent] = {}
+    for event in sorted(events, key=lambda event: (event.created, event.id)):
+        latest[event.payment_intent_id] = event
+    
+    result = await db.scalars(
+        select(Payment).filter(Payment.stripe_payment_intent_id.in_(list(latest))).with_for_update()
+    )
+    payments = {payment.stripe_payment_intent_id: payment for payment in result.all()}
+    
+    # An intent the webhook got to before save_payment_intent did (or one
+    # created outside this API): its metadata names the order, whose payment
+    # row is pointed at it, as save_payment_intent would have done
+    orphans = {
+        event.order_id: intent_id for intent_id, event in latest.items()
+        if intent_id not in payments and event.order_id is not None
+    }
+    if orphans:
+        result = await db.scalars(select(Payment).filter(Payment.order_id.in_(list(orphans))).with_for_update())
+        by_order = {payment.order_id: payment for payment in result.all()}
+        existing_orders = set((await db.scalars(select(Order.id).filter(Order.id.in_(list(orphans))))).all())
+        for order_id, intent_id in orphans.items():
+            payment = by_order.get(order_id)
+            if payment is None and order_id in existing_orders:
+                payment = Payment(order_id=order_id, payment_method="card")
+                db.add(payment)
+            if payment is None or payment.status == PaymentStatus.PAID:
+                continue
+            payment.stripe_payment_intent_id = intent_id
+            payment.amount = latest[intent_id].amount
+            payment.currency = latest[intent_id].currency
+            payment.status = PaymentStatus.PENDING
+            payment.last_event_created = None
+            payments[intent_id] = payment
+    
+    order_statuses: Dict[int, PaymentStatus] = {}
+    for intent_id, payment in payments.items():
+        event = latest[intent_id]
+        if payment.last_event_created is not None and event.created < payment.last_event_created:
+            continue
+        payment.last_event_created = event.created
+        payment.status = EVENT_STATUSES[event.event_type]
+        order_statuses[payment.order_id] = payment.status
+    
+    # Orders are locked too, so the rollup delta is taken from the state it
+    # replaces; paid revenue is moved per day with one upsert each
+    changed = 0
+    if order_statuses:
+        result = await db.scalars(select(Order).filter(Order.id.in_(list(order_statuses))).with_for_update())
+        deltas = defaultdict(lambda: [0, 0.0])
+        for order in result.all():
+            new_status = order_statuses[order.id]
+            if order.payment_status == new_status:
+                continue
+            previous = order_contribution(order.status, order.payment_status)
+            current = order_contribution(order.status, new_status)
+            order.payment_status = new_status
+            changed += 1
+            if current != previous:
+                paid_delta = current[1] - previous[1]
+                delta = deltas[order.created_at.date()]
+                delta[0] += paid_delta
+                delta[1] += paid_delta * order.total_amount
+        for day, (paid_delta, revenue_delta) in deltas.items():
+            await apply_sales_delta(db, day, 0, paid_delta, revenue_delta, {})
+    
+    await db.execute(
+        update(PaymentEvent)
+        .where(PaymentEvent.id.in_([event.id for event in events]))
+        .values(processed_at=datetime.utcnow())
+    )
+    await db.commit()
+    return changed
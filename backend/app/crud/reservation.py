@@ -1,45 +1,298 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.db.models import Reservation
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import Row, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models import Reservation, ReservationStatus, Table, User
 from app.schemas.reservation import ReservationCreate, ReservationUpdate
+from app.services.availability import availability_engine, MAX_SEATING_MINUTES
+from app.services.dashboard import invalidate_dashboard_stats
+from app.services.notifications import notification_worker, queue_reservation_confirmation
+from app.utils.pagination import after_key
 
-def get_reservation(db: Session, reservation_id: int) -> Optional[Reservation]:
-    return db.query(Reservation).filter(Reservation.id == reservation_id).first()
+async def get_reservation(db: AsyncSession, reservation_id: int) -> Optional[Reservation]:
+    result = await db.execute(select(Reservation).filter(Reservation.id == reservation_id))
+    return result.scalars().first()
 
-def get_reservations(db: Session, skip: int = 0, limit: int = 100) -> List[Reservation]:
-    return db.query(Reservation).order_by(Reservation.reservation_date.desc()).offset(skip).limit(limit).all()
+async def get_reservations(
+    db: AsyncSession,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: int = 100
+) -> List[Reservation]:
+    """Latest reservation dates first, starting after the (reservation_date, id) key of the previous page"""
+    query = select(Reservation).order_by(Reservation.reservation_date.desc(), Reservation.id.desc())
+    if after is not None:
+        query = query.filter(after_key((Reservation.reservation_date, Reservation.id), after, descending=True))
+    result = await db.execute(query.limit(limit))
+    return result.scalars().all()
 
-def get_user_reservations(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Reservation]:
-    return db.query(Reservation).filter(Reservation.customer_id == user_id).order_by(Reservation.reservation_date.desc()).offset(skip).limit(limit).all()
+async def get_user_reservations(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[Reservation]:
+    result = await db.execute(
+        select(Reservation).filter(Reservation.customer_id == user_id).order_by(Reservation.reservation_date.desc()).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
 
-def create_reservation(db: Session, reservation: ReservationCreate, customer_id: int) -> Reservation:
+async def create_reservation(db: AsyncSession, reservation: ReservationCreate, customer_id: int) -> Reservation:
+    reservation_data = reservation.dict()
+    if reservation_data["duration_minutes"] is None:
+        reservation_data["duration_minutes"] = settings.DEFAULT_SEATING_MINUTES
+    
     db_reservation = Reservation(
         customer_id=customer_id,
-        **reservation.dict()
+        reservation_end=reservation_data["reservation_date"] + timedelta(minutes=reservation_data["duration_minutes"]),
+        **reservation_data
     )
     db.add(db_reservation)
-    db.commit()
-    db.refresh(db_reservation)
+    await db.commit()
+    await db.refresh(db_reservation)
+    await invalidate_dashboard_stats()
+    return db_reservation
+
+# Errors that mean a concurrent transaction held the rows we needed: MySQL
+# lock wait timeout and deadlock, PostgreSQL serialization failure and
+# deadlock, SQLite busy/locked. Anything else is a real failure.
+MYSQL_LOCK_ERRORS = (1205, 1213)
+POSTGRES_LOCK_SQLSTATES = ("40001", "40P01")
+SQLITE_LOCK_ERRORS = (5, 6)
+
+def is_lock_conflict(error: DBAPIError) -> bool:
+    orig = error.orig
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if sqlstate is not None:
+        return sqlstate in POSTGRES_LOCK_SQLSTATES
+    sqlite_code = getattr(orig, "sqlite_errorcode", None)
+    if sqlite_code is not None:
+        # Extended codes keep the primary code in the low byte
+        return sqlite_code & 0xFF in SQLITE_LOCK_ERRORS
+    args = getattr(orig, "args", ())
+    return bool(args) and args[0] in MYSQL_LOCK_ERRORS
+
+async def claim_table(
+    db: AsyncSession,
+    table_id: int,
+    party_size: int,
+    starts_at: datetime,
+    ends_at: datetime,
+    exclude_reservation_id: Optional[int] = None
+) -> bool:
+    """Lock a table and check it is free for [starts_at, ends_at), in a
+    transaction that starts with the lock.
+    
+    A transaction the session already has open (say, the current user's
+    lookup) is committed first: under MySQL's REPEATABLE READ its snapshot
+    predates the lock, and the overlap check would miss a booking committed
+    while this one waited for the table. False when the table is inactive,
+    too small or has an overlapping seating (other than
+    `exclude_reservation_id`, for a reservation being moved); the caller
+    then rolls back.
+    """
+    if db.in_transaction():
+        await db.commit()
+    
+    # Claim the table row first. The UPDATE takes a row lock on MySQL and
+    # PostgreSQL (and the write lock on SQLite), so concurrent bookings of
+    # the same table queue here and each sees the previous one's insert.
+    claimed = await db.execute(
+        update(Table)
+        .where(Table.id == table_id, Table.is_active == True, Table.capacity >= party_size)
+        .values(booking_version=Table.booking_version + 1)
+    )
+    if claimed.rowcount != 1:
+        return False
+    
+    overlapping = select(Reservation.id).filter(
+        Reservation.table_id == table_id,
+        Reservation.reservation_date >= starts_at - timedelta(minutes=MAX_SEATING_MINUTES),
+        Reservation.reservation_date < ends_at,
+        Reservation.reservation_end > starts_at,
+        Reservation.status != ReservationStatus.CANCELLED
+    )
+    if exclude_reservation_id is not None:
+        overlapping = overlapping.filter(Reservation.id != exclude_reservation_id)
+    return await db.scalar(overlapping.limit(1)) is None
+
+async def book_table(
+    db: AsyncSession,
+    reservation: ReservationCreate,
+    customer_id: int,
+    table_id: int,
+    notify: Optional[User] = None
+) -> Optional[Reservation]:
+    """Atomically claim a table for a seating window.
+    
+    Returns None when the table is unavailable: inactive, too small, already
+    booked for an overlapping window, or lost to a concurrent booking. With
+    `notify`, that user's confirmation is queued in the same transaction.
+    """
+    starts_at = reservation.reservation_date
+    duration = reservation.duration_minutes or settings.DEFAULT_SEATING_MINUTES
+    ends_at = starts_at + timedelta(minutes=duration)
+    
+    try:
+        if not await claim_table(db, table_id, reservation.party_size, starts_at, ends_at):
+            await db.rollback()
+            return None
+        
+        table = await db.get(Table, table_id)
+        reservation_data = reservation.dict()
+        reservation_data["duration_minutes"] = duration
+        db_reservation = Reservation(
+            customer_id=customer_id,
+            table_id=table.id,
+            table_number=table.name,
+            reservation_end=ends_at,
+            **reservation_data
+        )
+        db.add(db_reservation)
+        if notify is not None:
+            await db.flush()
+            queue_reservation_confirmation(db, db_reservation, notify)
+        await db.commit()
+    except DBAPIError as e:
+        # Lock timeouts and deadlocks mean another booking got there first
+        await db.rollback()
+        if not is_lock_conflict(e):
+            raise
+        return None
+    
+    await db.refresh(db_reservation)
+    availability_engine.record_booking(table_id, db_reservation.reservation_date, db_reservation.reservation_end)
+    await invalidate_dashboard_stats()
+    if notify is not None:
+        notification_worker.wake()
     return db_reservation
 
-def update_reservation(db: Session, reservation_id: int, reservation_update: ReservationUpdate) -> Optional[Reservation]:
-    db_reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+# Booked and not yet cancelled or completed
+REMINDABLE_STATUSES = (ReservationStatus.PENDING, ReservationStatus.CONFIRMED)
+
+async def get_reservations_to_remind(
+    db: AsyncSession,
+    starts_from: datetime,
+    starts_before: datetime,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: int = 500
+) -> List[Row]:
+    """Next page of reservations in [starts_from, starts_before) still owed a
+    reminder, with the customer's contact details, in (reservation_date, id) order"""
+    query = (
+        select(
+            Reservation.id,
+            Reservation.reservation_date,
+            Reservation.party_size,
+            User.email,
+            User.phone
+        )
+        .join(User, User.id == Reservation.customer_id)
+        .filter(
+            Reservation.reservation_date >= starts_from,
+            Reservation.reservation_date < starts_before,
+            Reservation.status.in_(REMINDABLE_STATUSES),
+            Reservation.reminder_sent_at.is_(None)
+        )
+        .order_by(Reservation.reservation_date, Reservation.id)
+    )
+    if after is not None:
+        query = query.filter(after_key((Reservation.reservation_date, Reservation.id), after))
+    result = await db.execute(query.limit(limit))
+    return result.all()
+
+async def mark_reminders_sent(db: AsyncSession, reservation_ids: List[int], stamp: datetime) -> List[int]:
+    """Stamp the reservations as reminded, as the first write of a
+    transaction the caller commits.
+    
+    Returns the ids this call stamped; any already stamped by a concurrent
+    run are left out, so each reminder is queued once.
+    """
+    def stamp_unreminded(ids):
+        return db.execute(
+            update(Reservation)
+            .where(Reservation.id.in_(ids), Reservation.reminder_sent_at.is_(None))
+            .values(reminder_sent_at=stamp)
+            .execution_options(synchronize_session=False)
+        )
+    
+    result = await stamp_unreminded(reservation_ids)
+    if result.rowcount == len(reservation_ids):
+        return reservation_ids
+    
+    # Another run got to some of them first: undo and find out which, one at a time
+    await db.rollback()
+    stamped = []
+    for reservation_id in reservation_ids:
+        if (await stamp_unreminded([reservation_id])).rowcount == 1:
+            stamped.append(reservation_id)
+    return stamped
+
+async def update_reservation(db: AsyncSession, reservation_id: int, reservation_update: ReservationUpdate) -> Optional[Reservation]:
+    """Apply an update, re-checking the table when it moves the seating.
+    
+    A reservation holding a table that gets a new window or party size (or
+    is restored after a cancellation) goes through claim_table like a new
+    booking. Returns None when the reservation is missing or its table
+    cannot take the change.
+    """
+    db_reservation = await get_reservation(db, reservation_id)
     if not db_reservation:
         return None
     
+    previous_window = (db_reservation.reservation_date, db_reservation.reservation_end)
+    held_table = db_reservation.status != ReservationStatus.CANCELLED
     update_data = reservation_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_reservation, field, value)
+    starts_at = update_data.get("reservation_date", db_reservation.reservation_date)
+    duration = update_data.get("duration_minutes", db_reservation.duration_minutes)
+    ends_at = starts_at + timedelta(minutes=duration)
+    party_size = update_data.get("party_size", db_reservation.party_size)
+    new_status = update_data.get("status", db_reservation.status)
+    
+    recheck = (
+        db_reservation.table_id is not None
+        and new_status != ReservationStatus.CANCELLED
+        and (
+            (starts_at, ends_at, party_size) != (*previous_window, db_reservation.party_size)
+            or not held_table
+        )
+    )
+    try:
+        if recheck:
+            if not await claim_table(
+                db, db_reservation.table_id, party_size, starts_at, ends_at,
+                exclude_reservation_id=reservation_id
+            ):
+                await db.rollback()
+                return None
+        
+        for field, value in update_data.items():
+            setattr(db_reservation, field, value)
+        db_reservation.reservation_end = ends_at
+        await db.commit()
+    except DBAPIError as e:
+        await db.rollback()
+        if not is_lock_conflict(e):
+            raise
+        return None
+    await db.refresh(db_reservation)
     
-    db.commit()
-    db.refresh(db_reservation)
+    if db_reservation.table_id is not None:
+        if held_table:
+            availability_engine.record_release(db_reservation.table_id, *previous_window)
+        if db_reservation.status != ReservationStatus.CANCELLED:
+            availability_engine.record_booking(
+                db_reservation.table_id, db_reservation.reservation_date, db_reservation.reservation_end
+            )
+    await invalidate_dashboard_stats()
     return db_reservation
 
-def delete_reservation(db: Session, reservation_id: int) -> bool:
-    db_reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+async def delete_reservation(db: AsyncSession, reservation_id: int) -> bool:
+    db_reservation = await get_reservation(db, reservation_id)
     if not db_reservation:
         return False
     
-    db.delete(db_reservation)
-    db.commit()
-    return True
\ No newline at end of file
+    await db.delete(db_reservation)
+    await db.commit()
+    if db_reservation.table_id is not None and db_reservation.status != ReservationStatus.CANCELLED:
+        availability_engine.record_release(
+            db_reservation.table_id, db_reservation.reservation_date, db_reservation.reservation_end
+        )
+    await invalidate_dashboard_stats()
+    return True
@@ -0,0 +1,119 @@
+from datetime import date
+from typing import Dict, Iterable, List, Tuple, Union
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+from app.db.models import DailySales, DailyItemSales, ItemSalesTotal, MenuItem, Order, OrderStatus, PaymentStatus
+
+Day = Union[date, ColumnElement]
+
+def order_contribution(order_status, payment_status) -> Tuple[int, int]:
+    """(counted, paid) flags for an order in the given state"""
+    counted = int(order_status != OrderStatus.CANCELLED)
+    paid = int(counted and payment_status == PaymentStatus.PAID)
+    return counted, paid
+
+def _upsert_increment(db: AsyncSession, model, rows: List[dict], keys: Iterable[str], increments: Iterable[str]):
+    """INSERT the rows, or add their values to the existing rows with the same key"""
+    if db.bind.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(model).values(rows)
+        return statement.on_duplicate_key_update(
+            {column: getattr(model, column) + statement.inserted[column] for column in increments}
+        )
+    
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(model).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: getattr(model, column) + statement.excluded[column] for column in increments}
+    )
+
+async def apply_sales_delta(
+    db: AsyncSession,
+    day: Day,
+    order_delta: int,
+    paid_delta: int,
+    revenue_delta: float,
+    item_quantities: Dict[int, int]
+) -> None:
+    """Add an order's change in contribution to the rollups, without committing"""
+    if order_delta or paid_delta:
+        await db.execute(_upsert_increment(
+            db,
+            DailySales,
+            [{
+                "day": day,
+                "order_count": order_delta,
+                "paid_order_count": paid_delta,
+                "paid_revenue": revenue_delta
+            }],
+            keys=("day",),
+            increments=("order_count", "paid_order_count", "paid_revenue")
+        ))
+    
+    if order_delta and item_quantities:
+        await db.execute(_upsert_increment(
+            db,
+            DailyItemSales,
+            [
+                {"day": day, "menu_item_id": menu_item_id, "quantity": quantity * order_delta}
+                for menu_item_id, quantity in item_quantities.items()
+            ],
+            keys=("day", "menu_item_id"),
+            increments=("quantity",)
+        ))
+        await db.execute(_upsert_increment(
+            db,
+            ItemSalesTotal,
+            [
+                {"menu_item_id": menu_item_id, "quantity": quantity * order_delta}
+                for menu_item_id, quantity in item_quantities.items()
+            ],
+            keys=("menu_item_id",),
+            increments=("quantity",)
+        ))
+
+def item_quantities(lines: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+    """Total quantity per menu item from (menu_item_id, quantity) pairs"""
+    quantities: Dict[int, int] = {}
+    for menu_item_id, quantity in lines:
+        quantities[menu_item_id] = quantities.get(menu_item_id, 0) + quantity
+    return quantities
+
+async def record_order_change(db: AsyncSession, order: Order, old: Tuple[int, int], new: Tuple[int, int]) -> None:
+    """Move an existing order's contribution from `old` to `new` (see order_contribution)"""
+    order_delta = new[0] - old[0]
+    paid_delta = new[1] - old[1]
+    await apply_sales_delta(
+        db,
+        order.created_at.date(),
+        order_delta,
+        paid_delta,
+        paid_delta * order.total_amount,
+        item_quantities((order_item.menu_item_id, order_item.quantity) for order_item in order.order_items)
+    )
+
+async def get_daily_sales(db: AsyncSession, start_date: date) -> List[DailySales]:
+    result = await db.execute(
+        select(DailySales).filter(
+            DailySales.day >= start_date,
+            DailySales.paid_order_count > 0
+        ).order_by(DailySales.day)
+    )
+    return result.scalars().all()
+
+async def get_popular_items(db: AsyncSession, limit: int = 10):
+    """The most ordered items of all time, read from the top of the running
+    totals; the cost does not grow with order history"""
+    result = await db.execute(
+        select(MenuItem.id, MenuItem.name, MenuItem.price, ItemSalesTotal.quantity.label("total_ordered"))
+        .join(MenuItem, MenuItem.id == ItemSalesTotal.menu_item_id)
+        .filter(ItemSalesTotal.quantity > 0)
+        .order_by(ItemSalesTotal.quantity.desc())
+        .limit(limit)
+    )
+    return result.all()
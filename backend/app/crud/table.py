@@ -0,0 +1,39 @@
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Table
+from app.schemas.table import TableCreate, TableUpdate
+from app.services.availability import availability_engine
+
+async def get_table(db: AsyncSession, table_id: int) -> Optional[Table]:
+    result = await db.execute(select(Table).filter(Table.id == table_id))
+    return result.scalars().first()
+
+async def get_tables(db: AsyncSession, active_only: bool = True) -> List[Table]:
+    query = select(Table)
+    if active_only:
+        query = query.filter(Table.is_active == True)
+    result = await db.execute(query.order_by(Table.capacity, Table.id))
+    return result.scalars().all()
+
+async def create_table(db: AsyncSession, table: TableCreate) -> Table:
+    db_table = Table(**table.dict())
+    db.add(db_table)
+    await db.commit()
+    await db.refresh(db_table)
+    availability_engine.invalidate()
+    return db_table
+
+async def update_table(db: AsyncSession, table_id: int, table_update: TableUpdate) -> Optional[Table]:
+    db_table = await get_table(db, table_id)
+    if not db_table:
+        return None
+    
+    update_data = table_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_table, field, value)
+    
+    await db.commit()
+    await db.refresh(db_table)
+    availability_engine.invalidate()
+    return db_table
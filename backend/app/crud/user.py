@@ -1,20 +1,30 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash
+from app.core.security import password_hasher
+from app.services.user_cache import user_cache
+from app.utils.pagination import after_key
 
-def get_user(db: Session, user_id: int) -> Optional[User]:
-    return db.query(User).filter(User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    result = await db.execute(select(User).filter(User.id == user_id))
+    return result.scalars().first()
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    result = await db.execute(select(User).filter(User.email == email))
+    return result.scalars().first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    return db.query(User).offset(skip).limit(limit).all()
+async def get_users(db: AsyncSession, after: Optional[Tuple[int]] = None, limit: int = 100) -> List[User]:
+    """Users in id order, starting after the (id,) key of the previous page"""
+    query = select(User).order_by(User.id)
+    if after is not None:
+        query = query.filter(after_key((User.id,), after))
+    result = await db.execute(query.limit(limit))
+    return result.scalars().all()
 
-def create_user(db: Session, user: UserCreate) -> User:
-    hashed_password = get_password_hash(user.password)
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
+    hashed_password = await password_hasher.hash(user.password)
     db_user = User(
         email=user.email,
         name=user.name,
@@ -23,28 +33,45 @@ def create_user(db: Session, user: UserCreate) -> User:
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
-    db_user = db.query(User).filter(User.id == user_id).first()
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """The user with these credentials, or None; rehashes the password if the bcrypt cost changed"""
+    user = await get_user_by_email(db, email)
+    if not user:
+        return None
+    
+    valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
+
+async def update_user(db: AsyncSession, user_id: int, user_update: UserUpdate) -> Optional[User]:
+    db_user = await get_user(db, user_id)
     if not db_user:
         return None
     
+    old_email = db_user.email
     update_data = user_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    await user_cache.invalidate(*{old_email, db_user.email})
     return db_user
 
-def delete_user(db: Session, user_id: int) -> bool:
-    db_user = db.query(User).filter(User.id == user_id).first()
+async def delete_user(db: AsyncSession, user_id: int) -> bool:
+    db_user = await get_user(db, user_id)
     if not db_user:
         return False
     
-    db.delete(db_user)
-    db.commit()
-    return True
\ No newline at end of file
+    await db.delete(db_user)
+    await db.commit()
+    await user_cache.invalidate(db_user.email)
+    return True
@@ -1,23 +1,50 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.db.slow_query_log import SlowQueryLog
 
 # Create engine with MySQL-specific configurations
+# Synchronous engine is kept for scripts (init_db.py, sample_data.py) and Alembic
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=300,
-    echo=True  # Set to False in production
+    echo=settings.SQL_ECHO
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API so queries don't block the event loop
+async_engine = create_async_engine(
+    settings.async_database_url,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    echo=settings.SQL_ECHO
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Per-request statement counts, DB time and pool wait, and pool gauges (app.core.metrics)
+instrument_engine(async_engine.sync_engine)
+
+if settings.SLOW_QUERY_MS > 0:
+    slow_query_log = SlowQueryLog(
+        settings.SLOW_QUERY_MS,
+        settings.SLOW_QUERY_LOG_PER_SECOND,
+        settings.SLOW_QUERY_LOG_FILE
+    )
+    slow_query_log.install(engine)
+    slow_query_log.install(async_engine.sync_engine)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Computed, Integer, String, Float, Date, DateTime, Boolean, Text, ForeignKey, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime
 import enum
 
 Base = declarative_base()
@@ -53,6 +54,11 @@ class User(Base):
     # Relationships
     orders = relationship("Order", back_populates="customer")
     reservations = relationship("Reservation", back_populates="customer")
+    
+    __table_args__ = (
+        # Sign-ups per period on the admin dashboard
+        Index("ix_users_created_at", "created_at"),
+    )
 
 class Category(Base):
     __tablename__ = "categories"
@@ -86,6 +92,11 @@ class MenuItem(Base):
     # Relationships
     category = relationship("Category", back_populates="menu_items")
     order_items = relationship("OrderItem", back_populates="menu_item")
+    
+    __table_args__ = (
+        # Menu pages by category, usually filtered to available items
+        Index("ix_menu_items_category_available", "category_id", "is_available"),
+    )
 
 class Order(Base):
     __tablename__ = "orders"
@@ -111,6 +122,15 @@ class Order(Base):
     customer = relationship("User", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order")
     payment = relationship("Payment", back_populates="order", uselist=False)
+    
+    __table_args__ = (
+        # A customer's orders newest first, the admin order list, and
+        # status / paid-revenue filters over a date range
+        Index("ix_orders_customer_created", "customer_id", "created_at"),
+        Index("ix_orders_created_at", "created_at"),
+        Index("ix_orders_status", "status"),
+        Index("ix_orders_payment_created", "payment_status", "created_at"),
+    )
 
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -126,23 +146,65 @@ class OrderItem(Base):
     # Relationships
     order = relationship("Order", back_populates="order_items")
     menu_item = relationship("MenuItem", back_populates="order_items")
+    
+    __table_args__ = (
+        # Loading the lines of a page of orders with one IN query
+        Index("ix_order_items_order_id", "order_id"),
+    )
+
+class Table(Base):
+    __tablename__ = "dining_tables"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(50), unique=True, nullable=False)
+    capacity = Column(Integer, nullable=False)
+    table_type = Column(String(50), nullable=True)  # window, booth, patio, etc.
+    is_active = Column(Boolean, default=True)
+    # Bumped by every booking; the UPDATE doubles as the row lock that
+    # serializes concurrent bookings of the same table
+    booking_version = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    reservations = relationship("Reservation", back_populates="table")
 
 class Reservation(Base):
     __tablename__ = "reservations"
     
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("users.id"))
+    table_id = Column(Integer, ForeignKey("dining_tables.id"), nullable=True)
     reservation_date = Column(DateTime(timezone=True), nullable=False)
+    # Seating window is [reservation_date, reservation_end)
+    duration_minutes = Column(Integer, nullable=False, default=90)
+    reservation_end = Column(DateTime(timezone=True), nullable=True)
     party_size = Column(Integer, nullable=False)
     status = Column(Enum(ReservationStatus), default=ReservationStatus.PENDING)
     table_number = Column(String(20), nullable=True)
     special_requests = Column(Text, nullable=True)
     occasion = Column(String(100), nullable=True)
+    # Set when the reminder is queued, so it is never queued twice
+    reminder_sent_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     customer = relationship("User", back_populates="reservations")
+    table = relationship("Table", back_populates="reservations")
+    
+    __table_args__ = (
+        # Range lookups for a day's seatings, and per-table overlap checks
+        Index("ix_reservations_date_end", "reservation_date", "reservation_end"),
+        Index("ix_reservations_table_date", "table_id", "reservation_date"),
+        # A customer's reservations, status filters and the admin recent list
+        Index("ix_reservations_customer_date", "customer_id", "reservation_date"),
+        Index("ix_reservations_status", "status"),
+        Index("ix_reservations_created_at", "created_at"),
+        # Keyset pages on (reservation_date, id); the id rides along in the index
+        Index("ix_reservations_reservation_date", "reservation_date"),
+        # The reminder dispatcher's range over reservations not yet reminded
+        Index("ix_reservations_reminder_date", "reminder_sent_at", "reservation_date"),
+    )
 
 class Payment(Base):
     __tablename__ = "payments"
@@ -154,11 +216,19 @@ class Payment(Base):
     currency = Column(String(10), default="ghs")
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
     payment_method = Column(String(50), nullable=True)  # card, cash, etc.
+    # `created` of the newest webhook event applied; older events that
+    # arrive late are not applied over it
+    last_event_created = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     order = relationship("Order", back_populates="payment")
+    
+    __table_args__ = (
+        Index("ix_payments_order_id", "order_id"),
+        Index("ix_payments_stripe_payment_intent_id", "stripe_payment_intent_id", unique=True),
+    )
 
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
@@ -171,10 +241,103 @@ class InventoryItem(Base):
     unit_cost = Column(Float, nullable=False)
     quantity_on_hand = Column(Integer, nullable=False, default=0)
     par_level = Column(Integer, nullable=False, default=0)
+    # Generated by the database; low stock is `stock_margin <= 0`, which unlike
+    # comparing the two columns can be answered from an index
+    stock_margin = Column(Integer, Computed("quantity_on_hand - par_level"), index=True)
     auto_reorder = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+class DailySales(Base):
+    """Per-day order totals, kept up to date by the order crud functions"""
+    __tablename__ = "daily_sales"
+    
+    day = Column(Date, primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)  # orders not cancelled
+    paid_order_count = Column(Integer, nullable=False, default=0)
+    paid_revenue = Column(Float, nullable=False, default=0)
+
+class DailyItemSales(Base):
+    """Per-day quantity ordered for each menu item (cancelled orders excluded)"""
+    __tablename__ = "daily_item_sales"
+    
+    day = Column(Date, primary_key=True)
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+
+class ItemSalesTotal(Base):
+    """All-time quantity ordered for each menu item (cancelled orders
+    excluded), moved by the same deltas as DailyItemSales"""
+    __tablename__ = "item_sales_totals"
+    
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        # Popular items are the top of this index
+        Index("ix_item_sales_totals_quantity", "quantity"),
+    )
+
+class NotificationChannel(str, enum.Enum):
+    EMAIL = "email"
+    SMS = "sms"
+
+class NotificationStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class Notification(Base):
+    """Outbox of emails and SMS, written in the same transaction as the
+    change they announce and delivered by the notification worker"""
+    __tablename__ = "notifications"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    channel = Column(Enum(NotificationChannel), nullable=False)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=True)
+    body = Column(Text, nullable=False)
+    html_body = Column(Text, nullable=True)
+    status = Column(Enum(NotificationStatus), nullable=False, default=NotificationStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    # UTC; also pushed forward while a worker holds the row (see claim_token)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Set by the worker that claimed the row, so a slow worker whose lease
+    # ran out cannot overwrite the outcome recorded by the next one
+    claim_token = Column(String(32), nullable=True)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # The worker's poll for due notifications
+        Index("ix_notifications_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+class PaymentEvent(Base):
+    """Stripe webhook events, stored on receipt and applied to payments and
+    orders in batches by the payment event processor"""
+    __tablename__ = "payment_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # Stripe's evt_... id; unique, so a redelivered event is stored once
+    event_id = Column(String(255), nullable=False, unique=True)
+    event_type = Column(String(100), nullable=False)
+    payment_intent_id = Column(String(255), nullable=False)
+    # From the intent's metadata, for an intent whose payment row is missing
+    order_id = Column(Integer, nullable=True)
+    amount = Column(Float, nullable=True)
+    currency = Column(String(10), nullable=True)
+    # Stripe's unix timestamp; orders the events of one intent
+    created = Column(Integer, nullable=False)
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        # The processor's poll for unprocessed events
+        Index("ix_payment_events_processed_at", "processed_at", "id"),
+    )
+
 class Settings(Base):
     __tablename__ = "settings"
     
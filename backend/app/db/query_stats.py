@@ -0,0 +1,66 @@
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryStats:
+    """Database work done on behalf of one request"""
+    __slots__ = ("queries", "db_seconds", "pool_wait_seconds", "rows")
+    
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        # Rows returned or changed, as the driver reports them: MySQL's
+        # buffered cursors count SELECT rows, SQLite only DML rows
+        self.rows = 0
+
+# Set per request by RequestMetricsMiddleware; None outside a request, in
+# which case the hooks below do nothing
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if query_stats.get() is not None:
+        context.query_stats_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = query_stats.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += time.perf_counter() - context.query_stats_start
+    if cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+def install(engine: Engine, observe_wait: Optional[Callable[[float], None]] = None) -> None:
+    """Count the current request's statements, DB time, rows and pool wait
+    on a (sync) engine; for an AsyncEngine pass its sync_engine.
+    
+    The pool has no event before a checkout, only after it, so the wait is
+    timed by wrapping the pool's own _do_get. Every wait, in a request or
+    not, is also passed to `observe_wait` when given. Install again after
+    engine.dispose(), which replaces the pool.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    
+    pool = engine.pool
+    do_get = pool._do_get
+    
+    def timed_do_get():
+        stats = query_stats.get()
+        if stats is None and observe_wait is None:
+            return do_get()
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            waited = time.perf_counter() - start
+            if stats is not None:
+                stats.pool_wait_seconds += waited
+            if observe_wait is not None:
+                observe_wait(waited)
+    
+    pool._do_get = timed_do_get
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, TextIO
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.request_context import current_route, request_scope
+
+MAX_STATEMENT_LENGTH = 2000
+
+def params_fingerprint(parameters) -> str:
+    """Short hash of a statement's parameters: repeated calls with the same
+    values can be told apart from different ones without logging the values"""
+    return hashlib.sha1(repr(parameters).encode()).hexdigest()[:16]
+
+class SlowQueryLog:
+    """Logs statements slower than `threshold_ms` as JSON lines.
+    
+    Timed with before/after_cursor_execute, so the duration is the driver
+    call alone. Each line has the statement, its duration, a fingerprint of
+    its parameters (never the values) and the route of the request that
+    ran it. Under load at most `max_per_second` lines are written; the
+    statements passed over are counted in the next line's `skipped`.
+    """
+    
+    def __init__(
+        self,
+        threshold_ms: float,
+        max_per_second: int = 20,
+        path: str = "",
+        stream: Optional[TextIO] = None
+    ):
+        self.threshold = threshold_ms / 1000
+        self.max_per_second = max_per_second
+        self.logger = logging.getLogger(f"app.slow_queries.{id(self)}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        if stream is not None:
+            handler = logging.StreamHandler(stream)
+        elif path:
+            handler = logging.FileHandler(path)
+        else:
+            handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger.addHandler(handler)
+        
+        self._lock = threading.Lock()
+        self._window = 0
+        self._written = 0
+        self._skipped = 0
+    
+    def install(self, engine: Engine) -> None:
+        """Time the statements of a (sync) engine; for an AsyncEngine pass its sync_engine"""
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+    
+    def remove(self, engine: Engine) -> None:
+        event.remove(engine, "before_cursor_execute", self._before)
+        event.remove(engine, "after_cursor_execute", self._after)
+    
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        # One execution context per statement, so its start time can ride on it
+        context.slow_query_start = time.perf_counter()
+    
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context.slow_query_start
+        if duration < self.threshold:
+            return
+        
+        skipped = self._admit()
+        if skipped is None:
+            return
+        scope = request_scope.get()
+        self.logger.info(json.dumps({
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "statement": re.sub(r"\s+", " ", statement).strip()[:MAX_STATEMENT_LENGTH],
+            "params_fingerprint": params_fingerprint(parameters),
+            "executemany": executemany,
+            "method": scope.get("method") if scope is not None else None,
+            "route": current_route(),
+            "skipped": skipped
+        }))
+    
+    def _admit(self) -> Optional[int]:
+        """Statements skipped since the last line, or None if this one is skipped too"""
+        with self._lock:
+            window = int(time.monotonic())
+            if window != self._window:
+                self._window = window
+                self._written = 0
+            if self._written >= self.max_per_second:
+                self._skipped += 1
+                return None
+            self._written += 1
+            skipped, self._skipped = self._skipped, 0
+            return skipped
@@ -1,16 +1,24 @@
-from fastapi import FastAPI, HTTPException
+import hmac
+
+from fastapi import FastAPI, Header, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 # from fastapi.staticfiles import StaticFiles
 import uvicorn
 import ssl
+import asyncio
 
 from app.core.config import settings
+from app.core.metrics import RequestMetricsMiddleware, mark_process_dead, render_metrics
+from app.core.request_context import RequestContextMiddleware
 from app.api.api_v1.api import api_router
-from app.db.database import engine
-from app.db import models
+from app.services.cache import cache
+from app.services.notifications import notification_worker
+from app.services.payment import payment_service
+from app.services.payment_events import payment_event_processor
+from app.services.reminders import reminder_scheduler
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic; run `alembic upgrade head` (or
+# init_db.py) before starting the server
 
 app = FastAPI(
     title="TastyBite Restaurant API",
@@ -27,9 +35,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request query count, DB time and pool wait (Server-Timing header and
+# histograms by route)
+app.add_middleware(RequestMetricsMiddleware)
+
+# Lets the SQL event hooks see which route a statement ran for
+app.add_middleware(RequestContextMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+async def start_cache_listener():
+    # Receives cache invalidations (e.g. deactivated users) from other workers
+    app.state.cache_listener = asyncio.create_task(cache.listen())
+
+@app.on_event("startup")
+async def start_notification_worker():
+    # Delivers the emails and SMS queued in the notifications outbox
+    app.state.notification_worker = asyncio.create_task(notification_worker.run())
+
+@app.on_event("startup")
+async def start_reminder_scheduler():
+    # Queues reminders for upcoming reservations
+    app.state.reminder_scheduler = None
+    if settings.REMINDER_INTERVAL_SECONDS > 0:
+        app.state.reminder_scheduler = asyncio.create_task(reminder_scheduler.run())
+
+@app.on_event("startup")
+async def start_payment_event_processor():
+    # Applies received Stripe webhook events to payments and orders
+    app.state.payment_event_processor = asyncio.create_task(payment_event_processor.run())
+
+@app.on_event("shutdown")
+async def stop_cache_listener():
+    app.state.cache_listener.cancel()
+
+@app.on_event("shutdown")
+async def stop_notification_worker():
+    app.state.notification_worker.cancel()
+
+@app.on_event("shutdown")
+async def stop_reminder_scheduler():
+    if app.state.reminder_scheduler is not None:
+        app.state.reminder_scheduler.cancel()
+
+@app.on_event("shutdown")
+async def stop_payment_event_processor():
+    app.state.payment_event_processor.cancel()
+
+@app.on_event("shutdown")
+async def close_payment_client():
+    await payment_service.aclose()
+
+@app.on_event("shutdown")
+async def remove_worker_metrics():
+    # With PROMETHEUS_MULTIPROC_DIR set, stop counting this worker's live gauges
+    mark_process_dead()
+
 # Static files - commented out since directory doesn't exist
 # app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -41,6 +104,20 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: str = Header("")):
+    """Prometheus metrics, for scrapers that send METRICS_TOKEN"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
 if __name__ == "__main__":
     # Create SSL context for HTTPS
     ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
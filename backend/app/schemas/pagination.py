@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    # Pass back as `cursor` for the next page; null on the last page
+    next_cursor: Optional[str] = None
+    # Approximate row count, only filled when requested with include_total
+    total: Optional[int] = None
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.db.models import PaymentStatus
+
+class PaymentIntentCreate(BaseModel):
+    order_id: int
+
+class PaymentIntent(BaseModel):
+    payment_intent_id: str
+    client_secret: str
+    status: str
+    amount: float
+    currency: str
+    publishable_key: str
+
+class Payment(BaseModel):
+    id: int
+    order_id: int
+    stripe_payment_intent_id: Optional[str] = None
+    amount: float
+    currency: str
+    status: PaymentStatus
+    payment_method: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
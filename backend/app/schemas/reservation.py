@@ -1,11 +1,14 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional
 from datetime import datetime
 from app.db.models import ReservationStatus
+from app.services.availability import MAX_SEATING_MINUTES
 
 class ReservationBase(BaseModel):
     reservation_date: datetime
     party_size: int
+    # Availability scans assume no seating runs longer than MAX_SEATING_MINUTES
+    duration_minutes: Optional[int] = Field(None, gt=0, le=MAX_SEATING_MINUTES)
     special_requests: Optional[str] = None
     occasion: Optional[str] = None
 
@@ -15,16 +18,27 @@ class ReservationCreate(ReservationBase):
 class ReservationUpdate(BaseModel):
     reservation_date: Optional[datetime] = None
     party_size: Optional[int] = None
+    duration_minutes: Optional[int] = Field(None, gt=0, le=MAX_SEATING_MINUTES)
     status: Optional[ReservationStatus] = None
     table_number: Optional[str] = None
     special_requests: Optional[str] = None
     occasion: Optional[str] = None
+    
+    @field_validator("reservation_date", "party_size", "duration_minutes", "status")
+    @classmethod
+    def not_null(cls, value):
+        # Omit these to leave them unchanged; the columns cannot be cleared
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
 
 class Reservation(ReservationBase):
     id: int
     customer_id: int
     status: ReservationStatus
+    table_id: Optional[int] = None
     table_number: Optional[str] = None
+    reservation_end: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
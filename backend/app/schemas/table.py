@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class TableBase(BaseModel):
+    name: str
+    capacity: int
+    table_type: Optional[str] = None
+
+class TableCreate(TableBase):
+    pass
+
+class TableUpdate(BaseModel):
+    name: Optional[str] = None
+    capacity: Optional[int] = None
+    table_type: Optional[str] = None
+    is_active: Optional[bool] = None
+
+class Table(TableBase):
+    id: int
+    is_active: bool
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,278 @@
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Reservation, ReservationStatus, Table
+
+# Upper bound on a single seating, so a day's reservations can be fetched with
+# a bounded range scan on reservation_date
+MAX_SEATING_MINUTES = 12 * 60
+
+# Number of dates kept in memory per worker
+MAX_CACHED_DAYS = 400
+
+# Reservation slots offered to guests, 17:00 to 22:00 every 30 minutes
+FIRST_SLOT_MINUTES = 17 * 60
+LAST_SLOT_MINUTES = 22 * 60
+SLOT_MINUTES = 30
+SERVICE_SLOTS = list(range(FIRST_SLOT_MINUTES, LAST_SLOT_MINUTES + 1, SLOT_MINUTES))
+
+@dataclass(frozen=True)
+class TableInfo:
+    id: int
+    name: str
+    capacity: int
+    table_type: Optional[str] = None
+
+def to_naive(value: datetime) -> datetime:
+    """Reservation times are wall-clock times; drop any tzinfo before comparing"""
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+def minutes_from(day: date, value: datetime) -> int:
+    """Minutes between midnight of `day` and `value` (negative for the previous day)"""
+    delta = to_naive(value) - datetime.combine(day, datetime.min.time())
+    return int(delta.total_seconds() // 60)
+
+def slot_label(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+class SlotGrid:
+    """Occupancy bitmap for the service slots of one day.
+    
+    Each table has an int bitmask with bit k set when a standard seating
+    starting at slot k would collide with a booking. Free-table counts per
+    slot are kept per capacity, so the counts for a party size are a sum over
+    the few distinct capacities rather than a scan of tables x reservations.
+    """
+    
+    def __init__(self, index: "DayIndex", slots: List[int], seating_minutes: int):
+        self.slots = slots
+        self.seating_minutes = seating_minutes
+        self.capacities = sorted({table.capacity for table in index.tables})
+        self.blocked: Dict[int, int] = {}
+        self._free_counts: Dict[int, List[int]] = {capacity: [0] * len(slots) for capacity in self.capacities}
+        # party_size -> per-slot counts; cleared whenever a table's bitmap changes
+        self._counts_by_party_size: Dict[int, List[int]] = {}
+        for table in index.tables:
+            self.update_table(index, table)
+    
+    def _blocked_mask(self, index: "DayIndex", table_id: int) -> int:
+        mask = 0
+        for bit, start in enumerate(self.slots):
+            if not index.is_free(table_id, start, start + self.seating_minutes):
+                mask |= 1 << bit
+        return mask
+    
+    def update_table(self, index: "DayIndex", table: TableInfo) -> None:
+        """Recompute one table's bitmap and apply the difference to the counts"""
+        new_mask = self._blocked_mask(index, table.id)
+        # A table seen for the first time counts as busy in every slot
+        old_mask = self.blocked.get(table.id, (1 << len(self.slots)) - 1)
+        self.blocked[table.id] = new_mask
+        
+        counts = self._free_counts[table.capacity]
+        changed = new_mask ^ old_mask
+        if changed:
+            self._counts_by_party_size.clear()
+        while changed:
+            bit = (changed & -changed).bit_length() - 1
+            counts[bit] += -1 if new_mask >> bit & 1 else 1
+            changed &= changed - 1
+    
+    def is_free(self, table_id: int, slot_position: int) -> bool:
+        return not self.blocked.get(table_id, ~0) >> slot_position & 1
+    
+    def available_counts(self, party_size: int) -> List[int]:
+        """Number of free tables seating `party_size` for every slot"""
+        counts = self._counts_by_party_size.get(party_size)
+        if counts is None:
+            fitting = [self._free_counts[capacity] for capacity in self.capacities[bisect_left(self.capacities, party_size):]]
+            counts = [sum(column) for column in zip(*fitting)] if fitting else [0] * len(self.slots)
+            self._counts_by_party_size[party_size] = counts
+        return counts
+
+class DayIndex:
+    """Seatings for a single date, indexed per table.
+    
+    Each table keeps its seatings as intervals [start, end) in minutes from
+    midnight, sorted by start, so an overlap check is a binary search instead
+    of a scan over every reservation.
+    """
+    
+    def __init__(self, day: date, tables: Iterable[TableInfo]):
+        self.day = day
+        # Smallest tables first so the best fit for a party is the first match
+        self.tables: List[TableInfo] = sorted(tables, key=lambda t: (t.capacity, t.id))
+        self._capacities = [t.capacity for t in self.tables]
+        self._starts: Dict[int, List[int]] = {t.id: [] for t in self.tables}
+        self._ends: Dict[int, List[int]] = {t.id: [] for t in self.tables}
+        self._tables_by_id = {t.id: t for t in self.tables}
+        self._max_span = 0
+        self._grid: Optional[SlotGrid] = None
+        self.loaded_at = time.monotonic()
+    
+    @property
+    def grid(self) -> SlotGrid:
+        """Slot occupancy bitmap, built on first use and then maintained by add/remove"""
+        if self._grid is None:
+            self._grid = SlotGrid(self, SERVICE_SLOTS, settings.DEFAULT_SEATING_MINUTES)
+        return self._grid
+    
+    def add(self, table_id: int, start: int, end: int) -> None:
+        if table_id not in self._starts:
+            return
+        starts = self._starts[table_id]
+        position = bisect_left(starts, start)
+        starts.insert(position, start)
+        self._ends[table_id].insert(position, end)
+        self._max_span = max(self._max_span, end - start)
+        if self._grid is not None:
+            self._grid.update_table(self, self._tables_by_id[table_id])
+    
+    def remove(self, table_id: int, start: int, end: int) -> None:
+        starts = self._starts.get(table_id, [])
+        ends = self._ends.get(table_id, [])
+        position = bisect_left(starts, start)
+        while position < len(starts) and starts[position] == start:
+            if ends[position] == end:
+                del starts[position]
+                del ends[position]
+                if self._grid is not None:
+                    self._grid.update_table(self, self._tables_by_id[table_id])
+                return
+            position += 1
+    
+    def is_free(self, table_id: int, start: int, end: int) -> bool:
+        """True when no seating on the table overlaps [start, end)"""
+        starts = self._starts.get(table_id)
+        if starts is None:
+            return False
+        ends = self._ends[table_id]
+        # Seatings starting before `end` are candidates; walk back only as far
+        # as the longest seating could reach
+        position = bisect_left(starts, end) - 1
+        while position >= 0 and starts[position] + self._max_span > start:
+            if ends[position] > start:
+                return False
+            position -= 1
+        return True
+    
+    def find_available_tables(self, start: int, end: int, party_size: int) -> List[TableInfo]:
+        """Tables seating at least `party_size` that are free for [start, end), smallest first"""
+        first = bisect_left(self._capacities, party_size)
+        return [table for table in self.tables[first:] if self.is_free(table.id, start, end)]
+
+class AvailabilityEngine:
+    """Per-worker cache of table availability, rebuilt from the database.
+    
+    The database is the source of truth. Days are loaded with one range query
+    per request (however many days it covers) and then kept in memory; writes in this worker update or drop the cached
+    day, and other workers' writes are picked up once the cached copy is older
+    than AVAILABILITY_CACHE_SECONDS.
+    """
+    
+    def __init__(self, max_age_seconds: Optional[int] = None):
+        self.max_age_seconds = (
+            settings.AVAILABILITY_CACHE_SECONDS if max_age_seconds is None else max_age_seconds
+        )
+        self._days: "OrderedDict[date, DayIndex]" = OrderedDict()
+        self._tables: Optional[List[TableInfo]] = None
+        self._tables_loaded_at = 0.0
+    
+    def _is_stale(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at > self.max_age_seconds
+    
+    async def get_tables(self, db: AsyncSession) -> List[TableInfo]:
+        if self._tables is None or self._is_stale(self._tables_loaded_at):
+            result = await db.execute(
+                select(Table.id, Table.name, Table.capacity, Table.table_type).filter(Table.is_active == True)
+            )
+            self._tables = [TableInfo(*row) for row in result.all()]
+            self._tables_loaded_at = time.monotonic()
+        return self._tables
+    
+    async def get_day(self, db: AsyncSession, day: date, refresh: bool = False) -> DayIndex:
+        return (await self.get_days(db, day, day, refresh=refresh))[0]
+    
+    async def get_days(self, db: AsyncSession, first_day: date, last_day: date, refresh: bool = False) -> List[DayIndex]:
+        """Indexes for every date in [first_day, last_day]; missing days are loaded with one query"""
+        days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+        missing = [
+            day for day in days
+            if refresh or day not in self._days or self._is_stale(self._days[day].loaded_at)
+        ]
+        if missing:
+            self._days.update(await self._load_days(db, missing[0], missing[-1]))
+        
+        indexes = []
+        for day in days:
+            self._days.move_to_end(day)
+            indexes.append(self._days[day])
+        while len(self._days) > MAX_CACHED_DAYS:
+            self._days.popitem(last=False)
+        return indexes
+    
+    async def _load_days(self, db: AsyncSession, first_day: date, last_day: date) -> Dict[date, DayIndex]:
+        tables = await self.get_tables(db)
+        range_start = datetime.combine(first_day, datetime.min.time())
+        range_end = datetime.combine(last_day, datetime.min.time()) + timedelta(days=1)
+        
+        # Bounded range on reservation_date; seatings from the previous
+        # evening that run past midnight are included
+        result = await db.execute(
+            select(Reservation.table_id, Reservation.reservation_date, Reservation.reservation_end).filter(
+                Reservation.reservation_date >= range_start - timedelta(minutes=MAX_SEATING_MINUTES),
+                Reservation.reservation_date < range_end,
+                Reservation.reservation_end > range_start,
+                Reservation.table_id.isnot(None),
+                Reservation.status != ReservationStatus.CANCELLED
+            )
+        )
+        
+        indexes = {
+            first_day + timedelta(days=offset): DayIndex(first_day + timedelta(days=offset), tables)
+            for offset in range((last_day - first_day).days + 1)
+        }
+        for table_id, starts_at, ends_at in result.all():
+            for day in self._days_spanned(starts_at, ends_at):
+                index = indexes.get(day)
+                if index is not None:
+                    index.add(table_id, minutes_from(day, starts_at), minutes_from(day, ends_at))
+        return indexes
+    
+    def _days_spanned(self, starts_at: datetime, ends_at: datetime) -> List[date]:
+        first = to_naive(starts_at).date()
+        last = (to_naive(ends_at) - timedelta(microseconds=1)).date()
+        return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+    
+    def record_booking(self, table_id: int, starts_at: datetime, ends_at: datetime) -> None:
+        """Add a committed booking to any cached day it touches"""
+        for day in self._days_spanned(starts_at, ends_at):
+            index = self._days.get(day)
+            if index is not None:
+                index.add(table_id, minutes_from(day, starts_at), minutes_from(day, ends_at))
+    
+    def record_release(self, table_id: int, starts_at: datetime, ends_at: datetime) -> None:
+        """Remove a cancelled, moved or deleted booking from any cached day it touches"""
+        for day in self._days_spanned(starts_at, ends_at):
+            index = self._days.get(day)
+            if index is not None:
+                index.remove(table_id, minutes_from(day, starts_at), minutes_from(day, ends_at))
+    
+    def invalidate(self, starts_at: Optional[datetime] = None, ends_at: Optional[datetime] = None) -> None:
+        """Drop cached days touched by a reservation window, or everything when no window is given"""
+        if starts_at is None:
+            self._days.clear()
+            self._tables = None
+            return
+        for day in self._days_spanned(starts_at, ends_at or starts_at + timedelta(minutes=1)):
+            self._days.pop(day, None)
+
+availability_engine = AvailabilityEngine()
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Called with each message published on a channel, or with None when
+# messages may have been missed and the subscriber should drop its state
+Subscriber = Callable[[Optional[str]], None]
+
+class MemoryCache:
+    """Per-worker key/value cache with a TTL per entry"""
+    
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._subscribers: Dict[str, List[Subscriber]] = defaultdict(list)
+    
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            return None
+        return value
+    
+    async def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+    
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+    
+    async def incr(self, key: str) -> int:
+        """Increment a counter that never expires and return its new value"""
+        value = (await self.get(key) or 0) + 1
+        self._entries[key] = (float("inf"), value)
+        return value
+    
+    async def clear(self) -> None:
+        self._entries.clear()
+    
+    def subscribe(self, channel: str, callback: Subscriber) -> None:
+        self._subscribers[channel].append(callback)
+    
+    async def publish(self, channel: str, message: str) -> None:
+        """Deliver a message to this worker's subscribers (there are no other workers to reach)"""
+        for callback in self._subscribers.get(channel, ()):
+            callback(message)
+    
+    async def listen(self) -> None:
+        """Nothing to do; publish() delivers directly"""
+
+class RedisCache:
+    """Cache shared by every worker; values are stored as JSON.
+    
+    Redis errors are treated as misses so the API keeps serving from the
+    database when Redis is unavailable.
+    """
+    
+    def __init__(self, url: str, prefix: str = "tastybite:"):
+        import redis.asyncio as redis
+        
+        self._redis = redis.from_url(url)
+        self._prefix = prefix
+        self._subscribers: Dict[str, List[Subscriber]] = defaultdict(list)
+    
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            value = await self._redis.get(self._prefix + key)
+        except Exception as e:
+            print(f"Cache read failed: {str(e)}")
+            return None
+        return None if value is None else json.loads(value)
+    
+    async def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        try:
+            await self._redis.set(self._prefix + key, json.dumps(value), ex=ttl_seconds)
+        except Exception as e:
+            print(f"Cache write failed: {str(e)}")
+    
+    async def delete(self, key: str) -> None:
+        try:
+            await self._redis.delete(self._prefix + key)
+        except Exception as e:
+            print(f"Cache invalidation failed: {str(e)}")
+    
+    async def incr(self, key: str) -> Optional[int]:
+        try:
+            return await self._redis.incr(self._prefix + key)
+        except Exception as e:
+            print(f"Cache invalidation failed: {str(e)}")
+            return None
+    
+    async def clear(self) -> None:
+        try:
+            keys = [key async for key in self._redis.scan_iter(match=self._prefix + "*")]
+            if keys:
+                await self._redis.delete(*keys)
+        except Exception as e:
+            print(f"Cache invalidation failed: {str(e)}")
+    
+    def subscribe(self, channel: str, callback: Subscriber) -> None:
+        """Register a callback; messages arrive once listen() is running"""
+        self._subscribers[channel].append(callback)
+    
+    async def publish(self, channel: str, message: str) -> None:
+        """Send a message to the subscribers in every worker, this one included"""
+        try:
+            await self._redis.publish(self._prefix + channel, message)
+        except Exception as e:
+            print(f"Cache publish failed: {str(e)}")
+    
+    def _deliver(self, channel: str, message: Optional[str]) -> None:
+        for callback in self._subscribers.get(channel, ()):
+            callback(message)
+    
+    async def listen(self) -> None:
+        """Deliver published messages to the subscribers until cancelled.
+        
+        Runs as a background task for the life of the worker. Pub/sub does
+        not queue messages for disconnected clients, so after every
+        (re)connect the subscribers are told to drop their state.
+        """
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(*(self._prefix + channel for channel in self._subscribers))
+                for channel in list(self._subscribers):
+                    self._deliver(channel, None)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        channel = message["channel"].decode()[len(self._prefix):]
+                        self._deliver(channel, message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache subscription failed: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+def create_cache():
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(settings.REDIS_URL)
+    return MemoryCache()
+
+cache = create_cache()
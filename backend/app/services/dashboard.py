@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from sqlalchemy import case, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Order, Reservation, User, OrderStatus, ReservationStatus
+from app.services.cache import cache
+
+DASHBOARD_CACHE_KEY = "admin:dashboard"
+
+ACTIVE_ORDER_STATUSES = [OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.PREPARING]
+
+def count_where(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+def sum_where(condition, value):
+    return func.sum(case((condition, value), else_=0))
+
+async def compute_dashboard_stats(db: AsyncSession) -> Dict[str, Any]:
+    """All dashboard counters in a single round trip"""
+    # Half-open timestamp ranges instead of DATE(column) so the created_at /
+    # reservation_date indexes can be used
+    today_start = datetime.combine(datetime.now().date(), datetime.min.time())
+    tomorrow_start = today_start + timedelta(days=1)
+    week_ago_start = today_start - timedelta(days=7)
+    
+    is_today = (Order.created_at >= today_start) & (Order.created_at < tomorrow_start)
+    is_paid = Order.payment_status == "paid"
+    orders = select(
+        func.count(Order.id).label("total"),
+        count_where(is_today).label("today"),
+        count_where(Order.status.in_(ACTIVE_ORDER_STATUSES)).label("pending"),
+        sum_where(is_paid, Order.total_amount).label("revenue_total"),
+        sum_where(is_paid & is_today, Order.total_amount).label("revenue_today")
+    ).subquery()
+    
+    reservations = select(
+        func.count(Reservation.id).label("total"),
+        count_where(
+            (Reservation.reservation_date >= today_start) & (Reservation.reservation_date < tomorrow_start)
+        ).label("today"),
+        count_where(Reservation.status == ReservationStatus.PENDING).label("pending")
+    ).subquery()
+    
+    users = select(
+        func.count(User.id).label("total"),
+        count_where(User.created_at >= week_ago_start).label("new_this_week")
+    ).subquery()
+    
+    # Each subquery yields exactly one row, so the cross join is one row too
+    result = await db.execute(
+        select(orders, reservations, users).select_from(
+            orders.join(reservations, true()).join(users, true())
+        )
+    )
+    (
+        total_orders, today_orders, pending_orders, total_revenue, today_revenue,
+        total_reservations, today_reservations, pending_reservations,
+        total_users, new_users_this_week
+    ) = result.one()
+    
+    return {
+        "orders": {
+            "total": total_orders,
+            "today": today_orders or 0,
+            "pending": pending_orders or 0
+        },
+        "revenue": {
+            "total": float(total_revenue or 0),
+            "today": float(today_revenue or 0)
+        },
+        "reservations": {
+            "total": total_reservations,
+            "today": today_reservations or 0,
+            "pending": pending_reservations or 0
+        },
+        "users": {
+            "total": total_users,
+            "new_this_week": new_users_this_week or 0
+        }
+    }
+
+async def get_dashboard_stats(db: AsyncSession) -> Dict[str, Any]:
+    """Dashboard counters, served from the cache for DASHBOARD_CACHE_SECONDS"""
+    stats = await cache.get(DASHBOARD_CACHE_KEY)
+    if stats is None:
+        stats = await compute_dashboard_stats(db)
+        await cache.set(DASHBOARD_CACHE_KEY, stats, settings.DASHBOARD_CACHE_SECONDS)
+    return stats
+
+async def invalidate_dashboard_stats() -> None:
+    """Called after order and reservation writes"""
+    await cache.delete(DASHBOARD_CACHE_KEY)
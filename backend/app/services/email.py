@@ -1,15 +1,202 @@
 import smtplib
+import threading
+import time
+from dataclasses import dataclass
+from email.message import Message
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from app.core.config import settings
 
+# (subject, plain text body, HTML body)
+EmailContent = Tuple[str, str, str]
+
+# Pooled sessions idle for longer than this are checked with a NOOP before reuse
+PROBE_AFTER_SECONDS = 5
+
+@dataclass(frozen=True)
+class OutgoingEmail:
+    to_emails: List[str]
+    subject: str
+    body: str
+    html_body: Optional[str] = None
+    from_email: Optional[str] = None
+
+class SMTPConnectionPool:
+    """Authenticated SMTP sessions kept open between sends.
+    
+    At most `max_connections` sessions exist at once; further senders wait
+    for one to be returned. A returned session is reused until it has been
+    idle for `idle_seconds` (servers drop idle clients), and is probed with
+    NOOP first if it sat unused for a while. A session that still turns out
+    to be dead is replaced and the message retried once.
+    """
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        max_connections: int = 2,
+        idle_seconds: float = 60,
+        timeout: float = 30
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.connects = 0
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connects += 1
+        return server
+    
+    @staticmethod
+    def _discard(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+    
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+    
+    def _checkout(self) -> Tuple[smtplib.SMTP, bool]:
+        """An open session, and whether it came from the pool"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, returned_at = self._idle.pop()
+            idle = time.monotonic() - returned_at
+            if idle < self.idle_seconds and (idle < PROBE_AFTER_SECONDS or self._is_alive(server)):
+                return server, True
+            self._discard(server)
+        return self._connect(), False
+    
+    def _checkin(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            self._idle.append((server, time.monotonic()))
+    
+    def send(self, messages: List[Message]) -> List[Optional[Exception]]:
+        """Send the messages one after another over a single session.
+        
+        Returns the error per message, None for those sent. Messages the
+        server refuses fail on their own; once the server cannot be reached
+        at all, the remaining messages fail with the same error.
+        """
+        errors: List[Optional[Exception]] = []
+        with self._slots:
+            server = None
+            reused = False
+            for message in messages:
+                error = None
+                for _ in range(2):
+                    if server is None:
+                        try:
+                            server, reused = self._checkout()
+                        except OSError as e:
+                            return errors + [e] * (len(messages) - len(errors))
+                    try:
+                        server.send_message(message)
+                        error = None
+                        break
+                    except OSError as e:
+                        error = e
+                        if isinstance(e, smtplib.SMTPException) and not isinstance(e, smtplib.SMTPServerDisconnected):
+                            # Refused by the server; the session is still usable
+                            break
+                        self._discard(server)
+                        server = None
+                        if not reused:
+                            break
+                errors.append(error)
+            if server is not None:
+                self._checkin(server)
+        return errors
+    
+    def close(self) -> None:
+        """Close the idle sessions"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._discard(server)
+
 class EmailService:
+    """Sends email over a pool of SMTP sessions owned by this instance, so
+    long-lived services (the notification worker) keep theirs open"""
+    
     def __init__(self):
         self.smtp_host = settings.SMTP_HOST
         self.smtp_port = settings.SMTP_PORT
         self.smtp_user = settings.SMTP_USER
         self.smtp_password = settings.SMTP_PASSWORD
+        self.from_email = settings.SMTP_FROM_EMAIL or settings.SMTP_USER
+        self.pool = SMTPConnectionPool(
+            self.smtp_host,
+            self.smtp_port,
+            self.smtp_user,
+            self.smtp_password,
+            use_tls=settings.SMTP_USE_TLS,
+            max_connections=settings.SMTP_POOL_SIZE,
+            idle_seconds=settings.SMTP_POOL_IDLE_SECONDS,
+            timeout=settings.SMTP_TIMEOUT_SECONDS
+        )
+    
+    def build_message(self, email: OutgoingEmail) -> MIMEMultipart:
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = email.subject
+        msg['From'] = email.from_email or self.from_email
+        msg['To'] = ', '.join(email.to_emails)
+        
+        # Add plain text part
+        text_part = MIMEText(email.body, 'plain')
+        msg.attach(text_part)
+        
+        # Add HTML part if provided
+        if email.html_body:
+            html_part = MIMEText(email.html_body, 'html')
+            msg.attach(html_part)
+        
+        return msg
+    
+    def deliver(
+        self,
+        to_emails: List[str],
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None,
+        from_email: Optional[str] = None
+    ) -> None:
+        """Send email to recipients, raising on failure"""
+        [error] = self.send_bulk([OutgoingEmail(to_emails, subject, body, html_body, from_email)])
+        if error is not None:
+            raise error
+    
+    def send_bulk(self, emails: List[OutgoingEmail]) -> List[Optional[Exception]]:
+        """Send many emails over one pooled session; returns the error per email, None if sent"""
+        return self.pool.send([self.build_message(email) for email in emails])
     
     def send_email(
         self,
@@ -21,33 +208,15 @@ class EmailService:
     ) -> bool:
         """Send email to recipients"""
         try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = from_email or self.smtp_user
-            msg['To'] = ', '.join(to_emails)
-            
-            # Add plain text part
-            text_part = MIMEText(body, 'plain')
-            msg.attach(text_part)
-            
-            # Add HTML part if provided
-            if html_body:
-                html_part = MIMEText(html_body, 'html')
-                msg.attach(html_part)
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
-            
+            self.deliver(to_emails, subject, body, html_body, from_email)
             return True
         except Exception as e:
             print(f"Email sending failed: {str(e)}")
             return False
     
-    def send_order_confirmation(self, to_email: str, order_number: str, total_amount: float) -> bool:
-        """Send order confirmation email"""
+    @staticmethod
+    def order_confirmation(order_number: str, total_amount: float) -> EmailContent:
+        """Order confirmation email content"""
         subject = f"Order Confirmation - {order_number}"
         body = f"""
         Dear Customer,
@@ -75,10 +244,11 @@ class EmailService:
         </html>
         """
         
-        return self.send_email([to_email], subject, body, html_body)
+        return subject, body, html_body
     
-    def send_reservation_confirmation(self, to_email: str, reservation_date: str, party_size: int) -> bool:
-        """Send reservation confirmation email"""
+    @staticmethod
+    def reservation_confirmation(reservation_date: str, party_size: int) -> EmailContent:
+        """Reservation confirmation email content"""
         subject = "Reservation Confirmation - TastyBite"
         body = f"""
         Dear Customer,
@@ -108,4 +278,46 @@ class EmailService:
         </html>
         """
         
-        return self.send_email([to_email], subject, body, html_body)
\ No newline at end of file
+        return subject, body, html_body
+    
+    @staticmethod
+    def reservation_reminder(reservation_date: str, party_size: int) -> EmailContent:
+        """Reservation reminder email content"""
+        subject = "Reservation Reminder - TastyBite"
+        body = f"""
+        Dear Customer,
+        
+        This is a reminder of your reservation today.
+        
+        Date & Time: {reservation_date}
+        Party Size: {party_size} people
+        
+        If your plans have changed, please let us know.
+        
+        Best regards,
+        TastyBite Restaurant
+        """
+        
+        html_body = f"""
+        <html>
+        <body>
+            <h2>Reservation Reminder</h2>
+            <p>Dear Customer,</p>
+            <p>This is a reminder of your reservation today.</p>
+            <p><strong>Date & Time:</strong> {reservation_date}</p>
+            <p><strong>Party Size:</strong> {party_size} people</p>
+            <p>If your plans have changed, please let us know.</p>
+            <p>Best regards,<br>TastyBite Restaurant</p>
+        </body>
+        </html>
+        """
+        
+        return subject, body, html_body
+    
+    def send_order_confirmation(self, to_email: str, order_number: str, total_amount: float) -> bool:
+        """Send order confirmation email"""
+        return self.send_email([to_email], *self.order_confirmation(order_number, total_amount))
+    
+    def send_reservation_confirmation(self, to_email: str, reservation_date: str, party_size: int) -> bool:
+        """Send reservation confirmation email"""
+        return self.send_email([to_email], *self.reservation_confirmation(reservation_date, party_size))
\ No newline at end of file
@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional; responses fall back to gzip
+    brotli = None
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.core.config import settings
+from app.db.models import Category, MenuItem
+from app.schemas.menu import Category as CategorySchema, MenuItem as MenuItemSchema
+from app.services.cache import cache
+from app.services.menu_search import MenuSearchIndex
+
+MENU_REVISION_KEY = "menu:revision"
+
+# Quality 11 is several times slower than 9 for a few percent smaller output,
+# which adds up when every menu write re-renders each category slice
+BROTLI_QUALITY = 9
+
+# Distinct query-string variants kept encoded per section; others are encoded per request
+MAX_CACHED_BODIES = 64
+
+@dataclass(frozen=True)
+class RenderedBody:
+    """One JSON response body in every content encoding the API serves"""
+    identity: bytes
+    gzip: bytes
+    br: Optional[bytes]
+    etag: str
+    
+    @classmethod
+    def render(cls, rows: List[Dict[str, Any]]) -> "RenderedBody":
+        body = json.dumps(rows, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        return cls(
+            identity=body,
+            # mtime=0 keeps the bytes (and so the ETag) identical across workers
+            gzip=gzip.compress(body, compresslevel=9, mtime=0),
+            br=brotli.compress(body, quality=BROTLI_QUALITY) if brotli is not None else None,
+            etag=hashlib.sha1(body).hexdigest()[:20]
+        )
+    
+    def encoded(self, accept_encoding: str) -> Tuple[bytes, Optional[str], str]:
+        """(body, Content-Encoding, ETag) for the client's Accept-Encoding"""
+        accepted = {
+            token.split(";")[0].strip().lower()
+            for token in accept_encoding.split(",")
+            if not token.strip().replace(" ", "").endswith("q=0")
+        }
+        if self.br is not None and "br" in accepted:
+            return self.br, "br", f'"{self.etag}-br"'
+        if "gzip" in accepted:
+            return self.gzip, "gzip", f'"{self.etag}-gz"'
+        return self.identity, None, f'"{self.etag}"'
+    
+    def matches(self, if_none_match: str) -> bool:
+        """True when If-None-Match names this body in any encoding"""
+        for tag in if_none_match.split(","):
+            tag = tag.strip().removeprefix("W/").strip('"')
+            if tag == "*" or tag.split("-")[0] == self.etag:
+                return True
+        return False
+
+class CatalogSection:
+    """Serialized rows of one part of the menu, stamped with the revision they were built at"""
+    
+    def __init__(self, revision: int, rows: List[Dict[str, Any]]):
+        self.revision = revision
+        self.rows = rows
+        self.built_at = time.monotonic()
+        # Rendered response bodies per query
+        self._bodies: Dict[Tuple, RenderedBody] = {}
+    
+    def body(self, key: Tuple, select_rows: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]) -> RenderedBody:
+        """Rendered body for the rows picked by `select_rows`, cached under `key`"""
+        rendered = self._bodies.get(key)
+        if rendered is None:
+            rendered = RenderedBody.render(select_rows(self.rows))
+            if len(self._bodies) < MAX_CACHED_BODIES:
+                self._bodies[key] = rendered
+        return rendered
+
+def menu_items_query(
+    skip: int = 0,
+    limit: int = 100,
+    category_id: Optional[int] = None,
+    available_only: bool = True
+) -> Tuple[Tuple, Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]]:
+    """Cache key and row filter for a GET /menu/items query"""
+    def select_rows(rows):
+        selected = [
+            row for row in rows
+            if (not category_id or row["category_id"] == category_id)
+            and (not available_only or row["is_available"])
+        ]
+        # Paging applies to the full list only
+        return selected if category_id else selected[skip:skip + limit]
+    
+    # Category slices ignore skip/limit, so they share one key
+    key = (None, None, category_id, available_only) if category_id else (skip, limit, None, available_only)
+    return key, select_rows
+
+def categories_query(skip: int = 0, limit: int = 100):
+    """Cache key and row filter for a GET /menu/categories query"""
+    return (skip, limit), lambda rows: rows[skip:skip + limit]
+
+class MenuCatalog:
+    """Per-worker serialized copy of the public menu.
+    
+    The menu crud functions bump a revision counter in the shared cache
+    (Redis when CACHE_BACKEND=redis, so every worker sees it). A worker
+    rebuilds a section when the counter moved past the revision it was
+    built at, or after MENU_CACHE_SECONDS as a safety net if Redis writes
+    were lost. The search index follows the item rows, reindexing only the
+    items that changed.
+    """
+    
+    def __init__(self):
+        self._items: Optional[CatalogSection] = None
+        self._categories: Optional[CatalogSection] = None
+        self.search_index = MenuSearchIndex()
+    
+    async def revision(self) -> int:
+        return await cache.get(MENU_REVISION_KEY) or 0
+    
+    def _is_current(self, section: Optional[CatalogSection], revision: int) -> bool:
+        return (
+            section is not None
+            and section.revision == revision
+            and time.monotonic() - section.built_at < settings.MENU_CACHE_SECONDS
+        )
+    
+    async def items(self, db: AsyncSession) -> CatalogSection:
+        """Every menu item (available or not) with its category, ordered by id"""
+        revision = await self.revision()
+        if not self._is_current(self._items, revision):
+            await self._build_items(db, revision)
+        return self._items
+    
+    async def search(self, db: AsyncSession, query: str, limit: int = 20, available_only: bool = True) -> List[Dict[str, Any]]:
+        """Ranked item rows matching `query` (see MenuSearchIndex.search)"""
+        await self.items(db)
+        return self.search_index.search(query, limit=limit, available_only=available_only)
+    
+    async def categories(self, db: AsyncSession) -> CatalogSection:
+        """Active categories ordered by id"""
+        revision = await self.revision()
+        if not self._is_current(self._categories, revision):
+            await self._build_categories(db, revision)
+        return self._categories
+    
+    async def _build_items(self, db: AsyncSession, revision: int) -> None:
+        result = await db.execute(
+            select(MenuItem).options(joinedload(MenuItem.category)).order_by(MenuItem.id)
+        )
+        rows = [MenuItemSchema.model_validate(item).model_dump(mode="json") for item in result.scalars()]
+        section = CatalogSection(revision, rows)
+        self.search_index.sync(rows)
+        
+        # Pre-render what the storefront asks for: the default full menu and
+        # each category's slice
+        section.body(*menu_items_query())
+        for category_id in sorted({row["category_id"] for row in rows}):
+            section.body(*menu_items_query(category_id=category_id))
+        self._items = section
+    
+    async def _build_categories(self, db: AsyncSession, revision: int) -> None:
+        result = await db.execute(
+            select(Category).filter(Category.is_active == True).order_by(Category.id)
+        )
+        rows = [CategorySchema.model_validate(category).model_dump(mode="json") for category in result.scalars()]
+        section = CatalogSection(revision, rows)
+        section.body(*categories_query())
+        self._categories = section
+    
+    async def invalidate(self, db: Optional[AsyncSession] = None) -> None:
+        """Called by the menu crud functions after every committed write.
+        
+        With a session, the new snapshot is rendered right away so the write
+        pays for it instead of the next reader in this worker.
+        """
+        self._items = None
+        self._categories = None
+        revision = await cache.incr(MENU_REVISION_KEY)
+        if db is not None and revision is not None:
+            await self._build_items(db, revision)
+            await self._build_categories(db, revision)
+
+menu_catalog = MenuCatalog()
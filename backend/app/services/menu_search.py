@@ -0,0 +1,268 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from itertools import product
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+# Weight of a match by the field it was found in
+NAME_WEIGHT = 3
+CATEGORY_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+# Weight of a match by how the query token matched the indexed term
+EXACT_MATCH = 3
+PREFIX_MATCH = 2
+FUZZY_MATCH = 1
+
+# Shorter query tokens only match exactly or as a prefix
+MIN_FUZZY_LENGTH = 4
+MIN_PREFIX_LENGTH = 2
+# Bound on the terms a short prefix expands to
+MAX_PREFIX_TERMS = 100
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens with accents folded (crème -> creme)"""
+    if not text:
+        return []
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return TOKEN_PATTERN.findall(folded.lower())
+
+def deletes(term: str) -> Set[str]:
+    """The term with each single character removed"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Damerau-Levenshtein distance <= 1 (one insert, delete, substitution or transposition)"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return (
+            a[i + 1:] == b[i + 1:]
+            or (i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:])
+        )
+    return a[i:] == b[i + 1:]
+
+class MenuSearchIndex:
+    """Inverted index over menu item names, descriptions and category names.
+    
+    Each term keeps its items grouped by the weight of the best field it
+    appears in, each group sorted in tie-break order (featured first, then
+    name), so a one-word query reads only the first `limit` items of its
+    best groups. Longer queries intersect the groups as sets. Prefix lookups
+    bisect a sorted vocabulary and typo tolerance uses a single-deletion
+    index (SymSpell), so no query scans the whole catalog.
+    """
+    
+    def __init__(self):
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._terms: Dict[int, Set[str]] = {}
+        # Tie-break key per item: featured first, then name, then id
+        self._static: Dict[int, Tuple[bool, str, int]] = {}
+        # term -> {item_id: field weight}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # term -> field weight -> item ids in tie-break order, and as a set
+        self._ranked: Dict[str, Dict[int, List[int]]] = {}
+        self._weighted: Dict[str, Dict[int, Set[int]]] = {}
+        self._unavailable: Set[int] = set()
+        self._deletes: Dict[str, Set[str]] = defaultdict(set)
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def sync(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Bring the index in line with the catalog rows, reindexing only rows that changed"""
+        seen = set()
+        for row in rows:
+            seen.add(row["id"])
+            if self._rows.get(row["id"]) != row:
+                self.upsert(row)
+        for item_id in [item_id for item_id in self._rows if item_id not in seen]:
+            self.remove(item_id)
+    
+    def upsert(self, row: Dict[str, Any]) -> None:
+        item_id = row["id"]
+        self.remove(item_id)
+        
+        weights: Dict[str, int] = {}
+        category = row.get("category") or {}
+        for text, weight in (
+            (row.get("name"), NAME_WEIGHT),
+            (category.get("name"), CATEGORY_WEIGHT),
+            (row.get("description"), DESCRIPTION_WEIGHT),
+        ):
+            for term in tokenize(text):
+                weights[term] = max(weights.get(term, 0), weight)
+        
+        static = (not row.get("is_featured"), (row.get("name") or "").lower(), item_id)
+        self._static[item_id] = static
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._ranked[term] = {}
+                self._weighted[term] = {}
+                self._add_term(term)
+            postings[item_id] = weight
+            insort(self._ranked[term].setdefault(weight, []), item_id, key=self._static.__getitem__)
+            self._weighted[term].setdefault(weight, set()).add(item_id)
+        if not row.get("is_available"):
+            self._unavailable.add(item_id)
+        self._rows[item_id] = row
+        self._terms[item_id] = set(weights)
+    
+    def remove(self, item_id: int) -> None:
+        if self._rows.pop(item_id, None) is None:
+            return
+        static = self._static[item_id]
+        for term in self._terms.pop(item_id):
+            postings = self._postings[term]
+            weight = postings.pop(item_id)
+            ranked = self._ranked[term][weight]
+            del ranked[bisect_left(ranked, static, key=self._static.__getitem__)]
+            self._weighted[term][weight].discard(item_id)
+            if not ranked:
+                del self._ranked[term][weight]
+                del self._weighted[term][weight]
+            if not postings:
+                del self._postings[term]
+                del self._ranked[term]
+                del self._weighted[term]
+                self._remove_term(term)
+        del self._static[item_id]
+        self._unavailable.discard(item_id)
+    
+    def _add_term(self, term: str) -> None:
+        self._vocabulary_dirty = True
+        if len(term) >= MIN_FUZZY_LENGTH:
+            for variant in deletes(term):
+                self._deletes[variant].add(term)
+    
+    def _remove_term(self, term: str) -> None:
+        self._vocabulary_dirty = True
+        if len(term) >= MIN_FUZZY_LENGTH:
+            for variant in deletes(term):
+                terms = self._deletes[variant]
+                terms.discard(term)
+                if not terms:
+                    del self._deletes[variant]
+    
+    def _matching_terms(self, token: str) -> Dict[str, int]:
+        """Indexed terms matching a query token, with the match quality of each"""
+        matches: Dict[str, int] = {}
+        
+        # Any token may be the start of a longer word; the last one usually
+        # is, since it is still being typed
+        if len(token) >= MIN_PREFIX_LENGTH:
+            if self._vocabulary_dirty:
+                self._vocabulary = sorted(self._postings)
+                self._vocabulary_dirty = False
+            position = bisect_left(self._vocabulary, token)
+            for term in self._vocabulary[position:position + MAX_PREFIX_TERMS]:
+                if not term.startswith(token):
+                    break
+                matches[term] = PREFIX_MATCH
+        
+        if len(token) >= MIN_FUZZY_LENGTH:
+            candidates = set(self._deletes.get(token, ()))
+            for variant in deletes(token):
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates.update(self._deletes.get(variant, ()))
+            for term in candidates:
+                if term not in matches and within_one_edit(token, term):
+                    matches[term] = FUZZY_MATCH
+        
+        if token in self._postings:
+            matches[token] = EXACT_MATCH
+        return matches
+    
+    def search(self, query: str, limit: int = 20, available_only: bool = True) -> List[Dict[str, Any]]:
+        """Catalog rows matching every query token, best matches first"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        token_matches = [self._matching_terms(token) for token in tokens]
+        if not all(token_matches):
+            return []
+        
+        if len(token_matches) > 1:
+            return self._search_all(token_matches, limit, available_only)
+        
+        # One token: walk its items from the highest score it can give down;
+        # within a score they come in tie-break order, so the first `limit`
+        # new items seen are the answer
+        levels: Dict[int, List[List[int]]] = defaultdict(list)
+        for term, quality in token_matches[0].items():
+            for weight, ranked in self._ranked[term].items():
+                levels[quality * weight].append(ranked)
+        
+        results: List[Dict[str, Any]] = []
+        seen: Set[int] = set()
+        for level in sorted(levels, reverse=True):
+            for item_id in heapq.merge(*levels[level], key=self._static.__getitem__):
+                if item_id in seen:
+                    continue
+                seen.add(item_id)
+                row = self._rows[item_id]
+                if available_only and not row["is_available"]:
+                    continue
+                results.append(row)
+                if len(results) == limit:
+                    return results
+        return results
+    
+    def _search_all(self, token_matches: List[Dict[str, int]], limit: int, available_only: bool) -> List[Dict[str, Any]]:
+        """Several tokens: group the items matching all of them by score with set operations"""
+        # Items matching every token, intersected smallest first
+        token_matches.sort(key=lambda matches: sum(len(self._postings[term]) for term in matches))
+        candidates = set().union(*(self._postings[term].keys() for term in token_matches[0]))
+        for matches in token_matches[1:]:
+            candidates = set().union(*(self._postings[term].keys() & candidates for term in matches))
+        if available_only:
+            candidates -= self._unavailable
+        if not candidates:
+            return []
+        
+        # Per token, the candidates split by the best score the token gives them
+        token_levels = []
+        for matches in token_matches:
+            by_score: Dict[int, List[Set[int]]] = defaultdict(list)
+            for term, quality in matches.items():
+                for weight, items in self._weighted[term].items():
+                    by_score[quality * weight].append(items)
+            remaining = set(candidates)
+            levels = []
+            for level in sorted(by_score, reverse=True):
+                items = set().union(*(remaining & items for items in by_score[level]))
+                if items:
+                    remaining -= items
+                    levels.append((level, items))
+            token_levels.append(levels)
+        
+        # Group the candidates by total score across the tokens
+        by_total: Dict[int, Set[int]] = defaultdict(set)
+        for combination in product(*token_levels):
+            items = set.intersection(*(items for _, items in combination))
+            if items:
+                by_total[sum(level for level, _ in combination)].update(items)
+        
+        results: List[Dict[str, Any]] = []
+        for total in sorted(by_total, reverse=True):
+            for item_id in heapq.nsmallest(limit - len(results), by_total[total], key=self._static.__getitem__):
+                results.append(self._rows[item_id])
+            if len(results) == limit:
+                break
+        return results
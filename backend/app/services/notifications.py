@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import QUEUE_DEPTH
+from app.crud.notification import (
+    claim_notifications, count_pending_notifications, email_values, queue_email, queue_sms, record_deliveries,
+    sms_values
+)
+from app.db.database import AsyncSessionLocal
+from app.db.models import Notification, NotificationChannel, Order, Reservation, User
+from app.services.email import EmailService, OutgoingEmail
+from app.services.sms import SMSService
+
+# How long a claimed batch is hidden from other workers. Longer than a batch
+# takes to send; if one ever overruns it, its rows may be sent twice rather
+# than not at all.
+CLAIM_LEASE = timedelta(minutes=10)
+
+def queue_reservation_confirmation(db: AsyncSession, reservation: Reservation, user: User) -> None:
+    """Queue the confirmation email (and SMS, with a phone number) for a flushed reservation"""
+    queue_email(db, user.email, *EmailService.reservation_confirmation(
+        reservation.reservation_date.strftime("%B %d, %Y at %I:%M %p"),
+        reservation.party_size
+    ))
+    if user.phone:
+        queue_sms(db, user.phone, SMSService.reservation_confirmation(
+            f"RES-{reservation.id:06d}",
+            reservation.reservation_date.strftime("%m/%d at %I:%M %p")
+        ))
+
+def reservation_reminder(
+    reservation_id: int,
+    reservation_date: datetime,
+    party_size: int,
+    email: str,
+    phone: Optional[str]
+) -> List[Dict[str, Any]]:
+    """Outbox rows for a reservation's reminder email (and SMS, with a phone number), for queue_many"""
+    values = [email_values(email, *EmailService.reservation_reminder(
+        reservation_date.strftime("%B %d, %Y at %I:%M %p"),
+        party_size
+    ))]
+    if phone:
+        values.append(sms_values(phone, SMSService.reservation_reminder(
+            f"RES-{reservation_id:06d}",
+            reservation_date.strftime("%I:%M %p")
+        )))
+    return values
+
+def queue_order_confirmation(db: AsyncSession, order: Order, user: User) -> None:
+    """Queue the confirmation email for a new order"""
+    queue_email(db, user.email, *EmailService.order_confirmation(order.order_number, order.total_amount))
+
+class NotificationWorker:
+    """Delivers the notifications outbox in the background.
+    
+    Runs as a task in every API worker process. Each round claims a batch of
+    due notifications, sends it on a thread (smtplib blocks) and records
+    every outcome with one commit. Requests that queue notifications call
+    wake() after committing, so delivery starts right away instead of at
+    the next poll. After each round it publishes the outbox backlog to the
+    queue_depth gauge.
+    """
+    
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        batch_size: int = settings.NOTIFICATION_BATCH_SIZE,
+        poll_seconds: float = settings.NOTIFICATION_POLL_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.email_service = EmailService()
+        self.sms_service = SMSService()
+        self._wake: Optional[asyncio.Event] = None
+    
+    def wake(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+    
+    async def drain_once(self) -> int:
+        """Deliver one batch of due notifications and return its size"""
+        async with self.session_factory() as db:
+            batch = await claim_notifications(db, self.batch_size, CLAIM_LEASE)
+            if not batch:
+                return 0
+            errors = await asyncio.to_thread(self._send, batch)
+            await record_deliveries(db, batch, errors)
+        return len(batch)
+    
+    async def report_depth(self) -> None:
+        async with self.session_factory() as db:
+            QUEUE_DEPTH.labels("notifications").set(await count_pending_notifications(db))
+    
+    def _send(self, batch: List[Notification]) -> Dict[int, str]:
+        """Send the batch, returning the error per failed id"""
+        errors = {}
+        emails = [n for n in batch if n.channel == NotificationChannel.EMAIL]
+        if emails:
+            # One pooled SMTP session for the whole batch
+            results = self.email_service.send_bulk([
+                OutgoingEmail([n.recipient], n.subject, n.body, n.html_body) for n in emails
+            ])
+            for notification, error in zip(emails, results):
+                if error is not None:
+                    errors[notification.id] = str(error) or type(error).__name__
+        
+        for notification in batch:
+            if notification.channel == NotificationChannel.SMS:
+                if not self.sms_service.send_sms(notification.recipient, notification.body):
+                    errors[notification.id] = "SMS sending failed"
+        return errors
+    
+    async def run(self) -> None:
+        """Deliver notifications until cancelled"""
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                delivered = await self.drain_once()
+                await self.report_depth()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Notification delivery failed: {str(e)}")
+                delivered = 0
+            
+            # A full batch suggests more are due; otherwise wait for a wake-up
+            # or the next poll (retries become due without anyone waking us)
+            if delivered < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+notification_worker = NotificationWorker()
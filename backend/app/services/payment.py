@@ -1,58 +1,222 @@
-import stripe
-from typing import Optional
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from urllib.parse import urlencode
+
+import httpx
+
 from app.core.config import settings
 
-# Configure Stripe
-stripe.api_key = settings.STRIPE_SECRET_KEY
+# Responses worth retrying: rate limited, or Stripe having a bad moment
+RETRY_STATUS_CODES = {409, 429, 500, 502, 503, 504}
+
+class PaymentError(Exception):
+    """A Stripe request that failed; status_code is None when Stripe was not reached"""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def to_minor_units(amount: float) -> int:
+    """Amount in pesewas/cents, as Stripe expects; rounded, since 36.58 * 100 is 3657.99..."""
+    return int(round(amount * 100))
+
+def form_encode(params: Dict[str, Any], prefix: str = "") -> List[Tuple[str, str]]:
+    """Stripe's form encoding, with nested dicts as key[sub]=value"""
+    fields = []
+    for key, value in params.items():
+        name = f"{prefix}[{key}]" if prefix else key
+        if isinstance(value, dict):
+            fields.extend(form_encode(value, name))
+        elif isinstance(value, bool):
+            fields.append((name, "true" if value else "false"))
+        elif value is not None:
+            fields.append((name, str(value)))
+    return fields
+
+def webhook_signature(payload: bytes, secret: str, timestamp: int) -> str:
+    """Stripe-Signature header value for a payload, as Stripe signs webhooks"""
+    signed = f"{timestamp}.".encode() + payload
+    digest = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+def verify_webhook(
+    payload: bytes,
+    signature_header: str,
+    secret: str,
+    tolerance: int,
+    now: Optional[float] = None
+) -> Dict[str, Any]:
+    """The event in a webhook request, once its signature checks out.
+    
+    Raises PaymentError (status 400) for an unsigned, forged or stale
+    request. Any of the header's v1 signatures may match, since Stripe
+    signs with both secrets while one is being rolled.
+    """
+    if not secret:
+        raise PaymentError("Webhook secret is not configured", 400)
+    parts = [part.split("=", 1) for part in signature_header.split(",") if "=" in part]
+    timestamps = [value for key, value in parts if key == "t"]
+    signatures = [value for key, value in parts if key == "v1"]
+    if not timestamps or not timestamps[0].isdigit() or not signatures:
+        raise PaymentError("Malformed Stripe-Signature header", 400)
+    
+    timestamp = int(timestamps[0])
+    expected = webhook_signature(payload, secret, timestamp).split("v1=", 1)[1]
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise PaymentError("Webhook signature does not match", 400)
+    if abs((now or time.time()) - timestamp) > tolerance:
+        raise PaymentError("Webhook timestamp is outside the tolerance", 400)
+    try:
+        return json.loads(payload)
+    except ValueError:
+        raise PaymentError("Webhook payload is not JSON", 400)
 
 class PaymentService:
-    @staticmethod
-    def create_payment_intent(amount: float, currency: str = "ghs", metadata: dict = None) -> dict:
-        """Create a Stripe payment intent"""
-        try:
-            intent = stripe.PaymentIntent.create(
-                amount=int(amount * 100),  # Stripe expects amount in cents
-                currency=currency.lower(),
-                metadata=metadata or {},
-                automatic_payment_methods={
-                    'enabled': True,
-                },
+    """Async client for the Stripe API.
+    
+    Requests go over a pooled keep-alive HTTP client, so a payment costs
+    one round trip instead of a new TLS handshake. Connection failures,
+    429s and 5xx responses are retried with exponential backoff; every POST
+    carries an Idempotency-Key, so a retried request cannot charge or
+    refund twice. `transport` lets tests route requests to a local fake.
+    """
+    
+    def __init__(
+        self,
+        api_key: str = settings.STRIPE_SECRET_KEY,
+        base_url: str = settings.STRIPE_API_BASE,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_retries: int = settings.STRIPE_MAX_RETRIES,
+        retry_delay: float = 0.5
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.transport = transport
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._http: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def _client(self) -> httpx.AsyncClient:
+        # Pooled connections belong to the event loop that opened them; a
+        # client left over from another loop is closed before replacing it
+        loop = asyncio.get_running_loop()
+        if self._http is not None and self._loop is not loop:
+            await self.aclose()
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=(self.api_key, ""),
+                timeout=httpx.Timeout(settings.STRIPE_TIMEOUT_SECONDS, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=settings.STRIPE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.STRIPE_MAX_CONNECTIONS,
+                    keepalive_expiry=30
+                ),
+                transport=self.transport
             )
-            return {
-                "client_secret": intent.client_secret,
-                "payment_intent_id": intent.id,
-                "status": intent.status
-            }
-        except stripe.error.StripeError as e:
-            raise Exception(f"Payment error: {str(e)}")
-    
-    @staticmethod
-    def confirm_payment(payment_intent_id: str) -> dict:
-        """Confirm a payment intent"""
-        try:
-            intent = stripe.PaymentIntent.retrieve(payment_intent_id)
-            return {
-                "payment_intent_id": intent.id,
-                "status": intent.status,
-                "amount": intent.amount / 100,  # Convert back from cents
-                "currency": intent.currency
-            }
-        except stripe.error.StripeError as e:
-            raise Exception(f"Payment confirmation error: {str(e)}")
-    
-    @staticmethod
-    def refund_payment(payment_intent_id: str, amount: Optional[float] = None) -> dict:
+            self._loop = loop
+        return self._http
+    
+    async def aclose(self) -> None:
+        if self._http is not None:
+            http, self._http = self._http, None
+            try:
+                await http.aclose()
+            except RuntimeError:
+                # Its loop is gone, and its sockets with it
+                pass
+    
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        headers = {}
+        content = None
+        if method == "POST":
+            headers["Idempotency-Key"] = idempotency_key or uuid.uuid4().hex
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            content = urlencode(form_encode(params or {}))
+        
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            http = await self._client()
+            try:
+                response = await http.request(method, path, content=content, headers=headers)
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise PaymentError(f"Stripe unreachable: {str(e) or type(e).__name__}")
+            else:
+                should_retry = response.headers.get("Stripe-Should-Retry")
+                retry = (
+                    should_retry == "true"
+                    or (should_retry is None and response.status_code in RETRY_STATUS_CODES)
+                )
+                if response.status_code < 400:
+                    return response.json()
+                if not retry or last_attempt:
+                    try:
+                        message = response.json()["error"]["message"]
+                    except (ValueError, KeyError, TypeError):
+                        message = response.text
+                    raise PaymentError(message, response.status_code)
+            await asyncio.sleep(self.retry_delay * 2 ** attempt)
+    
+    async def create_payment_intent(
+        self,
+        amount: float,
+        currency: str = "ghs",
+        metadata: Optional[dict] = None,
+        idempotency_key: Optional[str] = None
+    ) -> dict:
+        """Create a Stripe payment intent"""
+        intent = await self._request("POST", "/v1/payment_intents", {
+            "amount": to_minor_units(amount),
+            "currency": currency.lower(),
+            "metadata": metadata or {},
+            "automatic_payment_methods": {"enabled": True},
+        }, idempotency_key=idempotency_key)
+        return {
+            "client_secret": intent["client_secret"],
+            "payment_intent_id": intent["id"],
+            "status": intent["status"]
+        }
+    
+    async def confirm_payment(self, payment_intent_id: str) -> dict:
+        """Current state of a payment intent"""
+        intent = await self._request("GET", f"/v1/payment_intents/{payment_intent_id}")
+        return {
+            "payment_intent_id": intent["id"],
+            "status": intent["status"],
+            "amount": intent["amount"] / 100,  # Convert back from cents
+            "currency": intent["currency"]
+        }
+    
+    async def refund_payment(
+        self,
+        payment_intent_id: str,
+        amount: Optional[float] = None,
+        idempotency_key: Optional[str] = None
+    ) -> dict:
         """Refund a payment"""
-        try:
-            refund_data = {"payment_intent": payment_intent_id}
-            if amount:
-                refund_data["amount"] = int(amount * 100)
-            
-            refund = stripe.Refund.create(**refund_data)
-            return {
-                "refund_id": refund.id,
-                "status": refund.status,
-                "amount": refund.amount / 100
-            }
-        except stripe.error.StripeError as e:
-            raise Exception(f"Refund error: {str(e)}")
\ No newline at end of file
+        refund_data = {"payment_intent": payment_intent_id}
+        if amount:
+            refund_data["amount"] = to_minor_units(amount)
+        
+        refund = await self._request("POST", "/v1/refunds", refund_data, idempotency_key=idempotency_key)
+        return {
+            "refund_id": refund["id"],
+            "status": refund["status"],
+            "amount": refund["amount"] / 100
+        }
+
+payment_service = PaymentService()
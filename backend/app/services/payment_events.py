@@ -0,0 +1,176 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import QUEUE_DEPTH
+from app.crud.payment import (
+    EVENT_STATUSES, apply_payment_events, claim_payment_events, count_unprocessed_payment_events, store_payment_events
+)
+from app.db.database import AsyncSessionLocal
+from app.services.dashboard import invalidate_dashboard_stats
+
+def event_values(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The payment_events row for a Stripe event, or None for an event type
+    that does not change a payment"""
+    if event.get("type") not in EVENT_STATUSES:
+        return None
+    obj = event["data"]["object"]
+    if obj.get("object") == "charge":
+        intent_id = obj.get("payment_intent")
+    else:
+        intent_id = obj.get("id")
+    if not intent_id:
+        return None
+    
+    order_id = (obj.get("metadata") or {}).get("order_id")
+    return {
+        "event_id": event["id"],
+        "event_type": event["type"],
+        "payment_intent_id": intent_id,
+        "order_id": int(order_id) if order_id and str(order_id).isdigit() else None,
+        "amount": obj["amount"] / 100 if obj.get("amount") is not None else None,
+        "currency": obj.get("currency"),
+        "created": int(event["created"])
+    }
+
+class PaymentEventQueue:
+    """Stores received webhook events, group-committing concurrent ones.
+    
+    The first request to arrive writes its event at once. Events arriving
+    while that write is in flight wait for it to finish and then go in
+    together, with one INSERT and one commit. Each writer writes a single
+    batch on its own session and then hands the role on: the waiters wake
+    and the first of them writes whatever has queued up since. Every caller
+    returns only once its own event is committed, so Stripe gets its 200
+    only for events that are stored.
+    """
+    
+    def __init__(self):
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._writing = False
+        # Resolved when the current writer is done; created by the first
+        # caller that has to wait for it
+        self._handoff: Optional[asyncio.Future] = None
+    
+    async def enqueue(self, db: AsyncSession, values: Dict[str, Any]) -> bool:
+        """Store an event (see event_values); False if it was a redelivery"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((values, future))
+        while not future.done():
+            if self._writing:
+                if self._handoff is None:
+                    self._handoff = loop.create_future()
+                try:
+                    # Cancelling this caller leaves the shared future alone
+                    await asyncio.wait([future, self._handoff], return_when=asyncio.FIRST_COMPLETED)
+                except BaseException:
+                    # Not stored; Stripe redelivers events it got no 200 for
+                    self._pending = [entry for entry in self._pending if entry[1] is not future]
+                    raise
+                continue
+            
+            self._writing = True
+            batch, self._pending = self._pending, []
+            try:
+                await self._write(db, batch)
+            except BaseException:
+                # This request was cancelled mid-write; the next writer
+                # retries the other callers' events, which the unique
+                # event_id makes safe if this write did commit
+                self._pending[:0] = [
+                    (values, waiting) for values, waiting in batch if waiting is not future and not waiting.done()
+                ]
+                raise
+            finally:
+                self._writing = False
+                handoff, self._handoff = self._handoff, None
+                if handoff is not None:
+                    handoff.set_result(None)
+        return future.result()
+    
+    async def _write(self, db: AsyncSession, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            stored = await store_payment_events(db, [values for values, future in batch])
+        except Exception as e:
+            await db.rollback()
+            for values, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        claimed = set()
+        for values, future in batch:
+            # An event repeated within the batch is new only the first time
+            is_new = values["event_id"] in stored and values["event_id"] not in claimed
+            claimed.add(values["event_id"])
+            if not future.done():
+                future.set_result(is_new)
+        if stored:
+            payment_event_processor.wake()
+
+class PaymentEventProcessor:
+    """Applies stored webhook events to payments and orders in the background.
+    
+    Runs as a task in every API worker process. Each round locks a batch
+    of unprocessed events (skipping those another worker holds), applies
+    them and commits once. The webhook endpoint calls wake() after storing
+    events, so they are applied right away instead of at the next poll.
+    After each round it publishes the backlog to the queue_depth gauge.
+    """
+    
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        batch_size: int = settings.PAYMENT_EVENT_BATCH_SIZE,
+        poll_seconds: float = settings.PAYMENT_EVENT_POLL_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._wake: Optional[asyncio.Event] = None
+    
+    def wake(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+    
+    async def drain_once(self) -> int:
+        """Apply one batch of events and return its size"""
+        async with self.session_factory() as db:
+            events = await claim_payment_events(db, self.batch_size)
+            if not events:
+                await db.rollback()
+                return 0
+            changed = await apply_payment_events(db, events)
+        if changed:
+            await invalidate_dashboard_stats()
+        return len(events)
+    
+    async def report_depth(self) -> None:
+        async with self.session_factory() as db:
+            QUEUE_DEPTH.labels("payment_events").set(await count_unprocessed_payment_events(db))
+    
+    async def run(self) -> None:
+        """Apply events until cancelled"""
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                applied = await self.drain_once()
+                await self.report_depth()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Applying payment events failed: {str(e)}")
+                applied = 0
+            
+            if applied < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+payment_event_queue = PaymentEventQueue()
+payment_event_processor = PaymentEventProcessor()
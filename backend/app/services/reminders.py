@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.crud.notification import queue_many
+from app.crud.reservation import get_reservations_to_remind, mark_reminders_sent
+from app.db.database import AsyncSessionLocal
+from app.services.notifications import notification_worker, reservation_reminder
+
+class ReminderScheduler:
+    """Queues reminders for upcoming reservations in the notifications outbox.
+    
+    Each run reads the reservations starting within the lead time a batch
+    at a time, by keyset on (reservation_date, id) with the customer joined
+    in, so memory stays bounded however many there are. Each batch is
+    stamped and its reminders queued in one transaction. Reservations
+    already stamped are skipped, which makes overlapping runs (one per API
+    worker) harmless. Sending is left to the notification worker, which
+    bounds concurrency to one batch and one SMTP session per process.
+    """
+    
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        batch_size: int = settings.REMINDER_BATCH_SIZE,
+        lead: timedelta = timedelta(minutes=settings.REMINDER_LEAD_MINUTES),
+        interval_seconds: float = settings.REMINDER_INTERVAL_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.lead = lead
+        self.interval_seconds = interval_seconds
+    
+    async def dispatch(self, now: Optional[datetime] = None) -> int:
+        """Queue the reminders due now and return how many reservations got one"""
+        now = now or datetime.now()
+        queued = 0
+        after = None
+        async with self.session_factory() as db:
+            while True:
+                rows = await get_reservations_to_remind(db, now, now + self.lead, after, self.batch_size)
+                if not rows:
+                    break
+                after = (rows[-1].reservation_date, rows[-1].id)
+                
+                stamped = set(await mark_reminders_sent(db, [row.id for row in rows], datetime.utcnow()))
+                await queue_many(db, [
+                    values
+                    for row in rows if row.id in stamped
+                    for values in reservation_reminder(row.id, row.reservation_date, row.party_size, row.email, row.phone)
+                ])
+                await db.commit()
+                queued += len(stamped)
+                notification_worker.wake()
+                
+                if len(rows) < self.batch_size:
+                    break
+        return queued
+    
+    async def run(self) -> None:
+        """Dispatch reminders every interval until cancelled"""
+        while True:
+            try:
+                queued = await self.dispatch()
+                if queued:
+                    print(f"Queued reminders for {queued} reservations")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Reservation reminders failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+reminder_scheduler = ReminderScheduler()
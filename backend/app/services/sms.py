@@ -29,12 +29,20 @@ class SMSService:
             print(f"SMS sending failed: {str(e)}")
             return False
     
+    @staticmethod
+    def reservation_confirmation(reservation_id: str, date_time: str) -> str:
+        """Reservation confirmation SMS text"""
+        return f"TastyBite: Your reservation {reservation_id} is confirmed for {date_time}. See you soon!"
+    
     def send_reservation_confirmation(self, phone: str, reservation_id: str, date_time: str) -> bool:
         """Send reservation confirmation SMS"""
-        message = f"TastyBite: Your reservation {reservation_id} is confirmed for {date_time}. See you soon!"
-        return self.send_sms(phone, message)
+        return self.send_sms(phone, self.reservation_confirmation(reservation_id, date_time))
+    
+    @staticmethod
+    def reservation_reminder(reservation_id: str, date_time: str) -> str:
+        """Reservation reminder SMS text"""
+        return f"TastyBite: Reminder - Your reservation {reservation_id} is today at {date_time}. Call us if you need to make changes."
     
     def send_reservation_reminder(self, phone: str, reservation_id: str, date_time: str) -> bool:
         """Send reservation reminder SMS"""
-        message = f"TastyBite: Reminder - Your reservation {reservation_id} is today at {date_time}. Call us if you need to make changes."
-        return self.send_sms(phone, message)
\ No newline at end of file
+        return self.send_sms(phone, self.reservation_reminder(reservation_id, date_time))
\ No newline at end of file
@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.db.models import User
+from app.services.cache import cache
+
+USER_INVALIDATION_CHANNEL = "users:invalidate"
+
+# Columns copied into the cache; the password hash stays in the database
+CACHED_COLUMNS = [column.key for column in User.__table__.columns if column.key != "hashed_password"]
+
+class UserCache:
+    """Per-worker LRU of active users keyed by token subject (email).
+    
+    Entries expire after USER_CACHE_SECONDS. Writes to a user publish the
+    subject on a shared channel (Redis pub/sub when CACHE_BACKEND=redis) so
+    every worker drops its copy right away; the TTL only bounds staleness
+    if a message is lost.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._hit_counter = CACHE_REQUESTS.labels("users", "hit")
+        self._miss_counter = CACHE_REQUESTS.labels("users", "miss")
+        cache.subscribe(USER_INVALIDATION_CHANNEL, self._on_invalidation)
+    
+    def get(self, subject: str) -> Optional[User]:
+        """Detached copy of the cached user, or None on a miss"""
+        entry = self._entries.get(subject)
+        if entry is None or time.monotonic() >= entry[0]:
+            if entry is not None:
+                del self._entries[subject]
+            self.misses += 1
+            self._miss_counter.inc()
+            return None
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        self._hit_counter.inc()
+        return User(**entry[1])
+    
+    def put(self, user: User) -> None:
+        """Remember an active user loaded from the database"""
+        if not user.is_active or self.max_entries <= 0:
+            return
+        values = {key: getattr(user, key) for key in CACHED_COLUMNS}
+        self._entries[user.email] = (time.monotonic() + self.ttl_seconds, values)
+        self._entries.move_to_end(user.email)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    async def invalidate(self, *subjects: str) -> None:
+        """Drop users from the cache in every worker; call after committing a change to them"""
+        for subject in subjects:
+            await cache.publish(USER_INVALIDATION_CHANNEL, subject)
+    
+    def _on_invalidation(self, subject: Optional[str]) -> None:
+        self.invalidations += 1
+        if subject is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(subject, None)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations
+        }
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_SECONDS)
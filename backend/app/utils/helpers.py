@@ -63,17 +63,4 @@ def sanitize_string(text: str) -> str:
     # Remove HTML tags and extra whitespace
     text = re.sub(r'<[^>]+>', '', text)
     text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-def paginate_query(query, page: int = 1, per_page: int = 20):
-    """Paginate SQLAlchemy query"""
-    total = query.count()
-    items = query.offset((page - 1) * per_page).limit(per_page).all()
-    
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": (total + per_page - 1) // per_page
-    }
\ No newline at end of file
+    return text.strip()
\ No newline at end of file
@@ -0,0 +1,66 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort key of the last row on a page"""
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> Tuple:
+    """Sort key values from a cursor made by encode_cursor; raises ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    
+    decoded = []
+    for value, value_type in zip(values, types):
+        if value_type is datetime and isinstance(value, str):
+            decoded.append(datetime.fromisoformat(value))
+        elif value_type is int and isinstance(value, int) and not isinstance(value, bool):
+            decoded.append(value)
+        else:
+            raise ValueError("Invalid cursor")
+    return tuple(decoded)
+
+def after_key(columns: Sequence[ColumnElement], values: Sequence[Any], descending: bool = False) -> ColumnElement:
+    """Rows that sort after `values` on `columns`, the last of which must be unique.
+    
+    Written as `a <= x AND (a < x OR b < y)` rather than a row-value
+    comparison so every backend can seek on the leading index column.
+    """
+    column, value = columns[0], values[0]
+    past = column < value if descending else column > value
+    if len(columns) == 1:
+        return past
+    reached = column <= value if descending else column >= value
+    return and_(reached, or_(past, after_key(columns[1:], values[1:], descending)))
+
+async def estimate_count(db: AsyncSession, model) -> int:
+    """Approximate row count of a model's table, without scanning it"""
+    dialect = db.bind.dialect.name
+    table = model.__tablename__
+    if dialect == "mysql":
+        count = await db.scalar(
+            text("SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"),
+            {"table": table}
+        )
+    elif dialect == "postgresql":
+        count = await db.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"), {"table": table})
+    else:
+        # SQLite keeps no row statistics; the highest id is a single index
+        # probe and only overcounts by the rows deleted since
+        count = await db.scalar(select(func.max(model.id)))
+    return max(int(count or 0), 0)
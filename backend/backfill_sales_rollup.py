@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily_sales, daily_item_sales and item_sales_totals rollup
+tables from orders
+Run once after upgrading, or any time the rollups need to be recomputed:
+
+    python backfill_sales_rollup.py                    # all history
+    python backfill_sales_rollup.py --since 2024-01-01 # from a date onwards
+"""
+
+import argparse
+import sys
+import os
+from datetime import date, datetime
+from typing import Optional
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.models import DailySales, DailyItemSales, ItemSalesTotal, Order, OrderItem, OrderStatus, PaymentStatus
+
+def backfill_sales_rollup(db: Session, since: Optional[date] = None) -> None:
+    """Recompute the rollups for every day from `since` (or all days) in one transaction"""
+    day = func.date(Order.created_at)
+    counted = Order.status != OrderStatus.CANCELLED
+    paid = counted & (Order.payment_status == PaymentStatus.PAID)
+    
+    orders_filter = []
+    if since is not None:
+        orders_filter.append(Order.created_at >= datetime.combine(since, datetime.min.time()))
+        db.execute(delete(DailySales).filter(DailySales.day >= since))
+        db.execute(delete(DailyItemSales).filter(DailyItemSales.day >= since))
+    else:
+        db.execute(delete(DailySales))
+        db.execute(delete(DailyItemSales))
+    
+    db.execute(insert(DailySales).from_select(
+        ["day", "order_count", "paid_order_count", "paid_revenue"],
+        select(
+            day,
+            func.sum(case((counted, 1), else_=0)),
+            func.sum(case((paid, 1), else_=0)),
+            func.sum(case((paid, Order.total_amount), else_=0))
+        ).filter(*orders_filter).group_by(day)
+    ))
+    
+    db.execute(insert(DailyItemSales).from_select(
+        ["day", "menu_item_id", "quantity"],
+        select(
+            day,
+            OrderItem.menu_item_id,
+            func.sum(OrderItem.quantity)
+        ).join(Order, Order.id == OrderItem.order_id).filter(
+            counted, OrderItem.menu_item_id.isnot(None), *orders_filter
+        ).group_by(day, OrderItem.menu_item_id)
+    ))
+    
+    # The all-time totals are the sum of the (now rebuilt) days
+    db.execute(delete(ItemSalesTotal))
+    db.execute(insert(ItemSalesTotal).from_select(
+        ["menu_item_id", "quantity"],
+        select(DailyItemSales.menu_item_id, func.sum(DailyItemSales.quantity)).group_by(DailyItemSales.menu_item_id)
+    ))
+    
+    db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily sales rollups")
+    parser.add_argument("--since", type=date.fromisoformat, help="first day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        print("Rebuilding sales rollups...")
+        backfill_sales_rollup(db, since=args.since)
+        days = db.scalar(select(func.count()).select_from(DailySales))
+        print(f"✅ Sales rollups rebuilt ({days} days)")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error rebuilding sales rollups: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Concurrent-load benchmark for the menu and orders routes.
+
+Run the API in one terminal (single worker, so event-loop blocking shows up):
+
+    python -m uvicorn app.main:app --port 8000 --workers 1
+
+then, in another:
+
+    python benchmarks/bench_concurrency.py --base-url http://localhost:8000 --seed
+
+Run it once against a checkout with the synchronous session and once with the
+async session to compare requests/sec.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+API = "/api/v1"
+BENCH_EMAIL = "bench-admin@tastybite.com"
+BENCH_PASSWORD = "bench-password"
+
+async def get_token(client: httpx.AsyncClient) -> str:
+    await client.post(f"{API}/auth/register", json={
+        "email": BENCH_EMAIL,
+        "name": "Bench Admin",
+        "password": BENCH_PASSWORD,
+        "role": "admin"
+    })
+    response = await client.post(f"{API}/auth/login-json", json={
+        "email": BENCH_EMAIL,
+        "password": BENCH_PASSWORD
+    })
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def seed(client: httpx.AsyncClient, headers: dict, items: int, orders: int):
+    """Create a category, menu items and orders through the public API"""
+    response = await client.post(f"{API}/menu/categories", headers=headers, json={
+        "name": "Bench", "slug": f"bench-{int(time.time())}"
+    })
+    response.raise_for_status()
+    category_id = response.json()["id"]
+    
+    item_ids = []
+    for i in range(items):
+        response = await client.post(f"{API}/menu/items", headers=headers, json={
+            "name": f"Bench item {i}", "price": 10 + i, "category_id": category_id
+        })
+        response.raise_for_status()
+        item_ids.append(response.json()["id"])
+    
+    for i in range(orders):
+        response = await client.post(f"{API}/orders/", headers=headers, json={
+            "order_type": "takeout",
+            "items": [{"menu_item_id": item_ids[(i + j) % len(item_ids)], "quantity": 1} for j in range(3)]
+        })
+        response.raise_for_status()
+
+async def run_load(client: httpx.AsyncClient, path: str, headers: dict, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+    
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors
+    }
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60, verify=False) as client:
+        token = await get_token(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        if args.seed:
+            await seed(client, headers, args.items, args.orders)
+        
+        routes = [
+            (f"{API}/menu/items", {}),
+            (f"{API}/orders/my-orders", headers),
+        ]
+        print(f"concurrency={args.concurrency} requests={args.requests}")
+        for path, route_headers in routes:
+            # Warm-up so connection setup isn't measured
+            await run_load(client, path, route_headers, args.concurrency, args.concurrency)
+            stats = await run_load(client, path, route_headers, args.concurrency, args.requests)
+            print(
+                f"{path:<28} {stats['rps']:8.1f} req/s  "
+                f"p50 {stats['p50_ms']:7.1f} ms  p99 {stats['p99_ms']:7.1f} ms  errors {stats['errors']}"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", action="store_true", help="create menu items and orders first")
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Menu latency during a login storm.
+
+Run the API in one terminal (single worker, so event-loop blocking shows up):
+
+    python -m uvicorn app.main:app --port 8000 --workers 1
+
+then, in another:
+
+    python benchmarks/bench_login_storm.py --base-url http://localhost:8000
+
+It measures GET /menu/items latency on its own, then again while `--logins`
+concurrent logins hammer the same worker. With bcrypt on the event loop the
+menu requests queue behind every hash; with the hashing pool they keep their
+baseline latency and surplus logins get a fast 429 instead.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+API = "/api/v1"
+STORM_EMAIL = "storm@tastybite.com"
+STORM_PASSWORD = "storm-password"
+
+def summarize(latencies: list) -> str:
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+    return f"p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  max {latencies[-1] * 1000:7.1f} ms"
+
+async def sample_menu(client: httpx.AsyncClient, until: asyncio.Event, interval: float) -> list:
+    """GET /menu/items one at a time until `until` is set"""
+    latencies = []
+    while not until.is_set():
+        start = time.perf_counter()
+        response = await client.get(f"{API}/menu/items")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+async def login(client: httpx.AsyncClient) -> int:
+    response = await client.post(f"{API}/auth/login-json", json={
+        "email": STORM_EMAIL,
+        "password": STORM_PASSWORD
+    })
+    return response.status_code
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.logins + 1, max_keepalive_connections=args.logins + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120, verify=False) as client:
+        await client.post(f"{API}/auth/register", json={
+            "email": STORM_EMAIL,
+            "name": "Storm User",
+            "password": STORM_PASSWORD
+        })
+        await client.get(f"{API}/menu/items")
+        
+        done = asyncio.Event()
+        sampler = asyncio.create_task(sample_menu(client, done, args.interval))
+        await asyncio.sleep(args.baseline_seconds)
+        done.set()
+        baseline = await sampler
+        
+        done = asyncio.Event()
+        sampler = asyncio.create_task(sample_menu(client, done, args.interval))
+        start = time.perf_counter()
+        statuses = []
+        for _ in range(args.rounds):
+            statuses += await asyncio.gather(*(login(client) for _ in range(args.logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        during = await sampler
+        
+        print(f"menu alone        {summarize(baseline)}  ({len(baseline)} requests)")
+        print(f"menu during storm {summarize(during)}  ({len(during)} requests)")
+        print(
+            f"logins: {statuses.count(200)} ok, {statuses.count(429)} rejected with 429, "
+            f"{len(statuses) - statuses.count(200) - statuses.count(429)} other, in {elapsed:.1f} s"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--logins", type=int, default=50, help="concurrent logins per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=0.01, help="pause between menu requests")
+    parser.add_argument("--baseline-seconds", type=float, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Per-request CPU for GET /menu/items: response_model path vs snapshot path.
+
+Both routes are mounted on a throwaway app and served from memory, so the
+numbers isolate validation + encoding from database time:
+
+    python benchmarks/bench_menu_snapshot.py --items 200 --requests 2000
+
+"response_model" validates ORM objects through List[MenuItem] and lets
+FastAPI encode the JSON on every call (the old read path). "snapshot"
+returns the pre-rendered bytes the menu catalog keeps per revision. The
+response_model path is never compressed (the app has no GZip middleware).
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api.api_v1.endpoints.menu import catalog_response
+from app.db.models import Category, MenuItem
+from app.schemas.menu import MenuItem as MenuItemSchema
+from app.services.menu_catalog import CatalogSection, menu_items_query
+
+def build_items(count: int) -> List[MenuItem]:
+    now = datetime.now()
+    categories = [
+        Category(id=i, name=f"Category {i}", slug=f"category-{i}", description="Seasonal dishes", is_active=True, created_at=now)
+        for i in range(1, 9)
+    ]
+    return [
+        MenuItem(
+            id=i,
+            name=f"Dish {i}",
+            description="Slow-cooked with house spices and served with a side of jollof rice",
+            price=10.0 + i % 20,
+            image_url=f"https://cdn.example.com/menu/{i}.jpg",
+            category_id=categories[i % len(categories)].id,
+            category=categories[i % len(categories)],
+            is_available=True,
+            is_featured=i % 10 == 0,
+            calories=400 + i,
+            preparation_time=15,
+            created_at=now,
+            updated_at=None
+        )
+        for i in range(1, count + 1)
+    ]
+
+def build_app(items: List[MenuItem]) -> FastAPI:
+    app = FastAPI()
+    rows = [MenuItemSchema.model_validate(item).model_dump(mode="json") for item in items]
+    section = CatalogSection(revision=1, rows=rows)
+    
+    @app.get("/response-model", response_model=List[MenuItemSchema])
+    async def response_model_path():
+        return items
+    
+    @app.get("/snapshot", response_model=List[MenuItemSchema])
+    async def snapshot_path(request: Request):
+        return catalog_response(request, section.body(*menu_items_query(limit=len(rows))))
+    
+    return app
+
+def measure(client: TestClient, path: str, requests: int, headers: dict) -> float:
+    for _ in range(20):
+        client.get(path, headers=headers)
+    started = time.process_time()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+        response.raise_for_status()
+    return (time.process_time() - started) / requests
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    
+    client = TestClient(build_app(build_items(args.items)))
+    for encoding in ("identity", "gzip", "br"):
+        headers = {"Accept-Encoding": encoding}
+        baseline = measure(client, "/response-model", args.requests, headers)
+        snapshot = measure(client, "/snapshot", args.requests, headers)
+        size = int(client.get("/snapshot", headers=headers).headers["content-length"])
+        print(
+            f"{encoding:>8}: response_model {baseline * 1e6:8.0f} us/req   "
+            f"snapshot {snapshot * 1e6:6.0f} us/req   "
+            f"({baseline / snapshot:4.1f}x, {size} bytes on the wire)"
+        )
+
+if __name__ == "__main__":
+    main()
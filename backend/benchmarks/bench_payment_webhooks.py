@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Replays signed Stripe webhook events at the API, as fast as it takes them.
+
+Run the API with the same signing secret:
+
+    STRIPE_WEBHOOK_SECRET=whsec_bench python -m uvicorn app.main:app --port 8000 --workers 1
+
+then, in another terminal:
+
+    python benchmarks/bench_payment_webhooks.py --base-url http://localhost:8000 --secret whsec_bench
+
+Each intent gets a payment_failed event followed by a succeeded one, and
+--duplicates of the events are sent twice, as Stripe does on retries.
+Reports events/sec received; the events themselves are applied in the
+background (see the payment_events table's processed_at).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app.services.payment import webhook_signature
+
+def build_events(intents: int, duplicates: float) -> list:
+    run = uuid.uuid4().hex[:8]
+    now = int(time.time())
+    events = []
+    for i in range(intents):
+        for offset, event_type in enumerate(("payment_intent.payment_failed", "payment_intent.succeeded")):
+            events.append({
+                "id": f"evt_{run}_{i}_{offset}",
+                "type": event_type,
+                "created": now + offset,
+                "data": {"object": {
+                    "id": f"pi_{run}_{i}",
+                    "object": "payment_intent",
+                    "amount": 5000,
+                    "currency": "ghs",
+                    "metadata": {}
+                }}
+            })
+    events += random.sample(events, int(len(events) * duplicates))
+    random.shuffle(events)
+    return [json.dumps(event).encode() for event in events]
+
+async def main(args):
+    payloads = build_events(args.intents, args.duplicates)
+    queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+    statuses = Counter()
+    
+    async def sender(client: httpx.AsyncClient):
+        while not queue.empty():
+            payload = queue.get_nowait()
+            response = await client.post("/api/v1/payments/webhook", content=payload, headers={
+                "Stripe-Signature": webhook_signature(payload, args.secret, int(time.time())),
+                "Content-Type": "application/json"
+            })
+            statuses[response.status_code] += 1
+    
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30, verify=False) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[sender(client) for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - start
+    
+    print(f"events={len(payloads)} concurrency={args.concurrency}")
+    print(f"{len(payloads) / elapsed:.0f} events/s in {elapsed:.2f} s  statuses {dict(statuses)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--secret", default="whsec_bench")
+    parser.add_argument("--intents", type=int, default=5000)
+    parser.add_argument("--duplicates", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
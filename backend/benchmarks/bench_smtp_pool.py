@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Time to send a batch of emails with a new SMTP connection per message
+versus the EmailService connection pool.
+
+Starts a local SMTP server (aiosmtpd) in-process; nothing else is needed:
+
+    python benchmarks/bench_smtp_pool.py --messages 500 --handshake-ms 50
+
+A real provider adds network round trips, STARTTLS and AUTH to every new
+connection; --handshake-ms delays each EHLO to stand in for that. "fresh"
+is the old behaviour (connect, send, quit per message), "pooled" sends
+each message with deliver() and "bulk" sends them all with send_bulk().
+"""
+
+import argparse
+import asyncio
+import os
+import smtplib
+import socket
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller
+
+from app.services.email import EmailService, OutgoingEmail, SMTPConnectionPool
+
+class SlowHandshakeHandler:
+    def __init__(self, handshake_seconds: float):
+        self.handshake_seconds = handshake_seconds
+        self.received = 0
+    
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.handshake_seconds)
+        session.host_name = hostname
+        return responses
+    
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 Message accepted for delivery"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def main(args):
+    handler = SlowHandshakeHandler(args.handshake_ms / 1000)
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    
+    service = EmailService()
+    messages = [
+        service.build_message(OutgoingEmail(
+            [f"guest{i}@example.com"], "Your reservation tonight", "See you at 19:00",
+            from_email="no-reply@tastybite.test"
+        ))
+        for i in range(args.messages)
+    ]
+    
+    def fresh(pool):
+        for message in messages:
+            with smtplib.SMTP("127.0.0.1", controller.port, timeout=30) as server:
+                server.send_message(message)
+    
+    def pooled(pool):
+        for message in messages:
+            pool.send([message])
+    
+    def bulk(pool):
+        pool.send(messages)
+    
+    print(f"messages={args.messages} handshake={args.handshake_ms}ms")
+    try:
+        for name, run in (("fresh", fresh), ("pooled", pooled), ("bulk", bulk)):
+            pool = SMTPConnectionPool("127.0.0.1", controller.port, use_tls=False)
+            received = handler.received
+            start = time.perf_counter()
+            run(pool)
+            elapsed = time.perf_counter() - start
+            pool.close()
+            assert handler.received - received == args.messages
+            connections = args.messages if run is fresh else pool.connects
+            print(f"{name:<7} {elapsed:7.2f} s  {args.messages / elapsed:8.1f} msg/s  connections {connections}")
+    finally:
+        controller.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--handshake-ms", type=float, default=50)
+    main(parser.parse_args())
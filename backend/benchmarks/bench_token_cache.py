@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Per-request authentication overhead with and without the verified-token cache.
+
+Runs in-process, no server or database needed:
+
+    python benchmarks/bench_token_cache.py --requests 20000
+
+"verify_token" is the JWT check alone. "get_current_user" is the whole
+auth dependency for a polling client whose user is already in the user
+cache, which is what an authenticated request pays before the endpoint
+itself runs. "uncached" disables the token cache, so every call decodes
+the token and checks its HMAC.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.api.deps import get_current_user
+from app.core import security
+from app.core.security import TokenCache, create_access_token
+from app.db.models import User, UserRole
+from app.services.user_cache import user_cache
+
+EMAIL = "poller@tastybite.com"
+
+async def time_per_call(function, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        result = function()
+        if asyncio.iscoroutine(result):
+            await result
+    return (time.perf_counter() - start) / requests
+
+async def main(args):
+    token = create_access_token({"sub": EMAIL})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    user_cache.put(User(
+        id=1, email=EMAIL, name="Poller", role=UserRole.CUSTOMER, is_active=True, created_at=datetime.now()
+    ))
+    
+    calls = [
+        ("verify_token", lambda: security.verify_token(token)),
+        ("get_current_user", lambda: get_current_user(db=None, credentials=credentials)),
+    ]
+    cached_cache = security.token_cache
+    print(f"requests={args.requests}")
+    for name, call in calls:
+        results = {}
+        for mode, cache in (("uncached", TokenCache(max_entries=0)), ("cached", cached_cache)):
+            security.token_cache = cache
+            await time_per_call(call, 100)
+            results[mode] = await time_per_call(call, args.requests)
+        print(
+            f"{name:<18} uncached {results['uncached'] * 1e6:7.1f} us  "
+            f"cached {results['cached'] * 1e6:7.1f} us  "
+            f"({results['uncached'] / results['cached']:.1f}x)"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
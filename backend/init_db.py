@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Database initialization script for TastyBite Restaurant Management System
-Run this script to create all database tables
+Run this script to create or upgrade all database tables (alembic upgrade head)
 """
 
 import sys
@@ -10,8 +10,9 @@ import os
 # Add the app directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
-from app.db.database import engine
-from app.db.models import Base
+from alembic import command
+from alembic.config import Config
+
 from app.core.config import settings
 
 def init_database():
@@ -20,9 +21,12 @@ def init_database():
     print(f"Database URL: {settings.DATABASE_URL}")
     
     try:
-        # Create all tables
-        print("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
+        # Apply every migration in alembic/versions
+        print("Running database migrations...")
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        alembic_config = Config(os.path.join(base_dir, "alembic.ini"))
+        alembic_config.set_main_option("script_location", os.path.join(base_dir, "alembic"))
+        command.upgrade(alembic_config, "head")
         print("✅ Database tables created successfully!")
         
         print("\nDatabase initialization completed!")
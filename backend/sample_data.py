@@ -12,7 +12,7 @@ from datetime import datetime
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
 from app.db.database import SessionLocal
-from app.db.models import User, Category, MenuItem, OrderStatus, OrderType, PaymentStatus, UserRole
+from app.db.models import User, Category, MenuItem, Table, OrderStatus, OrderType, PaymentStatus, UserRole
 from app.core.security import get_password_hash
 
 def create_sample_data():
@@ -110,6 +110,23 @@ def create_sample_data():
         
         db.commit()
         
+        # Create dining tables
+        tables = [
+            Table(name="Table 1", capacity=2, table_type="window"),
+            Table(name="Table 2", capacity=4, table_type="standard"),
+            Table(name="Table 3", capacity=4, table_type="booth"),
+            Table(name="Table 4", capacity=6, table_type="large"),
+            Table(name="Table 5", capacity=8, table_type="private"),
+            Table(name="Table 6", capacity=2, table_type="bar"),
+            Table(name="Table 7", capacity=4, table_type="patio"),
+            Table(name="Table 8", capacity=6, table_type="standard")
+        ]
+        
+        for table in tables:
+            db.add(table)
+        
+        db.commit()
+        
         print("✅ Sample data created successfully!")
         print("\nSample users created:")
         print("Admin: admin@tastybite.com / admin123")
@@ -1,31 +1,50 @@
+import os
+from contextlib import contextmanager
+
+# Point the app at SQLite before it is imported so no MySQL server is needed
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+# Minimum bcrypt cost; the tests register a lot of users
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.main import app
+from app.core.metrics import instrument_engine
 from app.db.database import get_db
 from app.db.models import Base
 
 # Create test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient runs each request on its own event loop, so connections must not
+# be pooled across requests
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+instrument_engine(async_engine.sync_engine)
+TestingSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+Base.metadata.drop_all(bind=engine)
 Base.metadata.create_all(bind=engine)
 
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 app.dependency_overrides[get_db] = override_get_db
 
@@ -33,10 +52,67 @@ app.dependency_overrides[get_db] = override_get_db
 def client():
     return TestClient(app)
 
+# Password of every user registered through auth_headers
+TEST_PASSWORD = "testpassword123"
+
+@pytest.fixture(scope="session")
+def auth_headers():
+    """Registers a user (if the email is new) and returns Bearer headers for them
+    
+    Usage: `auth_headers("someone@example.com", role="admin", phone="+233200000000")`;
+    keyword arguments besides role are added to the registration.
+    """
+    client = TestClient(app)
+    
+    def headers_for(email: str, role: str = "customer", **profile) -> dict:
+        client.post(
+            "/api/v1/auth/register",
+            json={"email": email, "name": "Test User", "password": TEST_PASSWORD, "role": role, **profile}
+        )
+        response = client.post("/api/v1/auth/login-json", json={"email": email, "password": TEST_PASSWORD})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return headers_for
+
 @pytest.fixture
 def db_session():
-    db = TestingSessionLocal()
+    """Synchronous session on the test database, for seeding data"""
+    db = SyncSessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@pytest.fixture
+def query_counter():
+    """Records every SQL statement the API executes while the fixture is active"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+@pytest.fixture
+def assert_max_queries(query_counter):
+    """Fails the test if the wrapped block executes more than `budget` statements
+    
+    Usage: `with assert_max_queries(3): client.get(...)`
+    """
+    @contextmanager
+    def check(budget: int):
+        query_counter.clear()
+        yield query_counter
+        assert len(query_counter) <= budget, (
+            f"Expected at most {budget} queries, got {len(query_counter)}:\n"
+            + "\n".join(query_counter)
+        )
+    return check
+
+@pytest.fixture
+def async_session_factory():
+    """Factory for independent async sessions, e.g. to simulate concurrent requests"""
+    return TestingSessionLocal
@@ -0,0 +1,106 @@
+"""In-process stand-in for the parts of the Stripe API the app uses.
+
+Serve it to PaymentService through `httpx.ASGITransport(app=fake.app)`.
+"""
+
+import uuid
+from typing import Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+class FakeStripe:
+    def __init__(self):
+        self.intents: Dict[str, dict] = {}
+        self.refunds: Dict[str, dict] = {}
+        self.requests: List[dict] = []
+        # Status codes to answer the next requests with, before handling them
+        self.fail_next: List[int] = []
+        # Called on every request, e.g. to look at the app's state mid-call
+        self.on_request = None
+        self._idempotent: Dict[str, dict] = {}
+        self.app = self._build_app()
+    
+    def succeed(self, intent_id: str) -> None:
+        self.intents[intent_id]["status"] = "succeeded"
+    
+    def cancel(self, intent_id: str) -> None:
+        self.intents[intent_id]["status"] = "canceled"
+    
+    async def _handle(self, request: Request, handler):
+        """Record the request, apply auth, injected failures and idempotent
+        replays, then answer with handler(form)"""
+        form = dict(await request.form()) if request.method == "POST" else {}
+        self.requests.append({
+            "method": request.method,
+            "path": request.url.path,
+            "form": form,
+            "idempotency_key": request.headers.get("Idempotency-Key")
+        })
+        if self.on_request is not None:
+            self.on_request()
+        if not request.headers.get("Authorization", "").startswith("Basic "):
+            return error(401, "No API key provided")
+        if self.fail_next:
+            return error(self.fail_next.pop(0), "Injected failure")
+        
+        key = request.headers.get("Idempotency-Key")
+        # A reused key replays the first response, as it was then
+        if key and key in self._idempotent:
+            return self._idempotent[key]
+        response = handler(form)
+        if key and not isinstance(response, JSONResponse):
+            self._idempotent[key] = dict(response)
+        return response
+    
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+        
+        @app.post("/v1/payment_intents")
+        async def create_intent(request: Request):
+            return await self._handle(request, create_intent_from)
+        
+        def create_intent_from(form):
+            if int(form["amount"]) < 50:
+                return error(400, "Amount must be at least 50 pesewas")
+            intent_id = f"pi_{uuid.uuid4().hex[:24]}"
+            self.intents[intent_id] = {
+                "id": intent_id,
+                "object": "payment_intent",
+                "amount": int(form["amount"]),
+                "currency": form["currency"],
+                "status": "requires_payment_method",
+                "client_secret": f"{intent_id}_secret_{uuid.uuid4().hex[:12]}",
+                "metadata": {key[9:-1]: value for key, value in form.items() if key.startswith("metadata[")}
+            }
+            return self.intents[intent_id]
+        
+        @app.get("/v1/payment_intents/{intent_id}")
+        async def retrieve_intent(request: Request, intent_id: str):
+            return await self._handle(request, lambda form: retrieve(intent_id))
+        
+        def retrieve(intent_id):
+            if intent_id not in self.intents:
+                return error(404, f"No such payment_intent: '{intent_id}'")
+            return self.intents[intent_id]
+        
+        @app.post("/v1/refunds")
+        async def create_refund(request: Request):
+            return await self._handle(request, create_refund_from)
+        
+        def create_refund_from(form):
+            intent = self.intents[form["payment_intent"]]
+            refund_id = f"re_{uuid.uuid4().hex[:24]}"
+            self.refunds[refund_id] = {
+                "id": refund_id,
+                "object": "refund",
+                "amount": int(form.get("amount", intent["amount"])),
+                "payment_intent": intent["id"],
+                "status": "succeeded"
+            }
+            return self.refunds[refund_id]
+        
+        return app
+
+def error(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse({"error": {"message": message, "type": "invalid_request_error"}}, status_code=status_code)
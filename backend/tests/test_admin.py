@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.crud.order import get_order, update_order
+from app.db.models import DailySales, DailyItemSales, ItemSalesTotal, Order, PaymentStatus, Reservation, User
+from app.schemas.order import OrderUpdate
+from backfill_sales_rollup import backfill_sales_rollup
+from app.services.cache import cache
+
+client = TestClient(app)
+
+def create_menu_item(headers: dict, slug: str) -> int:
+    response = client.post(
+        "/api/v1/menu/categories",
+        json={"name": slug.title(), "slug": slug},
+        headers=headers
+    )
+    response = client.post(
+        "/api/v1/menu/items",
+        json={"name": f"{slug.title()} Dish", "price": 20.0, "category_id": response.json()["id"]},
+        headers=headers
+    )
+    return response.json()["id"]
+
+def create_order(headers: dict, item_id: int) -> None:
+    response = client.post(
+        "/api/v1/orders/",
+        json={"order_type": "takeout", "items": [{"menu_item_id": item_id, "quantity": 1}]},
+        headers=headers
+    )
+    assert response.status_code == 200
+
+def test_dashboard_is_one_query_and_cached(db_session, query_counter, assert_max_queries, auth_headers):
+    headers = auth_headers("dashboard-admin@example.com", role="admin")
+    item_id = create_menu_item(headers, "dashboard")
+    create_order(headers, item_id)
+    asyncio.run(cache.clear())
+    
+    # One query for the current user, one for every counter
+    with assert_max_queries(2):
+        response = client.get("/api/v1/admin/dashboard", headers=headers)
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["orders"]["total"] == db_session.query(Order).count()
+    assert stats["orders"]["today"] >= 1
+    assert stats["reservations"]["total"] == db_session.query(Reservation).count()
+    assert stats["users"]["total"] == db_session.query(User).count()
+    assert not any("date(" in statement.lower() for statement in query_counter)
+    
+    # Served from the cache until it expires or a write invalidates it
+    with assert_max_queries(1):
+        assert client.get("/api/v1/admin/dashboard", headers=headers).json() == stats
+    
+    create_order(headers, item_id)
+    response = client.get("/api/v1/admin/dashboard", headers=headers)
+    assert response.json()["orders"]["total"] == stats["orders"]["total"] + 1
+    assert response.json()["orders"]["pending"] == stats["orders"]["pending"] + 1
+
+def rollup_rows(db_session) -> tuple:
+    db_session.expire_all()
+    sales = [
+        (row.day, row.order_count, row.paid_order_count, round(row.paid_revenue, 2))
+        for row in db_session.query(DailySales).order_by(DailySales.day)
+    ]
+    items = [
+        (row.day, row.menu_item_id, row.quantity)
+        for row in db_session.query(DailyItemSales).order_by(DailyItemSales.day, DailyItemSales.menu_item_id)
+        if row.quantity
+    ]
+    totals = [
+        (row.menu_item_id, row.quantity)
+        for row in db_session.query(ItemSalesTotal).order_by(ItemSalesTotal.menu_item_id)
+        if row.quantity
+    ]
+    return sales, items, totals
+
+def test_sales_rollup_tracks_order_changes(db_session, auth_headers):
+    headers = auth_headers("rollup-admin@example.com", role="admin")
+    item_id = create_menu_item(headers, "rollup")
+    
+    order_ids = []
+    for quantity in (1, 2, 3):
+        response = client.post(
+            "/api/v1/orders/",
+            json={"order_type": "takeout", "items": [{"menu_item_id": item_id, "quantity": quantity}]},
+            headers=headers
+        )
+        order_ids.append(response.json()["id"])
+    
+    client.put(f"/api/v1/orders/{order_ids[0]}", json={"payment_status": "paid"}, headers=headers)
+    client.put(f"/api/v1/orders/{order_ids[1]}", json={"status": "cancelled"}, headers=headers)
+    
+    popular = client.get("/api/v1/admin/popular-items?limit=100", headers=headers).json()
+    assert next(item for item in popular if item["id"] == item_id)["total_ordered"] == 4
+    
+    analytics = client.get("/api/v1/admin/sales-analytics", headers=headers).json()
+    paid_orders = db_session.query(Order).filter(Order.payment_status == PaymentStatus.PAID).count()
+    assert sum(day["order_count"] for day in analytics) == paid_orders
+    
+    # The incrementally maintained rollups match a rebuild from the orders table
+    incremental = rollup_rows(db_session)
+    backfill_sales_rollup(db_session)
+    assert rollup_rows(db_session) == incremental
+
+@pytest.mark.asyncio
+async def test_order_update_takes_its_delta_from_the_stored_status(db_session, async_session_factory, auth_headers):
+    headers = auth_headers("rollup-race-admin@example.com", role="admin")
+    item_id = create_menu_item(headers, "rollup-race")
+    response = client.post(
+        "/api/v1/orders/",
+        json={"order_type": "takeout", "items": [{"menu_item_id": item_id, "quantity": 1}]},
+        headers=headers
+    )
+    order_id = response.json()["id"]
+    
+    async with async_session_factory() as first, async_session_factory() as second:
+        # The first session read the order while it was unpaid...
+        stale = await get_order(first, order_id)
+        assert stale.payment_status == PaymentStatus.PENDING
+        # ...and another request marked it paid meanwhile
+        await update_order(second, order_id, OrderUpdate(payment_status=PaymentStatus.PAID))
+        await update_order(first, order_id, OrderUpdate(payment_status=PaymentStatus.PAID))
+    
+    incremental = rollup_rows(db_session)
+    backfill_sales_rollup(db_session)
+    assert rollup_rows(db_session) == incremental
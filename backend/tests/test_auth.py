@@ -1,6 +1,15 @@
+import asyncio
+import time
+
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from app.core.security import PasswordHasher, TokenCache, create_access_token, password_hasher, token_cache, verify_token
+from app.db.models import User
 from app.main import app
+from app.services.user_cache import UserCache, user_cache
+from tests.conftest import TEST_PASSWORD
 
 client = TestClient(app)
 
@@ -53,4 +62,131 @@ def test_login_invalid_credentials():
             "password": "wrongpassword"
         }
     )
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_authenticated_user_is_cached(assert_max_queries, auth_headers):
+    headers = auth_headers("cached@example.com")
+    client.get("/api/v1/users/me", headers=headers)
+    
+    hits = user_cache.hits
+    with assert_max_queries(0):
+        response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "cached@example.com"
+    assert user_cache.hits == hits + 1
+    
+    # Profile updates are visible on the next request
+    client.put("/api/v1/users/me", json={"name": "Renamed User"}, headers=headers)
+    assert client.get("/api/v1/users/me", headers=headers).json()["name"] == "Renamed User"
+
+def test_deactivation_takes_effect_immediately(auth_headers):
+    admin_headers = auth_headers("cache-admin@example.com", role="admin")
+    headers = auth_headers("deactivated@example.com")
+    user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+    assert client.get("/api/v1/orders/my-orders", headers=headers).status_code == 200
+    
+    client.put(f"/api/v1/admin/users/{user_id}/toggle-active", headers=admin_headers)
+    response = client.get("/api/v1/orders/my-orders", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+    
+    stats = client.get("/api/v1/admin/cache-stats", headers=admin_headers).json()["users"]
+    assert stats["hits"] > 0 and stats["misses"] > 0 and stats["invalidations"] > 0
+
+def test_user_cache_invalidation_reaches_every_worker(auth_headers):
+    headers = auth_headers("two-workers@example.com")
+    client.get("/api/v1/users/me", headers=headers)
+    user = user_cache.get("two-workers@example.com")
+    
+    # A second cache stands in for another worker subscribed to the channel
+    other_worker = UserCache(max_entries=2, ttl_seconds=60)
+    other_worker.put(user)
+    assert other_worker.get("two-workers@example.com").id == user.id
+    
+    client.put("/api/v1/users/me", json={"phone": "0241234567"}, headers=headers)
+    assert other_worker.get("two-workers@example.com") is None
+    
+    # Bounded: the least recently used entry goes first
+    for email in ("a@example.com", "b@example.com"):
+        user.email = email
+        other_worker.put(user)
+    user.email = "c@example.com"
+    other_worker.get("a@example.com")
+    other_worker.put(user)
+    assert other_worker.stats()["entries"] == 2
+    assert other_worker.get("b@example.com") is None
+    assert other_worker.get("a@example.com") is not None
+
+def test_login_rehashes_password_when_cost_changes(db_session):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("rehashpassword123")
+    db_session.add(User(email="rehash@example.com", name="Rehash User", hashed_password=old_hash))
+    db_session.commit()
+    
+    response = client.post(
+        "/api/v1/auth/login-json",
+        json={"email": "rehash@example.com", "password": "rehashpassword123"}
+    )
+    assert response.status_code == 200
+    
+    db_session.expire_all()
+    user = db_session.query(User).filter(User.email == "rehash@example.com").one()
+    assert user.hashed_password != old_hash
+    assert user.hashed_password.startswith("$2b$04$")
+
+@pytest.mark.asyncio
+async def test_password_hashing_runs_off_the_event_loop_with_backpressure():
+    hasher = PasswordHasher(max_workers=1, max_queued=1)
+    expensive = CryptContext(schemes=["bcrypt"], bcrypt__rounds=10)
+    
+    # The loop keeps ticking while two 60ms hashes run
+    hashes = asyncio.gather(*(hasher._run(expensive.hash, "password") for _ in range(2)))
+    await asyncio.sleep(0)
+    with pytest.raises(HTTPException) as error:
+        await hasher.hash("one too many")
+    assert error.value.status_code == 429
+    
+    ticks = []
+    while not hashes.done():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        ticks.append(time.perf_counter() - started)
+    await hashes
+    assert len(ticks) > 10
+    assert sorted(ticks)[len(ticks) // 2] < 0.02
+    assert hasher.pending == 0
+
+def test_login_returns_429_when_hashing_is_saturated(monkeypatch, auth_headers):
+    auth_headers("saturated@example.com")
+    monkeypatch.setattr(password_hasher, "capacity", 0)
+    response = client.post(
+        "/api/v1/auth/login-json",
+        json={"email": "saturated@example.com", "password": TEST_PASSWORD}
+    )
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+
+def test_verified_tokens_are_cached_until_they_expire():
+    token = create_access_token({"sub": "token-cache@example.com"})
+    hits = token_cache.hits
+    assert verify_token(token)["sub"] == "token-cache@example.com"
+    assert verify_token(token)["sub"] == "token-cache@example.com"
+    assert token_cache.hits == hits + 1
+    
+    cache = TokenCache(max_entries=2)
+    cache.put("expired", {"sub": "a", "exp": time.time() - 1})
+    assert cache.get("expired") is None
+    cache.put("no-exp", {"sub": "a"})
+    assert cache.get("no-exp") is None
+    
+    # Bounded: the least recently used token goes first
+    for name in ("a", "b", "c"):
+        cache.put(name, {"sub": name, "exp": time.time() + 60})
+        cache.get("a")
+    assert cache.stats()["entries"] == 2
+    assert cache.get("b") is None
+    assert cache.get("a")["sub"] == "a"
+    
+    # Tampered tokens never reach the cache
+    with pytest.raises(HTTPException):
+        verify_token(token[:-2] + ("AA" if not token.endswith("AA") else "BB"))
+
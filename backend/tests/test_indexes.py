@@ -0,0 +1,91 @@
+import re
+from datetime import date, datetime
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, text
+
+from app.crud.inventory import get_low_stock_items
+from app.crud.menu import get_menu_items_by_category
+from app.crud.order import get_order, get_orders, get_user_orders
+from app.crud.reservation import get_reservations, get_reservations_to_remind, get_user_reservations
+from app.crud.sales import get_daily_sales, get_popular_items
+from app.crud.user import get_user_by_email
+from tests.conftest import async_engine, engine
+
+CRUD_QUERIES = [
+    ("get_user_orders", lambda db: get_user_orders(db, 1)),
+    ("get_orders", lambda db: get_orders(db)),
+    ("get_orders_after", lambda db: get_orders(db, after=(50000,))),
+    ("get_order", lambda db: get_order(db, 1)),
+    ("get_user_reservations", lambda db: get_user_reservations(db, 1)),
+    ("get_reservations", lambda db: get_reservations(db)),
+    ("get_reservations_after", lambda db: get_reservations(db, after=(datetime(2030, 1, 1, 19), 50000))),
+    ("get_reservations_to_remind", lambda db: get_reservations_to_remind(
+        db, datetime(2030, 1, 1, 17), datetime(2030, 1, 1, 20), after=(datetime(2030, 1, 1, 18), 50000)
+    )),
+    ("get_menu_items_by_category", lambda db: get_menu_items_by_category(db, 1)),
+    ("get_low_stock_items", lambda db: get_low_stock_items(db)),
+    ("get_daily_sales", lambda db: get_daily_sales(db, date(2030, 1, 1))),
+    ("get_popular_items", lambda db: get_popular_items(db)),
+    ("get_user_by_email", lambda db: get_user_by_email(db, "nobody@example.com")),
+]
+
+def alembic_config(database_url: str) -> Config:
+    config = Config("alembic.ini")
+    config.attributes["database_url"] = database_url
+    return config
+
+def test_migrations_build_the_model_schema(tmp_path):
+    config = alembic_config(f"sqlite:///{tmp_path / 'migrations.db'}")
+    command.upgrade(config, "head")
+    # Raises if autogenerate finds any difference between the models and
+    # the migrated database
+    command.check(config)
+    command.downgrade(config, "base")
+
+def test_upgrading_a_baseline_database_fills_seating_windows(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'baseline.db'}"
+    config = alembic_config(database_url)
+    command.upgrade(config, "0001")
+    baseline = create_engine(database_url)
+    with baseline.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO reservations (reservation_date, party_size) VALUES ('2030-01-01 19:00:00.000000', 2)"
+        ))
+    
+    command.upgrade(config, "head")
+    with baseline.connect() as connection:
+        row = connection.execute(text("SELECT duration_minutes, reservation_end, table_id FROM reservations")).one()
+    baseline.dispose()
+    assert row == (90, "2030-01-01 20:30:00.000000", None)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name,query", CRUD_QUERIES, ids=[name for name, _ in CRUD_QUERIES])
+async def test_crud_query_uses_an_index(name, query, async_session_factory):
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        async with async_session_factory() as db:
+            await query(db)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    
+    assert statements
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+            # "SCAN table" without "USING ... INDEX" is a full table scan,
+            # unless it walks the table in primary key order under a LIMIT
+            full_scans = [
+                step for step in plan
+                if re.fullmatch(r"SCAN \w+", step)
+                and not re.search(rf"ORDER BY {step.split()[1]}\.id( DESC)?\s+LIMIT", statement)
+            ]
+            assert not full_scans, f"{name} scans without an index: {plan}\n{statement}"
+            assert not any("TEMP B-TREE" in step for step in plan), f"{name} sorts without an index: {plan}"
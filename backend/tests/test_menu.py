@@ -1,6 +1,10 @@
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services.menu_catalog import MenuCatalog
+from app.services.menu_search import MenuSearchIndex
 
 client = TestClient(app)
 
@@ -16,4 +20,165 @@ def test_get_menu_items():
 
 def test_get_menu_item_not_found():
     response = client.get("/api/v1/menu/items/99999")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_get_menu_items_within_query_budget(assert_max_queries, auth_headers):
+    headers = auth_headers("menu-admin@example.com", role="admin")
+    
+    response = client.post(
+        "/api/v1/menu/categories",
+        json={"name": "Budget", "slug": "menu-budget"},
+        headers=headers
+    )
+    category_id = response.json()["id"]
+    for i in range(20):
+        client.post(
+            "/api/v1/menu/items",
+            json={"name": f"Budget dish {i}", "price": 5.0, "category_id": category_id},
+            headers=headers
+        )
+    
+    # Items and their categories in a single joined query
+    with assert_max_queries(1):
+        response = client.get("/api/v1/menu/items")
+    assert response.status_code == 200
+    assert len(response.json()) >= 20
+    assert all(item["category"] is not None for item in response.json())
+
+def test_menu_catalog_etags_and_invalidation(assert_max_queries, auth_headers):
+    headers = auth_headers("catalog-admin@example.com", role="admin")
+    category_id = client.post(
+        "/api/v1/menu/categories",
+        json={"name": "Catalog", "slug": "menu-catalog"},
+        headers=headers
+    ).json()["id"]
+    item_id = client.post(
+        "/api/v1/menu/items",
+        json={"name": "Catalog dish", "price": 7.5, "category_id": category_id},
+        headers=headers
+    ).json()["id"]
+    
+    response = client.get("/api/v1/menu/items")
+    etag = response.headers["etag"]
+    assert any(item["id"] == item_id for item in response.json())
+    
+    # Warm catalog: no database work, and a matching ETag gets an empty 304
+    with assert_max_queries(0):
+        cached = client.get("/api/v1/menu/items")
+        not_modified = client.get("/api/v1/menu/items", headers={"If-None-Match": etag})
+    assert cached.content == response.content
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    
+    # Writes bump the revision, so the old ETag no longer matches
+    client.put(f"/api/v1/menu/items/{item_id}", json={"price": 8.0}, headers=headers)
+    response = client.get("/api/v1/menu/items", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert next(item for item in response.json() if item["id"] == item_id)["price"] == 8.0
+    
+    categories = client.get("/api/v1/menu/categories")
+    client.put(f"/api/v1/menu/categories/{category_id}", json={"is_active": False}, headers=headers)
+    response = client.get("/api/v1/menu/categories", headers={"If-None-Match": categories.headers["etag"]})
+    assert response.status_code == 200
+    assert all(category["id"] != category_id for category in response.json())
+
+@pytest.mark.asyncio
+async def test_menu_catalog_revision_is_shared_between_workers(async_session_factory):
+    # Two catalogs stand in for two workers sharing the cache backend
+    worker_a, worker_b = MenuCatalog(), MenuCatalog()
+    async with async_session_factory() as db:
+        stale = await worker_b.items(db)
+        await worker_a.invalidate()
+        assert await worker_b.items(db) is not stale
+        assert await worker_b.items(db) is await worker_b.items(db)
+
+def test_menu_snapshot_is_served_precompressed():
+    plain = client.get("/api/v1/menu/items", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    
+    for encoding in ("gzip", "br"):
+        response = client.get("/api/v1/menu/items", headers={"Accept-Encoding": encoding})
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json() == plain.json()
+        
+        # An ETag from any encoding of the same snapshot revalidates
+        response = client.get(
+            "/api/v1/menu/items",
+            headers={"Accept-Encoding": "identity", "If-None-Match": response.headers["etag"]}
+        )
+        assert response.status_code == 304
+
+def test_menu_search(auth_headers):
+    headers = auth_headers("search-admin@example.com", role="admin")
+    category_id = client.post(
+        "/api/v1/menu/categories",
+        json={"name": "Grill", "slug": "menu-search-grill"},
+        headers=headers
+    ).json()["id"]
+    plain_id = client.post(
+        "/api/v1/menu/items",
+        json={"name": "Peppered chicken", "description": "Smoky and hot", "price": 9.0, "category_id": category_id},
+        headers=headers
+    ).json()["id"]
+    featured_id = client.post(
+        "/api/v1/menu/items",
+        json={"name": "Suya chicken", "price": 11.0, "category_id": category_id},
+        headers=headers
+    ).json()["id"]
+    client.put(f"/api/v1/menu/items/{featured_id}", json={"is_featured": True}, headers=headers)
+    
+    def search(q):
+        response = client.get("/api/v1/menu/search", params={"q": q})
+        assert response.status_code == 200
+        return [item["id"] for item in response.json()]
+    
+    # Whole words, prefixes, typos, accents and category names all match;
+    # featured items win ties
+    assert search("chicken")[:2] == [featured_id, plain_id]
+    assert search("chick")[:2] == [featured_id, plain_id]
+    assert search("chiken")[:2] == [featured_id, plain_id]
+    assert search("smôky") == [plain_id]
+    assert set(search("grill chicken")) == {plain_id, featured_id}
+    # A name match outranks a description match
+    assert search("peppered hot") == [plain_id]
+    assert search("zzzz") == []
+    
+    # The index follows menu writes
+    client.put(f"/api/v1/menu/items/{plain_id}", json={"name": "Peppered turkey"}, headers=headers)
+    assert plain_id not in search("chicken")
+    assert search("turkey") == [plain_id]
+    client.delete(f"/api/v1/menu/items/{featured_id}", headers=headers)
+    assert featured_id not in search("suya")
+    
+    assert client.get("/api/v1/menu/search", params={"q": ""}).status_code == 422
+
+def test_menu_search_index_is_fast_on_large_catalogs():
+    words = ["jollof", "rice", "chicken", "beef", "suya", "plantain", "pepper", "soup", "egusi", "yam",
+             "fried", "grilled", "spicy", "sweet", "stew", "fish", "goat", "beans", "moi", "puff"]
+    categories = [{"id": i, "name": name} for i, name in enumerate(["Mains", "Sides", "Soups", "Drinks"])]
+    index = MenuSearchIndex()
+    index.sync(
+        {
+            "id": i,
+            "name": f"{words[i % 20]} {words[i // 20 % 20]} {i}",
+            "description": f"{words[i // 400 % 20]} with {words[i * 7 % 20]}",
+            "category": categories[i % 4],
+            "category_id": i % 4,
+            "is_featured": i % 50 == 0,
+            "is_available": i % 10 != 0
+        }
+        for i in range(20000)
+    )
+    
+    queries = ["chicken", "chi", "chiken", "spicy chicken", "soups", "jollof rice 123"]
+    started = time.perf_counter()
+    for _ in range(20):
+        for query in queries:
+            assert index.search(query)
+    per_query = (time.perf_counter() - started) / (20 * len(queries))
+    # Sub-millisecond in practice; the bound leaves room for slow CI machines
+    assert per_query < 0.01
+
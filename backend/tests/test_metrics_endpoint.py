@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from app.main import app
+from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.services.notifications import NotificationWorker
+from app.services.payment_events import PaymentEventProcessor
+
+client = TestClient(app)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_TOKEN = "test-metrics-token"
+
+@pytest.fixture(autouse=True)
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", METRICS_TOKEN)
+
+def scrape() -> dict:
+    """(sample name, sorted labels) -> value from GET /metrics"""
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {METRICS_TOKEN}"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+def test_metrics_export_requests_caches_queues_and_hash_pool():
+    client.get("/health")
+    samples = scrape()
+    
+    health = (("method", "GET"), ("route", "/health"))
+    assert samples[("http_request_duration_seconds_count", health)] >= 1
+    assert samples[("http_requests_total", health + (("status", "200"),))] >= 1
+    # The scrape itself is in progress while the page is rendered
+    assert samples[("http_requests_in_progress", ())] >= 1
+    assert samples[("thread_pool_capacity", (("pool", "password_hash"),))] > 0
+    assert ("thread_pool_pending", (("pool", "password_hash"),)) in samples
+    for cache in ("users", "tokens"):
+        assert ("cache_requests_total", (("cache", cache), ("result", "hit"))) in samples
+
+def test_metrics_need_the_token(monkeypatch):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+
+@pytest.mark.asyncio
+async def test_workers_report_queue_depth(async_session_factory, query_counter):
+    await NotificationWorker(session_factory=async_session_factory).report_depth()
+    await PaymentEventProcessor(session_factory=async_session_factory).report_depth()
+    
+    for queue in ("notifications", "payment_events"):
+        assert REGISTRY.get_sample_value("queue_depth", {"queue": queue}) >= 0
+    # The scrape itself only renders what is already there
+    query_counter.clear()
+    scrape()
+    assert query_counter == []
+
+def test_cache_lookups_are_counted(auth_headers):
+    headers = auth_headers("metrics-cache@example.com")
+    hits = REGISTRY.get_sample_value("cache_requests_total", {"cache": "tokens", "result": "hit"})
+    
+    for _ in range(2):
+        client.get("/api/v1/users/me", headers=headers)
+    # The first request may miss; the second finds the verified token
+    assert REGISTRY.get_sample_value("cache_requests_total", {"cache": "tokens", "result": "hit"}) > hits
+
+def test_pool_gauges_follow_checkouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=2)
+    instrument_engine(engine)
+    waits = REGISTRY.get_sample_value("db_pool_wait_seconds_count")
+    
+    first = engine.connect()
+    second = engine.connect()
+    assert REGISTRY.get_sample_value("db_pool_size") == 1
+    assert REGISTRY.get_sample_value("db_pool_checked_out") == 2
+    assert REGISTRY.get_sample_value("db_pool_overflow") == 1
+    assert REGISTRY.get_sample_value("db_pool_wait_seconds_count") == waits + 2
+    
+    second.close()
+    first.close()
+    assert REGISTRY.get_sample_value("db_pool_checked_out") == 0
+    engine.dispose()
+
+def test_multiprocess_metrics_are_summed_over_workers(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    
+    def run(code: str) -> str:
+        return subprocess.run(
+            [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True
+        ).stdout
+    
+    worker = (
+        "from app.core.metrics import CACHE_REQUESTS, THREAD_POOL_CAPACITY\n"
+        "CACHE_REQUESTS.labels('users', 'hit').inc(3)\n"
+        "THREAD_POOL_CAPACITY.labels('password_hash').set(5)\n"
+    )
+    run(worker)
+    run(worker + "from app.core.metrics import mark_process_dead\nmark_process_dead()\n")
+    
+    samples = {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(
+            run("from app.core.metrics import render_metrics\nprint(render_metrics()[0].decode())")
+        )
+        for sample in family.samples
+    }
+    assert samples[("cache_requests_total", (("cache", "users"), ("result", "hit")))] == 6
+    # The worker that marked itself dead no longer adds to the live gauges
+    assert samples[("thread_pool_capacity", (("pool", "password_hash"),))] == 5
@@ -0,0 +1,315 @@
+import asyncio
+import socket
+import time
+from datetime import datetime, timedelta
+from itertools import cycle
+
+import pytest
+from aiosmtpd.controller import Controller
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, update
+from app.main import app
+from app.core.config import settings
+from app.crud.notification import queue_email
+from app.crud.reservation import mark_reminders_sent
+from app.db.models import Notification, NotificationChannel, NotificationStatus, Reservation, ReservationStatus, User
+from app.services.email import EmailService, OutgoingEmail
+from app.services.notifications import NotificationWorker
+from app.services.reminders import ReminderScheduler
+
+client = TestClient(app)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class RecordingHandler:
+    """Stand-in mail server that keeps what it receives, optionally slowly"""
+    
+    def __init__(self):
+        self.messages = []
+        self.delay = 0.0
+        self.refused = set()
+    
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refused:
+            return "550 No such user here"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+    
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.delay)
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(settings, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(settings, "SMTP_USER", "")
+    monkeypatch.setattr(settings, "SMTP_FROM_EMAIL", "TastyBite <no-reply@tastybite.test>")
+    try:
+        yield handler
+    finally:
+        controller.stop()
+
+@pytest.fixture
+def worker(smtp_server, async_session_factory):
+    return NotificationWorker(session_factory=async_session_factory, batch_size=500)
+
+def drain(worker: NotificationWorker) -> int:
+    delivered = 0
+    while True:
+        count = asyncio.run(worker.drain_once())
+        if not count:
+            return delivered
+        delivered += count
+
+def outbox(db_session, recipient: str):
+    db_session.expire_all()
+    return db_session.query(Notification).filter(Notification.recipient == recipient).order_by(Notification.id).all()
+
+def test_confirmation_is_queued_with_the_booking_and_sent_later(smtp_server, worker, db_session, auth_headers):
+    headers = auth_headers("notify-booking@example.com", role="admin", phone="+233200000000")
+    client.post(
+        "/api/v1/tables/",
+        json={"name": "Notify 1", "capacity": 12, "table_type": "private"},
+        headers=headers
+    )
+    table = next(t for t in client.get("/api/v1/tables/").json() if t["name"] == "Notify 1")
+    
+    # However slow the mail server is, the booking does not wait for it
+    smtp_server.delay = 2.0
+    started = time.perf_counter()
+    response = client.post(
+        f"/api/v1/tables/confirm-reservation?table_id={table['id']}",
+        json={"reservation_date": "2031-09-01T19:00:00", "party_size": 2},
+        headers=headers
+    )
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200
+    assert response.json()["confirmation_sent"] is True
+    assert elapsed < 1.0
+    assert smtp_server.messages == []
+    
+    email = outbox(db_session, "notify-booking@example.com")
+    sms = outbox(db_session, "+233200000000")
+    assert [n.status for n in email] == [NotificationStatus.PENDING]
+    assert email[0].subject == "Reservation Confirmation - TastyBite"
+    assert sms[-1].channel == NotificationChannel.SMS
+    assert response.json()["reservation_id"] in sms[-1].body
+    
+    smtp_server.delay = 0.0
+    assert drain(worker) >= 2
+    email = outbox(db_session, "notify-booking@example.com")
+    assert email[0].status == NotificationStatus.SENT
+    assert email[0].attempts == 1
+    assert email[0].sent_at is not None
+    assert any(envelope.rcpt_tos == ["notify-booking@example.com"] for envelope in smtp_server.messages)
+    
+    # Keep the table out of other modules' availability checks
+    client.put(f"/api/v1/tables/{table['id']}", json={"is_active": False}, headers=headers)
+
+def test_order_confirmation_is_queued(smtp_server, worker, db_session, auth_headers):
+    headers = auth_headers("notify-order@example.com", role="admin", phone="+233200000000")
+    category = client.post(
+        "/api/v1/menu/categories",
+        json={"name": "Notify", "slug": "notify"},
+        headers=headers
+    ).json()
+    item = client.post(
+        "/api/v1/menu/items",
+        json={"name": "Notify Dish", "price": 12.0, "category_id": category["id"]},
+        headers=headers
+    ).json()
+    
+    response = client.post(
+        "/api/v1/orders/",
+        json={"order_type": "takeout", "items": [{"menu_item_id": item["id"], "quantity": 1}]},
+        headers=headers
+    )
+    assert response.status_code == 200
+    
+    [queued] = outbox(db_session, "notify-order@example.com")
+    assert queued.subject == f"Order Confirmation - {response.json()['order_number']}"
+    drain(worker)
+    assert outbox(db_session, "notify-order@example.com")[0].status == NotificationStatus.SENT
+
+def test_failed_sends_back_off_then_give_up(smtp_server, worker, db_session, async_session_factory, monkeypatch):
+    # Leave only this test's notification due
+    drain(worker)
+    monkeypatch.setattr(settings, "NOTIFICATION_RETRY_SECONDS", 60)
+    monkeypatch.setattr(settings, "NOTIFICATION_MAX_ATTEMPTS", 3)
+    
+    async def queue():
+        async with async_session_factory() as db:
+            queue_email(db, "notify-unreachable@example.com", "Subject", "Body")
+            await db.commit()
+    asyncio.run(queue())
+    
+    # Nothing listens on this port
+    worker.email_service.pool.close()
+    worker.email_service.pool.port = free_port()
+    
+    def attempt() -> Notification:
+        started = datetime.utcnow()
+        assert asyncio.run(worker.drain_once()) == 1
+        [notification] = outbox(db_session, "notify-unreachable@example.com")
+        notification.delay = notification.next_attempt_at - started
+        return notification
+    
+    def make_due(notification: Notification):
+        db_session.execute(
+            update(Notification).where(Notification.id == notification.id).values(next_attempt_at=datetime.utcnow())
+        )
+        db_session.commit()
+    
+    first = attempt()
+    assert first.status == NotificationStatus.PENDING
+    assert first.attempts == 1
+    assert first.last_error
+    assert timedelta(seconds=59) < first.delay <= timedelta(seconds=61)
+    
+    # Not retried before its backoff runs out
+    assert asyncio.run(worker.drain_once()) == 0
+    
+    make_due(first)
+    second = attempt()
+    assert second.status == NotificationStatus.PENDING
+    assert timedelta(seconds=119) < second.delay <= timedelta(seconds=121)
+    
+    make_due(second)
+    third = attempt()
+    assert third.status == NotificationStatus.FAILED
+    assert third.attempts == 3
+    assert third.sent_at is None
+    
+    make_due(third)
+    assert asyncio.run(worker.drain_once()) == 0
+
+def test_send_bulk_reuses_one_session(smtp_server):
+    service = EmailService()
+    emails = [OutgoingEmail([f"guest{i}@example.com"], "Reminder", "See you tonight") for i in range(20)]
+    assert service.send_bulk(emails) == [None] * 20
+    service.deliver(["late@example.com"], "Reminder", "See you tonight")
+    
+    assert len(smtp_server.messages) == 21
+    assert service.pool.connects == 1
+    service.pool.close()
+
+def test_refused_recipient_does_not_end_the_session(smtp_server):
+    smtp_server.refused.add("gone@example.com")
+    service = EmailService()
+    errors = service.send_bulk([
+        OutgoingEmail(["first@example.com"], "Reminder", "Body"),
+        OutgoingEmail(["gone@example.com"], "Reminder", "Body"),
+        OutgoingEmail(["last@example.com"], "Reminder", "Body")
+    ])
+    
+    assert errors[0] is None and errors[2] is None
+    assert "No such user" in str(errors[1])
+    assert service.pool.connects == 1
+    service.pool.close()
+
+def test_stale_sessions_are_replaced(smtp_server, monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "SMTP_PORT", controller.port)
+    service = EmailService()
+    service.deliver(["before@example.com"], "Reminder", "Body")
+    
+    # The server restarts, dropping the pooled session without telling us
+    controller.stop()
+    controller = Controller(handler, hostname="127.0.0.1", port=controller.port)
+    controller.start()
+    try:
+        service.deliver(["after@example.com"], "Reminder", "Body")
+        assert service.pool.connects == 2
+        
+        # Sessions idle past the pool's limit are not reused at all
+        service.pool.idle_seconds = 0
+        service.deliver(["idle@example.com"], "Reminder", "Body")
+        assert service.pool.connects == 3
+        assert [envelope.rcpt_tos for envelope in handler.messages] == [
+            ["before@example.com"], ["after@example.com"], ["idle@example.com"]
+        ]
+    finally:
+        service.pool.close()
+        controller.stop()
+
+@pytest.mark.asyncio
+async def test_reminders_are_queued_once_per_reservation(db_session, async_session_factory, query_counter, auth_headers):
+    auth_headers("notify-reminders@example.com", phone="+233200000000")
+    user = db_session.query(User).filter(User.email == "notify-reminders@example.com").first()
+    service_start = datetime(2032, 2, 1, 18, 0)
+    statuses = cycle([ReservationStatus.CONFIRMED, ReservationStatus.PENDING, ReservationStatus.CANCELLED])
+    rows = [
+        {
+            "customer_id": user.id,
+            # Spread over 18:00-21:59, then a few the next day
+            "reservation_date": service_start + timedelta(minutes=i % 240, days=i // 1200),
+            "party_size": 2,
+            "status": next(statuses)
+        }
+        for i in range(1250)
+    ]
+    db_session.execute(insert(Reservation), rows)
+    db_session.commit()
+    def due_between(start: datetime, end: datetime) -> int:
+        return sum(
+            1 for row in rows
+            if row["status"] != ReservationStatus.CANCELLED and start <= row["reservation_date"] < end
+        )
+    due = due_between(service_start, service_start + timedelta(hours=3))
+    
+    scheduler = ReminderScheduler(session_factory=async_session_factory, batch_size=200, lead=timedelta(hours=3))
+    query_counter.clear()
+    assert await scheduler.dispatch(now=service_start) == due
+    # Per batch: the range query, the stamp UPDATE and the outbox INSERT (the
+    # user has a phone, so emails and SMS both go in the one executemany)
+    batches = -(-due // 200)
+    assert len(query_counter) <= 3 * batches + 1
+    
+    # Running again (or in another worker) queues nothing new; a later run
+    # only picks up the reservations that came into the window since
+    assert await scheduler.dispatch(now=service_start) == 0
+    later = service_start + timedelta(minutes=30)
+    newly_due = due_between(service_start + timedelta(hours=3), later + timedelta(hours=3))
+    assert newly_due > 0
+    assert await scheduler.dispatch(now=later) == newly_due
+    due += newly_due
+    
+    emails = db_session.query(Notification).filter(
+        Notification.recipient == "notify-reminders@example.com",
+        Notification.subject == "Reservation Reminder - TastyBite"
+    ).count()
+    assert emails == due
+    sms = db_session.query(Notification).filter(
+        Notification.recipient == "+233200000000",
+        Notification.body.contains("Reminder")
+    ).count()
+    assert sms == due
+
+@pytest.mark.asyncio
+async def test_concurrent_reminder_runs_split_the_reservations(db_session, async_session_factory, auth_headers):
+    auth_headers("notify-race@example.com", phone="+233200000000")
+    user = db_session.query(User).filter(User.email == "notify-race@example.com").first()
+    result = db_session.execute(
+        insert(Reservation).returning(Reservation.id),
+        [{"customer_id": user.id, "reservation_date": datetime(2032, 3, 1, 19), "party_size": 2} for _ in range(4)]
+    )
+    ids = sorted(result.scalars())
+    db_session.commit()
+    
+    async with async_session_factory() as first, async_session_factory() as second:
+        assert await mark_reminders_sent(first, ids[:2], datetime.utcnow()) == ids[:2]
+        await first.commit()
+        # The second run only gets the ones the first did not stamp
+        assert await mark_reminders_sent(second, ids, datetime.utcnow()) == ids[2:]
+        await second.commit()
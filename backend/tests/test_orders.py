@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+def create_menu_items(headers: dict, count: int, slug: str) -> list:
+    response = client.post(
+        "/api/v1/menu/categories",
+        json={"name": "Order Test", "slug": slug},
+        headers=headers
+    )
+    category_id = response.json()["id"]
+    
+    item_ids = []
+    for i in range(count):
+        response = client.post(
+            "/api/v1/menu/items",
+            json={"name": f"Dish {i}", "price": 10.0 + i, "category_id": category_id},
+            headers=headers
+        )
+        item_ids.append(response.json()["id"])
+    return item_ids
+
+def test_create_order(auth_headers):
+    headers = auth_headers("order-admin@example.com", role="admin")
+    item_ids = create_menu_items(headers, 2, "order-test")
+    
+    response = client.post(
+        "/api/v1/orders/",
+        json={
+            "order_type": "takeout",
+            "items": [
+                {"menu_item_id": item_ids[0], "quantity": 2},
+                {"menu_item_id": item_ids[1], "quantity": 1, "special_instructions": "No pepper"},
+                {"menu_item_id": 99999, "quantity": 1}
+            ]
+        },
+        headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["subtotal"] == 31.0
+    assert data["total_amount"] == pytest.approx(31.0 * 1.18)
+    assert len(data["order_items"]) == 2
+    assert data["created_at"] is not None
+
+def test_create_order_statement_count_is_independent_of_items(query_counter, auth_headers):
+    headers = auth_headers("order-bulk@example.com", role="admin")
+    item_ids = create_menu_items(headers, 15, "order-bulk")
+    
+    counts = []
+    for size in (1, 15):
+        query_counter.clear()
+        response = client.post(
+            "/api/v1/orders/",
+            json={
+                "order_type": "dine_in",
+                "items": [{"menu_item_id": item_id, "quantity": 1} for item_id in item_ids[:size]]
+            },
+            headers=headers
+        )
+        assert response.status_code == 200
+        assert len(response.json()["order_items"]) == size
+        counts.append(len(query_counter))
+    
+    # Menu item IN query, order INSERT, order item INSERT, daily sales, item
+    # sales and item total upserts, the confirmation email INSERT into the
+    # outbox, then the order and its items loaded back (the user comes from
+    # the authenticated-user cache)
+    assert counts == [9, 9]
+
+def test_order_lists_stay_within_query_budget(assert_max_queries, auth_headers):
+    headers = auth_headers("order-budget@example.com", role="admin")
+    item_ids = create_menu_items(headers, 3, "order-budget")
+    for _ in range(20):
+        client.post(
+            "/api/v1/orders/",
+            json={
+                "order_type": "takeout",
+                "items": [{"menu_item_id": item_id, "quantity": 1} for item_id in item_ids]
+            },
+            headers=headers
+        )
+    
+    # User lookup (on a cache miss), orders page, order_items for the whole page
+    for url in ("/api/v1/orders/", "/api/v1/orders/my-orders", "/api/v1/admin/recent-orders?limit=20"):
+        with assert_max_queries(3):
+            response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        # The admin list is cursor-paginated
+        orders = response.json()["items"] if url == "/api/v1/orders/" else response.json()
+        assert len(orders) >= 20
+        assert all(len(order["order_items"]) == 3 for order in orders[:20])
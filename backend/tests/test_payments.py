@@ -0,0 +1,341 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.api.deps import get_payment_service
+from app.core.config import settings
+from app.crud.payment import store_payment_events
+from app.db.models import DailySales, Order, Payment, PaymentEvent, PaymentStatus
+from app.services.payment import PaymentError, PaymentService, webhook_signature
+from app.services.payment_events import PaymentEventProcessor, PaymentEventQueue, event_values
+from tests.conftest import async_engine
+from tests.fake_stripe import FakeStripe
+
+client = TestClient(app)
+
+def place_order(headers: dict, slug: str) -> dict:
+    category = client.post(
+        "/api/v1/menu/categories",
+        json={"name": "Payment Test", "slug": slug},
+        headers=headers
+    ).json()
+    item = client.post(
+        "/api/v1/menu/items",
+        json={"name": "Paid Dish", "price": 31.0, "category_id": category["id"]},
+        headers=headers
+    ).json()
+    return client.post(
+        "/api/v1/orders/",
+        json={"order_type": "takeout", "items": [{"menu_item_id": item["id"], "quantity": 1}]},
+        headers=headers
+    ).json()
+
+@pytest.fixture
+def stripe():
+    fake = FakeStripe()
+    service = PaymentService(
+        api_key="sk_test_fake",
+        base_url="https://stripe.test",
+        transport=httpx.ASGITransport(app=fake.app),
+        retry_delay=0
+    )
+    app.dependency_overrides[get_payment_service] = lambda: service
+    try:
+        yield fake
+    finally:
+        del app.dependency_overrides[get_payment_service]
+
+def test_pay_for_an_order(stripe, db_session, auth_headers):
+    headers = auth_headers("payment-admin@example.com", role="admin")
+    order = place_order(headers, "payment-flow")
+    
+    response = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers)
+    assert response.status_code == 200
+    intent = response.json()
+    assert intent["client_secret"].startswith(intent["payment_intent_id"])
+    assert stripe.intents[intent["payment_intent_id"]]["amount"] == round(order["total_amount"] * 100)
+    assert stripe.intents[intent["payment_intent_id"]]["metadata"]["order_id"] == str(order["id"])
+    
+    # Asking again (a double click, a retry) gets the same intent back
+    again = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers).json()
+    assert again["payment_intent_id"] == intent["payment_intent_id"]
+    assert len(stripe.intents) == 1
+    
+    payment = db_session.query(Payment).filter(Payment.order_id == order["id"]).one()
+    assert payment.stripe_payment_intent_id == intent["payment_intent_id"]
+    assert payment.status == PaymentStatus.PENDING
+    
+    # Not paid yet
+    response = client.post(f"/api/v1/payments/{order['id']}/confirm", headers=headers)
+    assert response.json()["status"] == "pending"
+    
+    stripe.succeed(intent["payment_intent_id"])
+    response = client.post(f"/api/v1/payments/{order['id']}/confirm", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "paid"
+    assert client.get(f"/api/v1/orders/{order['id']}", headers=headers).json()["payment_status"] == "paid"
+    
+    response = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers)
+    assert response.status_code == 400
+
+def test_a_canceled_intent_is_replaced(stripe, auth_headers):
+    headers = auth_headers("payment-cancel@example.com", role="admin")
+    order = place_order(headers, "payment-cancel")
+    
+    first = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers).json()
+    stripe.cancel(first["payment_intent_id"])
+    
+    # Noticed on the next attempt, without a confirm in between
+    second = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers).json()
+    assert second["payment_intent_id"] != first["payment_intent_id"]
+    assert second["status"] == "requires_payment_method"
+    
+    # And after a confirm recorded the failure
+    stripe.cancel(second["payment_intent_id"])
+    response = client.post(f"/api/v1/payments/{order['id']}/confirm", headers=headers)
+    assert response.json()["status"] == "failed"
+    third = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers).json()
+    assert third["payment_intent_id"] not in (first["payment_intent_id"], second["payment_intent_id"])
+    assert len(stripe.intents) == 3
+
+def test_no_database_connection_is_held_during_stripe_calls(stripe, auth_headers):
+    headers = auth_headers("payment-conn@example.com", role="admin")
+    order = place_order(headers, "payment-conn")
+    
+    open_connections = []
+    checked_out = set()
+    
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out.add(id(connection_record))
+    
+    def checkin(dbapi_connection, connection_record):
+        checked_out.discard(id(connection_record))
+    
+    pool = async_engine.sync_engine.pool
+    event.listen(pool, "checkout", checkout)
+    event.listen(pool, "checkin", checkin)
+    stripe.on_request = lambda: open_connections.append(len(checked_out))
+    try:
+        assert client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers).status_code == 200
+        assert client.post(f"/api/v1/payments/{order['id']}/confirm", headers=headers).status_code == 200
+    finally:
+        event.remove(pool, "checkout", checkout)
+        event.remove(pool, "checkin", checkin)
+    
+    assert open_connections == [0, 0]
+
+def test_transient_failures_are_retried_with_the_same_idempotency_key(stripe, auth_headers):
+    headers = auth_headers("payment-retry@example.com", role="admin")
+    order = place_order(headers, "payment-retry")
+    
+    stripe.fail_next = [503, 500]
+    response = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers)
+    assert response.status_code == 200
+    attempts = [request for request in stripe.requests if request["path"] == "/v1/payment_intents"]
+    assert len(attempts) == 3
+    assert len({request["idempotency_key"] for request in attempts}) == 1
+    
+    # Stripe staying down is a bad gateway; Stripe refusing is a bad request
+    stripe.fail_next = [503, 503, 503]
+    response = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers)
+    assert response.status_code == 502
+    stripe.fail_next = [402]
+    response = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Payment error: Injected failure"
+
+@pytest.mark.asyncio
+async def test_payment_client_refunds_and_errors():
+    fake = FakeStripe()
+    service = PaymentService(
+        api_key="sk_test_fake",
+        base_url="https://stripe.test",
+        transport=httpx.ASGITransport(app=fake.app),
+        retry_delay=0
+    )
+    intent = await service.create_payment_intent(20.0, metadata={"order_id": 1})
+    fake.succeed(intent["payment_intent_id"])
+    assert (await service.confirm_payment(intent["payment_intent_id"]))["amount"] == 20.0
+    refund = await service.refund_payment(intent["payment_intent_id"], amount=5.5)
+    assert refund["amount"] == 5.5
+    
+    with pytest.raises(PaymentError) as error:
+        await service.confirm_payment("pi_missing")
+    assert error.value.status_code == 404
+    await service.aclose()
+    
+    unreachable = PaymentService(api_key="sk_test_fake", base_url="http://127.0.0.1:9", max_retries=1, retry_delay=0)
+    with pytest.raises(PaymentError) as error:
+        await unreachable.confirm_payment("pi_any")
+    assert error.value.status_code is None
+    await unreachable.aclose()
+
+WEBHOOK_SECRET = "whsec_test"
+
+@pytest.fixture
+def processor(monkeypatch, async_session_factory):
+    monkeypatch.setattr(settings, "STRIPE_WEBHOOK_SECRET", WEBHOOK_SECRET)
+    return PaymentEventProcessor(session_factory=async_session_factory, batch_size=500)
+
+def intent_event(event_id: str, event_type: str, intent_id: str, created: int, order_id: int = None) -> dict:
+    obj = {"id": intent_id, "object": "payment_intent", "amount": 3658, "currency": "ghs", "metadata": {}}
+    if order_id is not None:
+        obj["metadata"]["order_id"] = str(order_id)
+    if event_type == "charge.refunded":
+        obj = {"id": f"ch_{intent_id}", "object": "charge", "payment_intent": intent_id, "amount": 3658}
+    return {"id": event_id, "type": event_type, "created": created, "data": {"object": obj}}
+
+def send_webhook(event: dict, secret: str = WEBHOOK_SECRET, timestamp: int = None):
+    payload = json.dumps(event).encode()
+    signature = webhook_signature(payload, secret, timestamp or int(time.time()))
+    return client.post(
+        "/api/v1/payments/webhook",
+        content=payload,
+        headers={"Stripe-Signature": signature, "Content-Type": "application/json"}
+    )
+
+def drain(processor: PaymentEventProcessor) -> int:
+    applied = 0
+    while True:
+        count = asyncio.run(processor.drain_once())
+        if not count:
+            return applied
+        applied += count
+
+def paid_orders_today(db_session) -> int:
+    db_session.expire_all()
+    sales = db_session.query(DailySales).order_by(DailySales.day.desc()).first()
+    return sales.paid_order_count if sales else 0
+
+def test_webhook_marks_an_order_paid_once(stripe, processor, db_session, auth_headers):
+    headers = auth_headers("payment-webhook@example.com", role="admin")
+    order = place_order(headers, "payment-webhook")
+    intent = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers).json()
+    paid_before = paid_orders_today(db_session)
+    
+    event = intent_event("evt_paid_1", "payment_intent.succeeded", intent["payment_intent_id"], int(time.time()))
+    response = send_webhook(event)
+    assert response.status_code == 200
+    assert response.json() == {"received": True, "duplicate": False}
+    # Stripe redelivers until it sees a 2xx; the copy is acknowledged, not stored
+    assert send_webhook(event).json() == {"received": True, "duplicate": True}
+    assert db_session.query(PaymentEvent).filter(PaymentEvent.event_id == "evt_paid_1").count() == 1
+    
+    assert drain(processor) == 1
+    assert client.get(f"/api/v1/orders/{order['id']}", headers=headers).json()["payment_status"] == "paid"
+    assert paid_orders_today(db_session) == paid_before + 1
+    
+    # Types that do not touch a payment are acknowledged and dropped
+    response = send_webhook({"id": "evt_other", "type": "customer.created", "created": 1, "data": {"object": {}}})
+    assert response.json() == {"received": True}
+    assert drain(processor) == 0
+
+def test_webhook_events_apply_in_stripe_order(stripe, processor, db_session, auth_headers):
+    headers = auth_headers("payment-webhook-order@example.com", role="admin")
+    order = place_order(headers, "payment-webhook-order")
+    intent_id = client.post("/api/v1/payments/intent", json={"order_id": order["id"]}, headers=headers).json()["payment_intent_id"]
+    paid_before = paid_orders_today(db_session)
+    now = int(time.time())
+    
+    # Delivered out of order, across two batches: the refund is newer
+    send_webhook(intent_event("evt_order_2", "charge.refunded", intent_id, now + 10))
+    drain(processor)
+    send_webhook(intent_event("evt_order_1", "payment_intent.succeeded", intent_id, now))
+    drain(processor)
+    assert client.get(f"/api/v1/orders/{order['id']}", headers=headers).json()["payment_status"] == "refunded"
+    
+    # And within one batch
+    send_webhook(intent_event("evt_order_4", "payment_intent.succeeded", intent_id, now + 30))
+    send_webhook(intent_event("evt_order_3", "payment_intent.payment_failed", intent_id, now + 20))
+    assert drain(processor) == 2
+    assert client.get(f"/api/v1/orders/{order['id']}", headers=headers).json()["payment_status"] == "paid"
+    assert paid_orders_today(db_session) == paid_before + 1
+
+def test_webhook_for_an_intent_not_saved_yet(processor, db_session, auth_headers):
+    headers = auth_headers("payment-webhook-orphan@example.com", role="admin")
+    order = place_order(headers, "payment-webhook-orphan")
+    
+    send_webhook(intent_event("evt_orphan", "payment_intent.succeeded", "pi_orphan", int(time.time()), order["id"]))
+    drain(processor)
+    db_session.expire_all()
+    payment = db_session.query(Payment).filter(Payment.order_id == order["id"]).one()
+    assert payment.stripe_payment_intent_id == "pi_orphan"
+    assert payment.status == PaymentStatus.PAID
+    assert db_session.get(Order, order["id"]).payment_status == PaymentStatus.PAID
+
+@pytest.mark.asyncio
+async def test_concurrent_webhooks_share_a_commit(async_session_factory, query_counter):
+    queue = PaymentEventQueue()
+    now = int(time.time())
+    events = [event_values(intent_event(f"evt_burst_{i}", "payment_intent.succeeded", f"pi_burst_{i}", now)) for i in range(20)]
+    
+    async def deliver(values):
+        async with async_session_factory() as db:
+            return await queue.enqueue(db, values)
+    
+    # A redelivery racing the original is stored once
+    stored = await asyncio.gather(*[deliver(values) for values in events + events[:1]])
+    assert stored.count(True) == 20
+    inserts = [statement for statement in query_counter if statement.startswith("INSERT INTO payment_events")]
+    assert len(inserts) == 2
+    assert await PaymentEventProcessor(session_factory=async_session_factory).drain_once() == 20
+
+@pytest.mark.asyncio
+async def test_webhook_writers_hand_over_and_survive_cancellation(async_session_factory, monkeypatch):
+    queue = PaymentEventQueue()
+    now = int(time.time())
+    events = [event_values(intent_event(f"evt_handover_{i}", "payment_intent.succeeded", f"pi_handover_{i}", now)) for i in range(3)]
+    batches = []
+    writers = []
+    gates = [asyncio.Event(), asyncio.Event()]
+    
+    async def gated_store(db, values):
+        batches.append([row["event_id"] for row in values])
+        writers.append(asyncio.current_task())
+        if len(batches) <= len(gates):
+            await gates[len(batches) - 1].wait()
+        return await store_payment_events(db, values)
+    
+    monkeypatch.setattr("app.services.payment_events.store_payment_events", gated_store)
+    
+    async def deliver(values):
+        async with async_session_factory() as db:
+            return await queue.enqueue(db, values)
+    
+    async def wait_for_batches(count):
+        while len(batches) < count:
+            await asyncio.sleep(0)
+    
+    first = asyncio.create_task(deliver(events[0]))
+    await wait_for_batches(1)
+    second = asyncio.create_task(deliver(events[1]))
+    third = asyncio.create_task(deliver(events[2]))
+    await asyncio.sleep(0)
+    
+    # The first writer returns after its own batch; a waiter writes the rest
+    gates[0].set()
+    assert await asyncio.wait_for(first, 5) is True
+    await wait_for_batches(2)
+    assert batches[1] == ["evt_handover_1", "evt_handover_2"]
+    
+    # Cancelling that writer leaves the other event to be written again
+    writer = writers[1]
+    waiter = third if writer is second else second
+    writer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await writer
+    assert await waiter is True
+    assert len(batches) == 3
+
+def test_webhook_signatures_are_checked(processor, db_session):
+    event = intent_event("evt_forged", "payment_intent.succeeded", "pi_forged", int(time.time()))
+    assert send_webhook(event, secret="whsec_wrong").status_code == 400
+    assert send_webhook(event, timestamp=int(time.time()) - 3600).status_code == 400
+    response = client.post("/api/v1/payments/webhook", content=json.dumps(event).encode())
+    assert response.status_code == 400
+    assert db_session.query(PaymentEvent).filter(PaymentEvent.event_id == "evt_forged").count() == 0
@@ -0,0 +1,49 @@
+import re
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.main import app
+from app.core.metrics import UNMATCHED_ROUTE
+
+client = TestClient(app)
+
+def server_timing(response) -> dict:
+    """metric name -> (dur, desc) from a Server-Timing header"""
+    timings = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, *params = entry.split(";")
+        values = dict(param.split("=", 1) for param in params)
+        timings[name] = (values.get("dur"), values.get("desc", "").strip('"'))
+    return timings
+
+def observed(metric: str, route: str, method: str = "GET") -> float:
+    return REGISTRY.get_sample_value(f"{metric}_count", {"method": method, "route": route}) or 0
+
+def test_server_timing_counts_each_request_s_queries(query_counter, auth_headers):
+    headers = auth_headers("metrics-orders@example.com")
+    
+    query_counter.clear()
+    response = client.get("/api/v1/orders/my-orders", headers=headers)
+    assert response.status_code == 200
+    timings = server_timing(response)
+    assert timings["db"][1] == f"{len(query_counter)} queries"
+    assert float(timings["db"][0]) > 0
+    assert float(timings["db-pool"][0]) >= 0
+    assert re.fullmatch(r"\d+", timings["db-rows"][1])
+
+def test_histograms_are_labelled_by_route_template(auth_headers):
+    headers = auth_headers("metrics-route@example.com")
+    route = "/api/v1/orders/{order_id}"
+    before = observed("http_request_db_queries", route)
+    
+    for order_id in (999991, 999992):
+        client.get(f"/api/v1/orders/{order_id}", headers=headers)
+    assert observed("http_request_db_queries", route) == before + 2
+    assert observed("http_request_db_seconds", route) >= before + 2
+    assert REGISTRY.get_sample_value(
+        "http_request_db_queries_count", {"method": "GET", "route": "/api/v1/orders/999991"}
+    ) is None
+    
+    before = observed("http_request_db_queries", UNMATCHED_ROUTE)
+    assert client.get("/no/such/page").status_code == 404
+    assert observed("http_request_db_queries", UNMATCHED_ROUTE) == before + 1
@@ -0,0 +1,62 @@
+import io
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.main import app
+from app.db import database
+from app.db.slow_query_log import SlowQueryLog
+from tests.conftest import async_engine, engine
+
+client = TestClient(app)
+
+def logged(stream: io.StringIO) -> list:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+def test_sql_echo_is_off_by_default():
+    assert not database.engine.echo
+    assert not database.async_engine.echo
+
+def test_slow_statements_are_logged_with_their_route():
+    stream = io.StringIO()
+    log = SlowQueryLog(threshold_ms=0, stream=stream)
+    log.install(async_engine.sync_engine)
+    try:
+        client.get("/api/v1/menu/items/999999")
+    finally:
+        log.remove(async_engine.sync_engine)
+    
+    lines = logged(stream)
+    assert lines
+    line = lines[0]
+    assert line["route"] == "/api/v1/menu/items/{item_id}"
+    assert line["method"] == "GET"
+    assert line["statement"].startswith("SELECT")
+    assert "999999" not in json.dumps(line)
+    assert line["duration_ms"] >= 0
+    assert len(line["params_fingerprint"]) == 16
+
+def test_fast_statements_are_not_logged_and_bursts_are_sampled():
+    stream = io.StringIO()
+    log = SlowQueryLog(threshold_ms=60000, stream=stream)
+    log.install(engine)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    finally:
+        log.remove(engine)
+    assert stream.getvalue() == ""
+    
+    log = SlowQueryLog(threshold_ms=0, max_per_second=3, stream=stream)
+    log.install(engine)
+    try:
+        with engine.connect() as connection:
+            for i in range(10):
+                connection.execute(text("SELECT :i"), {"i": i})
+    finally:
+        log.remove(engine)
+    lines = logged(stream)
+    # A second boundary may fall inside the loop; then the burst continues in the next window
+    assert 3 <= len(lines) <= 6
+    assert all(line["route"] is None for line in lines)
+    assert len({line["params_fingerprint"] for line in lines}) == len(lines)
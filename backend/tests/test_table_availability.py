@@ -0,0 +1,384 @@
+import asyncio
+import random
+import sqlite3
+import time
+from datetime import date, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+from sqlalchemy.exc import DBAPIError
+from app.main import app
+from app.crud.reservation import book_table, is_lock_conflict
+from app.db.models import Reservation, User
+from app.schemas.reservation import ReservationCreate
+from app.services.availability import availability_engine, DayIndex, TableInfo, SERVICE_SLOTS
+from tests.conftest import async_engine
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def admin_headers(auth_headers):
+    headers = auth_headers("tables-admin@example.com", role="admin")
+    for name, capacity in (("Window 1", 2), ("Booth 1", 4), ("Private 1", 8)):
+        client.post(
+            "/api/v1/tables/",
+            json={"name": name, "capacity": capacity, "table_type": "standard"},
+            headers=headers
+        )
+    return headers
+
+def check(date_str: str, time_str: str, party_size: int) -> dict:
+    response = client.post(
+        "/api/v1/tables/check-availability",
+        json={"date": date_str, "time": time_str, "party_size": party_size}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+def test_booked_table_blocks_overlapping_seatings(admin_headers):
+    first = check("2031-03-01", "19:00", 3)
+    assert first["available"] is True
+    assert first["table_name"] == "Booth 1"
+    
+    response = client.post(
+        f"/api/v1/tables/confirm-reservation?table_id={first['table_id']}",
+        json={"reservation_date": "2031-03-01T19:00:00", "party_size": 3},
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+    
+    # 90 minute seating: 20:00 overlaps, so the next fitting table is offered
+    assert check("2031-03-01", "20:00", 3)["table_name"] == "Private 1"
+    assert check("2031-03-01", "20:30", 3)["table_name"] == "Booth 1"
+    
+    # Same table again for an overlapping time is a conflict
+    response = client.post(
+        f"/api/v1/tables/confirm-reservation?table_id={first['table_id']}",
+        json={"reservation_date": "2031-03-01T19:30:00", "party_size": 2},
+        headers=admin_headers
+    )
+    assert response.status_code == 409
+
+def test_seating_duration_is_bounded(admin_headers):
+    table_id = check("2031-03-02", "19:00", 2)["table_id"]
+    for duration in (0, -30, 13 * 60):
+        response = client.post(
+            f"/api/v1/tables/confirm-reservation?table_id={table_id}",
+            json={"reservation_date": "2031-03-02T19:00:00", "party_size": 2, "duration_minutes": duration},
+            headers=admin_headers
+        )
+        assert response.status_code == 422
+    
+    response = client.post(
+        f"/api/v1/tables/confirm-reservation?table_id={table_id}",
+        json={"reservation_date": "2031-03-02T19:00:00", "party_size": 2, "duration_minutes": 12 * 60},
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+    reservation_id = int(response.json()["reservation_id"].split("-")[1])
+    response = client.put(
+        f"/api/v1/reservations/{reservation_id}",
+        json={"duration_minutes": 13 * 60},
+        headers=admin_headers
+    )
+    assert response.status_code == 422
+
+def test_update_rejects_null_for_required_fields(admin_headers):
+    reservation = client.get("/api/v1/reservations/my-reservations", headers=admin_headers).json()[0]
+    for field in ("duration_minutes", "reservation_date", "party_size"):
+        response = client.put(
+            f"/api/v1/reservations/{reservation['id']}",
+            json={field: None},
+            headers=admin_headers
+        )
+        assert response.status_code == 422
+    
+    response = client.put(
+        f"/api/v1/reservations/{reservation['id']}",
+        json={"special_requests": None},
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["duration_minutes"] == reservation["duration_minutes"]
+
+def test_updates_cannot_double_book_a_table(admin_headers):
+    booth = next(table for table in client.get("/api/v1/tables/").json() if table["name"] == "Booth 1")
+    
+    def book(starts_at: str) -> int:
+        response = client.post(
+            f"/api/v1/tables/confirm-reservation?table_id={booth['id']}",
+            json={"reservation_date": starts_at, "party_size": 2},
+            headers=admin_headers
+        )
+        assert response.status_code == 200
+        return int(response.json()["reservation_id"].split("-")[1])
+    
+    def update(reservation_id: int, changes: dict):
+        return client.put(f"/api/v1/reservations/{reservation_id}", json=changes, headers=admin_headers)
+    
+    early = book("2031-05-10T17:00:00")
+    late = book("2031-05-10T20:00:00")
+    
+    # Moving or stretching the late seating into the early one is refused
+    assert update(late, {"reservation_date": "2031-05-10T18:00:00"}).status_code == 409
+    assert update(early, {"duration_minutes": 200}).status_code == 409
+    assert update(late, {"party_size": 6}).status_code == 409
+    
+    # Free windows, and changes to its own window, are fine
+    response = update(late, {"reservation_date": "2031-05-10T19:00:00", "duration_minutes": 120})
+    assert response.status_code == 200
+    assert response.json()["reservation_end"].startswith("2031-05-10T21:00:00")
+    assert update(late, {"reservation_date": "2031-05-10T19:30:00"}).status_code == 200
+    
+    # A cancelled seating cannot be restored over a booking made meanwhile
+    assert update(early, {"status": "cancelled"}).status_code == 200
+    book("2031-05-10T17:30:00")
+    assert update(early, {"status": "confirmed"}).status_code == 409
+
+def test_updates_and_deletes_patch_the_cached_day(admin_headers):
+    window = next(table for table in client.get("/api/v1/tables/").json() if table["name"] == "Window 1")
+    response = client.post(
+        f"/api/v1/tables/confirm-reservation?table_id={window['id']}",
+        json={"reservation_date": "2031-05-11T19:00:00", "party_size": 2},
+        headers=admin_headers
+    )
+    reservation_id = int(response.json()["reservation_id"].split("-")[1])
+    check("2031-05-11", "17:00", 2)
+    index = availability_engine._days[date(2031, 5, 11)]
+    assert not index.is_free(window["id"], 19 * 60, 19 * 60 + 30)
+    
+    client.put(
+        f"/api/v1/reservations/{reservation_id}",
+        json={"reservation_date": "2031-05-11T21:00:00"},
+        headers=admin_headers
+    )
+    assert availability_engine._days[date(2031, 5, 11)] is index
+    assert index.is_free(window["id"], 19 * 60, 20 * 60 + 30)
+    assert not index.is_free(window["id"], 21 * 60, 21 * 60 + 30)
+    
+    client.delete(f"/api/v1/reservations/{reservation_id}", headers=admin_headers)
+    assert availability_engine._days[date(2031, 5, 11)] is index
+    assert index.is_free(window["id"], 17 * 60, 24 * 60)
+
+def test_availability_grid(admin_headers):
+    before = client.get("/api/v1/tables/availability-grid", params={"date": "2031-03-03", "party_size": 3}).json()
+    assert before["slots"][0] == "17:00" and before["slots"][-1] == "22:00"
+    assert [table["table_name"] for table in before["tables"]] == ["Booth 1", "Private 1"]
+    
+    booth = before["tables"][0]
+    response = client.post(
+        f"/api/v1/tables/confirm-reservation?table_id={booth['table_id']}",
+        json={"reservation_date": "2031-03-03T19:00:00", "party_size": 3},
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+    
+    after = client.get("/api/v1/tables/availability-grid", params={"date": "2031-03-03", "party_size": 3}).json()
+    booth_slots = dict(zip(after["slots"], after["tables"][0]["available"]))
+    assert [slot for slot, free in booth_slots.items() if not free] == ["18:00", "18:30", "19:00", "19:30", "20:00"]
+    assert after["available_tables"][after["slots"].index("19:00")] == before["available_tables"][0] - 1
+    assert after["available_tables"][after["slots"].index("17:30")] == before["available_tables"][0]
+
+def test_availability_survives_cache_reset(admin_headers):
+    first = check("2031-03-02", "18:00", 7)
+    response = client.post(
+        f"/api/v1/tables/confirm-reservation?table_id={first['table_id']}",
+        json={"reservation_date": "2031-03-02T18:00:00", "party_size": 7},
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+    
+    # A fresh worker rebuilds the day from the database
+    availability_engine.invalidate()
+    result = check("2031-03-02", "18:00", 7)
+    assert result["available"] is False
+    assert result["alternatives"][0]["time"] == "19:30"
+
+def test_availability_calendar(admin_headers, query_counter):
+    window = next(table for table in client.get("/api/v1/tables/").json() if table["name"] == "Window 1")
+    response = client.post(
+        f"/api/v1/tables/confirm-reservation?table_id={window['id']}",
+        json={"reservation_date": "2031-04-02T17:00:00", "party_size": 2},
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+    
+    query_counter.clear()
+    response = client.post(
+        "/api/v1/tables/availability-calendar",
+        json={"start_date": "2031-04-01", "end_date": "2031-04-07", "party_size": 2}
+    )
+    assert response.status_code == 200
+    # Whole week comes from a single reservations query
+    assert sum("FROM reservations" in statement for statement in query_counter) == 1
+    
+    days = response.json()["days"]
+    assert [day["date"] for day in days][:2] == ["2031-04-01", "2031-04-02"]
+    assert len(days) == 7
+    first_slot = {day["date"]: day["slots"][0]["available_tables"] for day in days}
+    assert first_slot["2031-04-02"] == first_slot["2031-04-01"] - 1
+    
+    # Cancelling the reservation frees the slot again
+    reservations = client.get("/api/v1/reservations/my-reservations", headers=admin_headers).json()
+    reservation = next(r for r in reservations if r["reservation_date"].startswith("2031-04-02"))
+    client.put(
+        f"/api/v1/reservations/{reservation['id']}",
+        json={"status": "cancelled"},
+        headers=admin_headers
+    )
+    response = client.post(
+        "/api/v1/tables/availability-calendar",
+        json={"start_date": "2031-04-02", "end_date": "2031-04-02", "party_size": 2}
+    )
+    assert response.json()["days"][0]["slots"][0]["available_tables"] == first_slot["2031-04-01"]
+
+def test_availability_calendar_rejects_long_ranges():
+    response = client.post(
+        "/api/v1/tables/availability-calendar",
+        json={"start_date": "2031-01-01", "end_date": "2031-06-01", "party_size": 2}
+    )
+    assert response.status_code == 400
+
+def test_day_index_matches_linear_scan():
+    rng = random.Random(7)
+    tables = [TableInfo(id=i, name=f"T{i}", capacity=rng.choice([2, 4, 6, 8])) for i in range(300)]
+    index = DayIndex(date(2031, 1, 1), tables)
+    bookings = []
+    for table in tables:
+        start = 11 * 60
+        while start < 22 * 60:
+            start += rng.randrange(0, 60, 15)
+            duration = rng.choice([60, 90, 120])
+            index.add(table.id, start, start + duration)
+            bookings.append((table.id, start, start + duration))
+            start += duration
+    assert len(bookings) > 1000
+    
+    queries = [(rng.randrange(10 * 60, 23 * 60, 15), rng.randint(1, 8)) for _ in range(200)]
+    started = time.perf_counter()
+    for start, party_size in queries:
+        index.find_available_tables(start, start + 90, party_size)
+    per_lookup = (time.perf_counter() - started) / len(queries)
+    
+    for start, party_size in queries[:20]:
+        expected = {
+            table.id for table in tables
+            if table.capacity >= party_size and not any(
+                booked_table == table.id and booked_start < start + 90 and booked_end > start
+                for booked_table, booked_start, booked_end in bookings
+            )
+        }
+        found = index.find_available_tables(start, start + 90, party_size)
+        assert {table.id for table in found} == expected
+    
+    # Generous bound; lookups are typically well under a millisecond
+    assert per_lookup < 0.005
+
+def test_slot_grid_updates_incrementally():
+    rng = random.Random(11)
+    tables = [TableInfo(id=i, name=f"T{i}", capacity=rng.choice([2, 4, 6])) for i in range(40)]
+    index = DayIndex(date(2031, 1, 2), tables)
+    grid = index.grid
+    for table in tables:
+        start = rng.randrange(16 * 60, 22 * 60, 30)
+        index.add(table.id, start, start + 90)
+    
+    rebuilt = DayIndex(date(2031, 1, 2), tables)
+    for table in tables:
+        for start, end in zip(index._starts[table.id], index._ends[table.id]):
+            rebuilt.add(table.id, start, end)
+    
+    for party_size in (1, 3, 5, 7):
+        expected = [
+            len(rebuilt.find_available_tables(slot, slot + 90, party_size)) for slot in SERVICE_SLOTS
+        ]
+        assert grid.available_counts(party_size) == expected
+        assert rebuilt.grid.available_counts(party_size) == expected
+
+@pytest.mark.asyncio
+async def test_concurrent_bookings_have_one_winner(admin_headers, db_session, async_session_factory):
+    user = db_session.query(User).filter(User.email == "tables-admin@example.com").first()
+    table = next(t for t in client.get("/api/v1/tables/").json() if t["name"] == "Private 1")
+    starts_at = datetime(2031, 6, 1, 19, 0)
+    
+    async def attempt(offset: int):
+        # Overlapping windows on the same table from independent sessions
+        async with async_session_factory() as db:
+            reservation = ReservationCreate(
+                reservation_date=starts_at.replace(minute=offset % 60),
+                party_size=2
+            )
+            return await book_table(db, reservation, user.id, table["id"])
+    
+    results = await asyncio.gather(*(attempt(i) for i in range(200)))
+    winners = [result for result in results if result is not None]
+    assert len(winners) == 1
+    
+    stored = db_session.query(Reservation).filter(
+        Reservation.table_id == table["id"],
+        Reservation.reservation_date >= starts_at,
+        Reservation.reservation_date < starts_at.replace(hour=20)
+    ).count()
+    assert stored == 1
+    
+    # The endpoint reports the lost race as a conflict
+    response = client.post(
+        f"/api/v1/tables/confirm-reservation?table_id={table['id']}",
+        json={"reservation_date": "2031-06-01T19:15:00", "party_size": 2},
+        headers=admin_headers
+    )
+    assert response.status_code == 409
+
+@pytest.mark.asyncio
+async def test_booking_after_a_read_sees_a_concurrent_winner(admin_headers, db_session, async_session_factory):
+    user = db_session.query(User).filter(User.email == "tables-admin@example.com").first()
+    table = next(t for t in client.get("/api/v1/tables/").json() if t["name"] == "Private 1")
+    reservation = ReservationCreate(reservation_date=datetime(2031, 6, 2, 19, 0), party_size=2)
+    log = []
+    
+    def on_statement(conn, cursor, statement, parameters, context, executemany):
+        log.append(statement.split()[0])
+    
+    def on_commit(conn):
+        log.append("COMMIT")
+    
+    async with async_session_factory() as loser, async_session_factory() as winner:
+        # The request's user lookup opens the loser's transaction first
+        await loser.scalar(select(User).filter(User.id == user.id))
+        assert await book_table(winner, reservation, user.id, table["id"]) is not None
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", on_statement)
+        event.listen(async_engine.sync_engine, "commit", on_commit)
+        try:
+            assert await book_table(loser, reservation, user.id, table["id"]) is None
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", on_statement)
+            event.remove(async_engine.sync_engine, "commit", on_commit)
+    
+    # The lookup's snapshot is given up before the table is locked
+    assert log[:2] == ["COMMIT", "UPDATE"]
+
+def test_only_lock_conflicts_count_as_lost_races():
+    def error(orig):
+        return DBAPIError("UPDATE dining_tables ...", {}, orig)
+    
+    class PostgresError(Exception):
+        def __init__(self, sqlstate):
+            self.sqlstate = sqlstate
+    
+    def sqlite_error(code):
+        orig = sqlite3.OperationalError("database error")
+        orig.sqlite_errorcode = code
+        return orig
+    
+    assert is_lock_conflict(error(Exception(1205, "Lock wait timeout exceeded")))
+    assert is_lock_conflict(error(Exception(1213, "Deadlock found")))
+    assert is_lock_conflict(error(PostgresError("40001")))
+    assert is_lock_conflict(error(PostgresError("40P01")))
+    assert is_lock_conflict(error(sqlite_error(5)))
+    assert is_lock_conflict(error(sqlite_error(517)))
+    
+    assert not is_lock_conflict(error(Exception(2013, "Lost connection to MySQL server")))
+    assert not is_lock_conflict(error(PostgresError("23505")))
+    assert not is_lock_conflict(error(sqlite_error(1)))
@@ -156,7 +156,9 @@ export const orderService = {
         throw new Error('Failed to fetch orders');
       }
 
-      return await response.json();
+      // The list is cursor-paginated; the first page holds the newest orders
+      const page = await response.json();
+      return page.items;
     } catch (error) {
       console.error('Error fetching orders:', error);
       throw error;